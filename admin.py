@@ -2,16 +2,42 @@ from __future__ import annotations
 
 from typing import Any, Dict, List
 
+from cache import hit_rates
 from logger import logger
+from metrics import (
+    COMMAND_LATENCY,
+    EVENTS_RECEIVED,
+    LLM_INFLIGHT,
+    LLM_QUEUE_DEPTH,
+    LLM_QUEUE_WAIT,
+    LLM_REJECTED,
+    LLM_SAVED,
+    PLUGIN_CRASHES,
+    QUEUE_DEPTH,
+    SEND_TOTAL,
+    WINDOW,
+    WORKER_BUSY_SECONDS,
+    WORKERS,
+    WORKERS_BUSY,
+    histogram_quantile,
+    process_rss_bytes,
+    uptime_seconds,
+)
+from profiler import MemoryProfiler, SamplingProfiler, interval_from, parse_top
 
 
 class AdminHandler:
     """Processes commands reserved for super administrators."""
 
     def __init__(self) -> None:
+        self._cpu_profiler = SamplingProfiler()
+        self._mem_profiler = MemoryProfiler()
         self._commands = {
             "ping": self._ping,
             "status": self._status,
+            "stats": self._stats,
+            "profile": self._profile,
+            "mem": self._mem,
         }
 
     def handle(self, params: List[str], context: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -31,12 +57,115 @@ class AdminHandler:
         details = f"source={context.get('source')} group={context.get('group_id')} user={context.get('user_id')}"
         return [self._make_text_response(context, f"bot online ({details})")]
 
+    def _stats(self, _: List[str], context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        windows = {label: WINDOW.delta(seconds) for label, seconds in (("1m", 60), ("5m", 300), ("15m", 900))}
+        workers = max(int(WORKERS.value()), 1)
+
+        rates = []
+        utilization = []
+        for label, (elapsed, delta) in windows.items():
+            events = sum(delta[EVENTS_RECEIVED.name].values())
+            busy = sum(delta[WORKER_BUSY_SECONDS.name].values())
+            rates.append(f"{label}={events / elapsed:.2f}")
+            utilization.append(f"{label}={busy * 100 / (elapsed * workers):.0f}%")
+
+        _, recent = windows["15m"]
+        lines = [
+            f"uptime {_format_duration(uptime_seconds())}, rss {process_rss_bytes() / 1024 / 1024:.1f}MiB",
+            f"events/s {' '.join(rates)}",
+            f"queue {int(QUEUE_DEPTH.value())}, busy {int(WORKERS_BUSY.value())}/{workers}, util {' '.join(utilization)}",
+        ]
+
+        latencies = []
+        for labels, slots in recent[COMMAND_LATENCY.name].items():
+            if slots[-1] <= 0:
+                continue
+            p50 = histogram_quantile(COMMAND_LATENCY.buckets, slots, 0.5)
+            p99 = histogram_quantile(COMMAND_LATENCY.buckets, slots, 0.99)
+            latencies.append((p99, p50, int(slots[-1]), labels[0]))
+        latencies.sort(reverse=True)
+        if latencies:
+            lines.append("slowest commands (15m):")
+            for p99, p50, count, command in latencies[:5]:
+                lines.append(f"  {command} p50={p50 * 1000:.0f}ms p99={p99 * 1000:.0f}ms n={count}")
+
+        crashes = {labels[0]: value for labels, value in recent[PLUGIN_CRASHES.name].items() if value}
+        totals = {labels[0]: value for labels, value in PLUGIN_CRASHES.values().items()}
+        if totals:
+            lines.append(
+                "plugin errors (15m/total): "
+                + ", ".join(f"{name}={int(crashes.get(name, 0))}/{int(total)}" for name, total in sorted(totals.items()))
+            )
+        else:
+            lines.append("plugin errors: none")
+
+        sent = failed = 0.0
+        for (_action, result), value in recent[SEND_TOTAL.name].items():
+            sent += value
+            if result == "failure":
+                failed += value
+        rate = failed * 100 / sent if sent else 0.0
+        lines.append(f"send failures (15m): {rate:.1f}% ({int(failed)}/{int(sent)})")
+
+        caches = []
+        for name, (hits, misses) in sorted(hit_rates().items()):
+            lookups = hits + misses
+            caches.append(f"{name}={hits * 100 / lookups:.0f}% of {int(lookups)}" if lookups else f"{name}=n/a")
+        if caches:
+            lines.append(f"cache hit rate: {', '.join(caches)}")
+        saved = {labels[0]: int(value) for labels, value in LLM_SAVED.values().items() if value}
+        if saved:
+            lines.append("llm calls saved: " + ", ".join(f"{reason}={count}" for reason, count in sorted(saved.items())))
+        waits = LLM_QUEUE_WAIT.values().get(())
+        rejected = {labels[0]: int(value) for labels, value in LLM_REJECTED.values().items() if value}
+        if waits or rejected:
+            line = f"llm inflight {int(LLM_INFLIGHT.value())}, queued {int(LLM_QUEUE_DEPTH.value())}"
+            if waits:
+                p99 = histogram_quantile(LLM_QUEUE_WAIT.buckets, waits, 0.99)
+                line += f", queue wait p99={p99 * 1000:.0f}ms n={int(waits[-1])}"
+            if rejected:
+                line += ", rejected " + " ".join(f"{reason}={count}" for reason, count in sorted(rejected.items()))
+            lines.append(line)
+        return [self._make_text_response(context, "\n".join(lines))]
+
+    def _profile(self, params: List[str], context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        action = params[0].lower() if params else ""
+        if action == "start":
+            interval = interval_from(params[1:])
+            if not self._cpu_profiler.start(interval):
+                return [self._make_text_response(context, "CPU profiler is already running.")]
+            return [
+                self._make_text_response(
+                    context, f"CPU profiler started ({interval * 1000:.1f}ms interval). Stop with `profile stop`."
+                )
+            ]
+        if action == "stop":
+            profile = self._cpu_profiler.stop()
+            if profile is None:
+                return [self._make_text_response(context, "CPU profiler is not running.")]
+            path = profile.write()
+            lines = [f"CPU profile: {profile.samples} samples in {profile.duration:.1f}s"]
+            lines.extend(profile.top(parse_top(params[1:])))
+            lines.append(f"Full report: {path}")
+            return [self._make_text_response(context, "\n".join(lines))]
+        return [self._make_text_response(context, "Usage: profile start [interval_ms] | profile stop [top_n]")]
+
+    def _mem(self, params: List[str], context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if params and params[0].lower() == "stop":
+            stopped = self._mem_profiler.stop()
+            text = "tracemalloc stopped." if stopped else "tracemalloc is not running."
+            return [self._make_text_response(context, text)]
+        lines, path = self._mem_profiler.snapshot(parse_top(params))
+        if path is not None:
+            lines.append(f"Full report: {path}")
+        return [self._make_text_response(context, "\n".join(lines))]
+
     def _unknown(self, params: List[str], context: Dict[str, Any]) -> List[Dict[str, Any]]:
         attempted = params[0] if params else "unknown"
         return [
             self._make_text_response(
                 context,
-                f"Unknown admin command: {attempted}. Try ping/status.",
+                f"Unknown admin command: {attempted}. Try ping/status/stats/profile/mem.",
             )
         ]
 
@@ -44,3 +173,14 @@ class AdminHandler:
     def _make_text_response(context: Dict[str, Any], text: str) -> Dict[str, Any]:
         action = "send_group_msg" if context.get("source") == "group" else "send_private_msg"
         return {"type": action, "text": text}
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    if days:
+        return f"{days}d{hours:02d}h{minutes:02d}m"
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    return f"{minutes}m{secs:02d}s"
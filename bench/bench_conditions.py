@@ -0,0 +1,169 @@
+"""Compare lifeRestart condition compile/evaluation speed: legacy eval vs compiled predicates.
+
+Usage: python bench/bench_conditions.py [--states 200] [--rounds 3] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from plugins.restart_engine import Utils  # noqa: E402
+
+DATA_DIR = ROOT / "data" / "restart"
+
+
+class _LegacyDummyList(list):
+    def __contains__(self, o: object) -> bool:
+        if type(o) is set:
+            for x in self:
+                if x in o:
+                    return True
+            return False
+        return super().__contains__(o)
+
+
+_legacy_regattr = re.compile("[A-Z]{3}")
+
+
+def legacy_parse(cond: str) -> Callable[[Any], bool]:
+    """The eval-based parser this repo shipped before conditions were compiled."""
+    cond2 = (
+        _legacy_regattr.sub(lambda m: f'getattr(x, "{m.group()}")', cond.replace("AEVT", "AVT"))
+        .replace("?[", " in DummyList([")
+        .replace("![", "not in DummyList([")
+        .replace("]", "])")
+        .replace("|", " or ")
+    )
+    while True:
+        try:
+            return eval(f"lambda x: {cond2}", {"DummyList": _LegacyDummyList})
+        except SyntaxError:
+            cond2 += ")"
+
+
+def load_conditions() -> List[str]:
+    with (DATA_DIR / "events.json").open(encoding="utf-8") as handle:
+        events = json.load(handle)
+    with (DATA_DIR / "talents.json").open(encoding="utf-8") as handle:
+        talents = json.load(handle)
+    conditions = []
+    for event in events.values():
+        for key in ("include", "exclude"):
+            if key in event:
+                conditions.append(event[key])
+        conditions.extend(branch.rsplit(":", 1)[0] for branch in event.get("branch", []))
+    conditions.extend(talent["condition"] for talent in talents.values() if "condition" in talent)
+    return conditions
+
+
+def make_states(count: int, event_ids: List[int], talent_ids: List[int]) -> List[SimpleNamespace]:
+    rnd = random.Random(20240601)
+    states = []
+    for _ in range(count):
+        states.append(
+            SimpleNamespace(
+                CHR=rnd.randint(-2, 12),
+                INT=rnd.randint(-2, 12),
+                STR=rnd.randint(-2, 12),
+                MNY=rnd.randint(-2, 12),
+                SPR=rnd.randint(-2, 12),
+                AGE=rnd.randint(0, 100),
+                LIF=1,
+                TMS=rnd.randint(1, 20),
+                AVT=[],
+                TLT=set(rnd.sample(talent_ids, 3)),
+                EVT=set(rnd.sample(event_ids, rnd.randint(5, 60))),
+            )
+        )
+    return states
+
+
+def as_bitsets(state: SimpleNamespace) -> SimpleNamespace:
+    """The engine keeps TLT/EVT/AVT as bitsets; compiled predicates expect them so."""
+    return SimpleNamespace(
+        **{
+            **vars(state),
+            "AVT": Utils.EVENT_BITS.mask(state.AVT),
+            "TLT": Utils.TALENT_BITS.mask(sorted(state.TLT)),
+            "EVT": Utils.EVENT_BITS.mask(sorted(state.EVT)),
+        }
+    )
+
+
+def bench(
+    name: str, parse: Callable[[str], Callable[[Any], bool]], unique: List[str], states: List[Any], rounds: int
+) -> Dict[str, float]:
+    started = time.perf_counter()
+    compiled = [parse(cond) for cond in unique]
+    compile_seconds = time.perf_counter() - started
+
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for state in states:
+            for func in compiled:
+                func(state)
+        best = min(best, time.perf_counter() - started)
+    evaluations = len(compiled) * len(states)
+    return {
+        "compile_ms": compile_seconds * 1000,
+        "evals_per_sec": evaluations / best,
+        "evaluations": evaluations,
+        "name": name,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--states", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="emit machine-readable results")
+    args = parser.parse_args()
+
+    conditions = load_conditions()
+    unique = sorted(set(conditions))
+    ids = [int(n) for n in re.findall(r"\d{5}", " ".join(unique))]
+    talent_ids = [int(n) for n in re.findall(r"\b1\d{3}\b", " ".join(unique))]
+    states = make_states(args.states, sorted(set(ids)), sorted(set(talent_ids)))
+    bit_states = [as_bitsets(state) for state in states]
+
+    Utils._interned.clear()
+    results = [
+        bench("legacy-eval", legacy_parse, unique, states, args.rounds),
+        bench("compiled", Utils.parseCondition, unique, bit_states, args.rounds),
+    ]
+
+    # Legacy `A<1&B<2` parses as a chained comparison against (1&B); those
+    # strings legitimately disagree, everything else must match.
+    mismatches = 0
+    for cond in unique:
+        old, new = legacy_parse(cond), Utils.parseCondition(cond)
+        if any(old(state) != new(bits) for state, bits in zip(states, bit_states)):
+            mismatches += 1
+
+    if args.json:
+        print(json.dumps({"conditions": len(conditions), "unique": len(unique), "mismatches": mismatches, "results": results}))
+        return
+    print(f"{len(conditions)} conditions ({len(unique)} unique), {len(states)} states")
+    for result in results:
+        print(
+            f"{result['name']:>12}: compile {result['compile_ms']:8.1f}ms  "
+            f"{result['evals_per_sec'] / 1e6:6.2f}M evals/s"
+        )
+    speedup = results[1]["evals_per_sec"] / results[0]["evals_per_sec"]
+    print(f"speedup x{speedup:.2f}; {mismatches} conditions disagree (legacy & precedence bug)")
+
+
+if __name__ == "__main__":
+    main()
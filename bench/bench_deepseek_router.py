@@ -0,0 +1,225 @@
+""".bot chat load test through the whole bot: queue, workers, router, plugin and SendClient, against local stubs.
+
+Starts bench/deepseek_stub.py as the API and a recording stand-in for the
+OneBot HTTP endpoint, points ``deepseek.base_url`` and ``send`` at them,
+and runs --concurrency simulated users that each send a chat, wait for
+its answer and send the next, --chats times. Reports chats per second,
+reply latency (event enqueued -> answer posted to OneBot), worker
+occupancy, how many answers were error messages and how many chats were
+told to queue.
+
+Replies are configured as one message per chat (no ack, no streaming) so
+the answer is the message that ends each chat; caching, history and
+quotas are off so every chat reaches the stub.
+
+Usage: python bench/bench_deepseek_router.py [--concurrency 16] [--chats 5] [--workers 4] [--max-concurrent 16]
+       [--first-token-ms 500] [--token-ms 0] [--reply-chars 200] [--latency fixed] [--error-rate 0] [--drop-rate 0] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from queue import Queue
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from bench.deepseek_stub import StubConfig, StubServer, add_fault_arguments, fault_options, serve  # noqa: E402
+from main import start_workers  # noqa: E402
+from message_router import MessageRouter  # noqa: E402
+from metrics import WORKER_BUSY_SECONDS  # noqa: E402
+from plugins.plugins_deepseek import QUEUE_NOTICE  # noqa: E402
+
+ERROR_MARKERS = ("请求失败", "解析失败", "没有返回")
+QUEUE_NOTICE_PREFIX = QUEUE_NOTICE.split("{", 1)[0]
+USER_BASE = 910000
+
+
+class _Sink:
+    """Records the answers the bot posts to "OneBot" and wakes whoever waits on that user.
+
+    Queue-position notices are counted but do not end a chat.
+    """
+
+    def __init__(self) -> None:
+        self._replies: Dict[str, List[str]] = {}
+        self._arrived: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.notices = 0
+
+    def expect(self, user_id: str) -> threading.Event:
+        with self._lock:
+            event = self._arrived[user_id] = threading.Event()
+            self._replies[user_id] = []
+        return event
+
+    def record(self, payload: Dict[str, Any]) -> None:
+        user_id = str(payload.get("user_id"))
+        text = "".join(segment["data"].get("text", "") for segment in payload.get("message", []))
+        if text.startswith(QUEUE_NOTICE_PREFIX):
+            with self._lock:
+                self.notices += 1
+            return
+        with self._lock:
+            self._replies.setdefault(user_id, []).append(text)
+            event = self._arrived.get(user_id)
+        if event is not None:
+            event.set()
+
+    def last(self, user_id: str) -> str:
+        with self._lock:
+            return self._replies[user_id][-1]
+
+
+def _serve_sink(sink: _Sink) -> StubServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self) -> None:  # noqa: N802 - http.server naming
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            sink.record(json.loads(body or b"{}"))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+            pass
+
+    server = StubServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, name="onebot-sink", daemon=True).start()
+    return server
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    stub = serve(StubConfig(args.first_token_ms / 1000, args.token_ms / 1000, args.reply_chars, **fault_options(args)))
+    sink = _Sink()
+    onebot = _serve_sink(sink)
+    settings = {
+        "type": "http",
+        "ip": "127.0.0.1",
+        "listen": 0,
+        "send": onebot.server_port,
+        "group": [],
+        "private": ["all"],
+        "superadmin": [],
+        "workers": args.workers,
+        "deepseek": {
+            "enabled": True,
+            "api_key": "stub",
+            "base_url": f"http://127.0.0.1:{stub.server_port}",
+            "stream": False,
+            "ack": "",
+            "history_tokens": 0,
+            "cache_entries": 0,
+            "user_quota": 0,
+            "group_quota": 0,
+            "max_concurrent": args.max_concurrent,
+            "max_queue": args.concurrency,
+        },
+    }
+    queue: Queue = Queue()
+    start_workers(queue, MessageRouter(settings), args.workers)
+
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def user(index: int) -> None:
+        nonlocal errors
+        user_id = str(USER_BASE + index)
+        for chat in range(args.chats):
+            arrived = sink.expect(user_id)
+            started = time.perf_counter()
+            queue.put(
+                {
+                    "post_type": "message",
+                    "message_type": "private",
+                    "user_id": user_id,
+                    "message_id": f"{user_id}-{chat}",
+                    "raw_message": f".bot chat 压测问题 {index}-{chat}",
+                }
+            )
+            if not arrived.wait(args.timeout):
+                raise RuntimeError(f"no reply for user {user_id} within {args.timeout}s")
+            failed = any(marker in sink.last(user_id) for marker in ERROR_MARKERS)
+            with lock:
+                latencies.append(time.perf_counter() - started)
+                errors += failed
+
+    busy_before = WORKER_BUSY_SECONDS.total()
+    started = time.perf_counter()
+    users = [threading.Thread(target=user, args=(index,), daemon=True) for index in range(args.concurrency)]
+    for thread in users:
+        thread.start()
+    for thread in users:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    busy = WORKER_BUSY_SECONDS.total() - busy_before
+    stub.shutdown()
+    onebot.shutdown()
+
+    latencies.sort()
+    return {
+        "concurrency": args.concurrency,
+        "workers": args.workers,
+        "chats": len(latencies),
+        "seconds": elapsed,
+        "chats_per_sec": len(latencies) / elapsed,
+        "latency_p50_ms": statistics.median(latencies) * 1000,
+        "latency_p90_ms": latencies[int(0.9 * (len(latencies) - 1))] * 1000,
+        "latency_p99_ms": latencies[int(0.99 * (len(latencies) - 1))] * 1000,
+        "worker_occupancy": busy / (elapsed * args.workers),
+        "error_replies": errors,
+        "queue_notices": sink.notices,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16, help="simulated users chatting at once")
+    parser.add_argument("--chats", type=int, default=5, help="chats per user")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-concurrent", type=int, default=16, help="deepseek.max_concurrent")
+    parser.add_argument("--first-token-ms", type=float, default=500)
+    parser.add_argument("--token-ms", type=float, default=0)
+    parser.add_argument("--reply-chars", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for any one reply")
+    parser.add_argument("--verbose", action="store_true", help="keep the bot's INFO logging")
+    add_fault_arguments(parser)
+    parser.add_argument("--json", action="store_true", help="emit machine-readable results")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger("bot").setLevel(logging.ERROR)
+    result = run(args)
+
+    if args.json:
+        print(json.dumps(result))
+        return
+    print(
+        f"{result['chats']} chats from {result['concurrency']} users on {result['workers']} workers "
+        f"in {result['seconds']:.2f}s: {result['chats_per_sec']:.1f} chats/s"
+    )
+    print(
+        f"reply latency p50 {result['latency_p50_ms']:.0f}ms  p90 {result['latency_p90_ms']:.0f}ms  "
+        f"p99 {result['latency_p99_ms']:.0f}ms"
+    )
+    print(
+        f"worker occupancy {result['worker_occupancy']:.1%}, {result['error_replies']} error replies, "
+        f"{result['queue_notices']} queue notices"
+    )
+
+
+if __name__ == "__main__":
+    main()
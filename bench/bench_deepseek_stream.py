@@ -0,0 +1,83 @@
+"""Time to first message and to the full answer for .bot chat, streamed vs not, against the local stub.
+
+Drives the plugin's reply coroutines with a recording ``context["send"]``
+against bench/deepseek_stub.py, so nothing leaves the machine.
+
+Usage: python bench/bench_deepseek_stream.py [--chats 5] [--first-token-ms 500] [--token-ms 20] [--reply-chars 600] [--flush-chars 80] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from bench.deepseek_stub import StubConfig, serve  # noqa: E402
+from plugins import plugins_deepseek  # noqa: E402
+from plugins.deepseek import ChatClient  # noqa: E402
+
+
+def run(name: str, stream: bool, url: str, chats: int, flush_chars: int) -> Dict[str, Any]:
+    client = ChatClient(url, "stub")
+    payload = {"model": plugins_deepseek.DEFAULT_MODEL, "messages": [{"role": "user", "content": "question"}]}
+    first: List[float] = []
+    total: List[float] = []
+    messages = 0
+    for _ in range(chats):
+        arrivals: List[float] = []
+        context: Dict[str, Any] = {"source": "private", "user_id": "10000"}
+        context["send"] = lambda _responses, arrivals=arrivals: arrivals.append(time.perf_counter())
+        if stream:
+            answer = plugins_deepseek._stream_answer(client, payload, context, flush_chars)
+        else:
+            answer = plugins_deepseek._answer(client, payload, context)
+        started = time.perf_counter()
+        plugins_deepseek._runner.submit(answer).result()
+        first.append(arrivals[0] - started)
+        total.append(arrivals[-1] - started)
+        messages += len(arrivals)
+    return {
+        "name": name,
+        "first_message_ms": statistics.median(first) * 1000,
+        "full_answer_ms": statistics.median(total) * 1000,
+        "messages_per_answer": messages / chats,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, default=5)
+    parser.add_argument("--first-token-ms", type=float, default=500)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--reply-chars", type=int, default=600)
+    parser.add_argument("--flush-chars", type=int, default=plugins_deepseek.DEFAULT_FLUSH_CHARS)
+    parser.add_argument("--json", action="store_true", help="emit machine-readable results")
+    args = parser.parse_args()
+
+    server = serve(StubConfig(args.first_token_ms / 1000, args.token_ms / 1000, args.reply_chars))
+    url = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+    results = [
+        run("blocking", False, url, args.chats, args.flush_chars),
+        run("streamed", True, url, args.chats, args.flush_chars),
+    ]
+    server.shutdown()
+
+    if args.json:
+        print(json.dumps({"results": results}))
+        return
+    for result in results:
+        print(
+            f"{result['name']:>9}: first message {result['first_message_ms']:8.1f}ms  "
+            f"full answer {result['full_answer_ms']:8.1f}ms  {result['messages_per_answer']:.1f} messages"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Articles per second of the goupibutong generator: legacy join-and-replace loop vs pre-tokenized templates.
+
+"pooled" is what a request costs when the background pool has a skeleton
+ready: splicing the topic into pre-split paragraphs.
+
+Every template is also rendered both ways against every before/after phrase
+and a few topics; any text that comes out differently is counted as a
+mismatch.
+
+Usage: python bench/bench_goupibutong.py [--articles 200] [--rounds 3] [--topic 人生意义] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from plugins import plugins_goupibutong as gpb  # noqa: E402
+
+TOPICS = ("人生意义", "x", "a b", "")
+
+
+def _legacy_cycle(items: List[str], rnd: random.Random) -> Iterator[str]:
+    pool = list(items) * gpb.DUPLICATION_FACTOR or [""]
+    while True:
+        rnd.shuffle(pool)
+        for entry in pool:
+            yield entry
+
+
+def _legacy_quote(sentence: str, before: str, after: str) -> str:
+    return sentence.replace("a", before, 1).replace("b", after, 1)
+
+
+def legacy_article(data: Dict[str, List[str]], topic: str, rnd: random.Random) -> str:
+    """The loop this repo shipped before templates were pre-tokenized (shared iterators made local)."""
+    bosh = _legacy_cycle(data.get("bosh", []), rnd)
+    famous = _legacy_cycle(data.get("famous", []), rnd)
+    buffer: List[str] = []
+    while len("".join(buffer)) < gpb.MAX_LENGTH:
+        branch = rnd.randint(0, 100)
+        if branch < gpb.PARAGRAPH_THRESHOLD:
+            buffer.append(gpb.PARAGRAPH_BREAK)
+        elif branch < gpb.QUOTE_THRESHOLD:
+            before = rnd.choice(data.get("before", ["曾经说过"]))
+            after = rnd.choice(data.get("after", ["这启发了我。"]))
+            buffer.append(_legacy_quote(next(famous), before, after))
+        else:
+            buffer.append(next(bosh))
+    return "".join(buffer).replace("x", topic)
+
+
+def render(segments: tuple, topic: str, slots: Dict[str, str]) -> str:
+    return "".join(topic.join((seg if type(seg) is gpb._Text else gpb._Text(slots[seg])).chunks) for seg in segments)
+
+
+def mismatches(data: Dict[str, List[str]]) -> int:
+    count = 0
+    for topic in TOPICS:
+        for text in data.get("bosh", []):
+            count += render((gpb._Text(text),), topic, {}) != text.replace("x", topic)
+        for text in data.get("famous", []):
+            segments = gpb._quote_segments(text)
+            for before in data.get("before", []):
+                for after in data.get("after", []):
+                    expected = _legacy_quote(text, before, after).replace("x", topic)
+                    count += render(segments, topic, {"before": before, "after": after}) != expected
+    return count
+
+
+def bench(name: str, build: Callable[[random.Random], str], articles: int, rounds: int) -> Dict[str, float]:
+    best = float("inf")
+    chars = 0
+    for _ in range(rounds):
+        rnd = random.Random(20240601)
+        chars = 0
+        started = time.perf_counter()
+        for _ in range(articles):
+            chars += len(build(rnd))
+        best = min(best, time.perf_counter() - started)
+    return {"name": name, "articles_per_sec": articles / best, "chars_per_article": chars / articles}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--topic", default="人生意义")
+    parser.add_argument("--json", action="store_true", help="emit machine-readable results")
+    args = parser.parse_args()
+
+    data = gpb._load_templates()
+    corpus = gpb._load_corpus()
+    if corpus is None:
+        sys.exit(f"cannot load {gpb.DATA_FILE}")
+    results = [
+        bench("legacy", lambda rnd: legacy_article(data, args.topic, rnd), args.articles, args.rounds),
+        bench("tokenized", lambda rnd: gpb._build_article(corpus, args.topic, rnd), args.articles, args.rounds),
+    ]
+    skeletons = [gpb._render_skeleton(corpus) for _ in range(args.articles)]
+    pending = iter(skeletons * args.rounds)
+    results.append(
+        bench(
+            "pooled",
+            lambda rnd: "".join(args.topic.join(chunks) for chunks in next(pending)),
+            args.articles,
+            args.rounds,
+        )
+    )
+    bad = mismatches(data)
+
+    if args.json:
+        print(json.dumps({"mismatches": bad, "results": results}))
+        return
+    for result in results:
+        print(
+            f"{result['name']:>10}: {result['articles_per_sec']:8.1f} articles/s  "
+            f"{result['chars_per_article']:7.0f} chars/article"
+        )
+    speedup = results[1]["articles_per_sec"] / results[0]["articles_per_sec"]
+    pooled = results[2]["articles_per_sec"] / results[0]["articles_per_sec"]
+    print(f"speedup x{speedup:.2f} (pooled x{pooled:.0f}); {bad} rendered templates disagree")
+
+
+if __name__ == "__main__":
+    main()
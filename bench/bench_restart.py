@@ -0,0 +1,275 @@
+"""Benchmark suite for the lifeRestart engine, compared against a stored baseline.
+
+Covers Life.load time and memory (JSON and table cache, each in a fresh
+interpreter), talent rolls, the per-year cost of Life.run, whole lives per
+second, condition compile time, condition evaluation cost and how many
+conditions a simulated year evaluates. Everything is seeded, and timings
+are the best of --repeat rounds, so two runs on the same machine differ by
+noise only.
+
+Results are compared with bench/baselines/restart.json; a metric that got
+worse by more than --tolerance is reported as a regression and the script
+exits with status 1. --save writes the current results as the new baseline.
+
+Usage: python bench/bench_restart.py [--repeat 5] [--tolerance 0.2] [--json] [--save] [--baseline PATH]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from plugins.restart_engine import Life, Utils  # noqa: E402
+from plugins.restart_engine.EventManager import EventManager  # noqa: E402
+from plugins.restart_engine.TalentManager import TalentManager  # noqa: E402
+
+DATA_DIR = ROOT / "data" / "restart"
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "restart.json"
+ALLOCATION = {"CHR": 5, "INT": 5, "STR": 5, "MNY": 5}
+LIVES = 200
+TALENT_ROLLS = 2000
+STATE_EVERY = 7  # years between condition states sampled from real lives
+SNAPSHOT_PROPS = ("CHR", "INT", "STR", "MNY", "SPR", "AGE", "LIF", "TMS", "AVT", "TLT", "EVT")
+
+# tracemalloc slows loading several times over, so time and memory come
+# from separate interpreters
+_LOAD_PROBE = """
+import json, sys, time, tracemalloc
+sys.path.insert(0, {root!r})
+from plugins.restart_engine import Life
+if {trace!r}:
+    tracemalloc.start()
+started = time.perf_counter()
+Life.load({data!r}, cache={cache!r})
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "bytes": tracemalloc.get_traced_memory()[0]}}))
+"""
+
+
+def _metric(value: float, unit: str, better: str) -> Dict[str, Any]:
+    return {"value": value, "unit": unit, "better": better}
+
+
+def _best(repeat: int, func: Callable[[], float]) -> float:
+    return min(func() for _ in range(repeat))
+
+
+def _load_probe(cache: bool, trace: bool = False) -> Dict[str, float]:
+    code = _LOAD_PROBE.format(root=str(ROOT), data=str(DATA_DIR), cache=cache, trace=trace)
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def bench_load(repeat: int) -> Dict[str, Dict[str, Any]]:
+    _load_probe(cache=True)  # make sure the cache exists before timing warm loads
+    metrics = {}
+    for name, cache in (("json", False), ("cache", True)):
+        seconds = min(_load_probe(cache)["seconds"] for _ in range(repeat))
+        metrics[f"load_{name}_ms"] = _metric(seconds * 1000, "ms", "lower")
+        metrics[f"load_{name}_mib"] = _metric(_load_probe(cache, trace=True)["bytes"] / 1024 / 1024, "MiB", "lower")
+    return metrics
+
+
+def _new_life(seed: int) -> Life:
+    life = Life(random.Random(seed))
+    for talent in list(life.talent.genTalents(Life._talent_finalist))[: Life._talent_choose]:
+        life.talent.addTalent(talent)
+    life.talent.updateTalentProp()
+    life.property.apply(ALLOCATION)
+    return life
+
+
+def bench_talents(repeat: int) -> Dict[str, Dict[str, Any]]:
+    def once() -> float:
+        lives = [Life(random.Random(seed)) for seed in range(TALENT_ROLLS)]
+        started = time.perf_counter()
+        for life in lives:
+            for _ in life.talent.genTalents(Life._talent_finalist):
+                pass
+        return time.perf_counter() - started
+
+    return {"gen_talents_per_sec": _metric(TALENT_ROLLS / _best(repeat, once), "rolls/s", "higher")}
+
+
+def bench_lives(repeat: int) -> Dict[str, Dict[str, Any]]:
+    years = 0
+
+    def whole() -> float:
+        started = time.perf_counter()
+        for seed in range(LIVES):
+            for _ in _new_life(seed).run():
+                pass
+        return time.perf_counter() - started
+
+    def steps() -> float:
+        nonlocal years
+        lives = [_new_life(seed) for seed in range(LIVES)]
+        years = 0
+        started = time.perf_counter()
+        for life in lives:
+            for _ in life.run():
+                years += 1
+        return time.perf_counter() - started
+
+    step = _best(repeat, steps)
+    return {
+        "year_step_us": _metric(step / years * 1e6, "us", "lower"),
+        "lives_per_sec": _metric(LIVES / _best(repeat, whole), "lives/s", "higher"),
+        "years_per_life": _metric(years / LIVES, "years", "info"),
+    }
+
+
+def _conditions() -> List[str]:
+    with (DATA_DIR / "events.json").open(encoding="utf-8") as handle:
+        events = json.load(handle)
+    with (DATA_DIR / "talents.json").open(encoding="utf-8") as handle:
+        talents = json.load(handle)
+    conditions = set()
+    for event in events.values():
+        conditions.update(event[key] for key in ("include", "exclude") if key in event)
+        conditions.update(branch.rsplit(":", 1)[0] for branch in event.get("branch", []))
+    conditions.update(talent["condition"] for talent in talents.values() if "condition" in talent)
+    return sorted(conditions)
+
+
+def _states() -> List[SimpleNamespace]:
+    """Property snapshots taken along real lives, so set sizes and values are realistic."""
+    states = []
+    for seed in range(LIVES // 4):
+        life = _new_life(seed)
+        for year, _ in enumerate(life.run()):
+            if year % STATE_EVERY == 0:
+                states.append(SimpleNamespace(**{k: getattr(life.property, k) for k in SNAPSHOT_PROPS}))
+    return states
+
+
+def bench_conditions(repeat: int) -> Dict[str, Dict[str, Any]]:
+    conditions = _conditions()
+
+    def compile_all() -> float:
+        Utils._interned.clear()
+        started = time.perf_counter()
+        for cond in conditions:
+            Utils.parseCondition(cond)
+        return time.perf_counter() - started
+
+    compile_seconds = _best(repeat, compile_all)
+    predicates = [Utils.parseCondition(cond) for cond in conditions]
+    states = _states()
+
+    def evaluate() -> float:
+        started = time.perf_counter()
+        for state in states:
+            for predicate in predicates:
+                predicate(state)
+        return time.perf_counter() - started
+
+    evaluations = len(predicates) * len(states)
+    return {
+        "condition_compile_us": _metric(compile_seconds / len(conditions) * 1e6, "us", "lower"),
+        "condition_eval_ns": _metric(_best(repeat, evaluate) / evaluations * 1e9, "ns", "lower"),
+    }
+
+
+def bench_evaluations(_repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Event/talent condition calls per simulated year; a count, so it does not depend on the machine."""
+    calls = 0
+
+    def counted(predicate: Callable[[Any], bool]) -> Callable[[Any], bool]:
+        def wrapper(prop: Any) -> bool:
+            nonlocal calls
+            calls += 1
+            return predicate(prop)
+
+        return wrapper
+
+    slots = [(ev, name) for ev in EventManager._events.values() for name in ("_include", "_exclude")]
+    slots += [(talent, "_cond") for talent in TalentManager.talentDict.values()]
+    originals = [getattr(owner, name) for owner, name in slots]
+    for (owner, name), predicate in zip(slots, originals):
+        setattr(owner, name, counted(predicate))
+    years = 0
+    try:
+        for seed in range(LIVES):
+            years += sum(1 for _ in _new_life(seed).run())
+    finally:
+        for (owner, name), predicate in zip(slots, originals):
+            setattr(owner, name, predicate)
+    return {"condition_evals_per_year": _metric(calls / years, "calls", "lower")}
+
+
+def run(repeat: int) -> Dict[str, Any]:
+    Life.load(str(DATA_DIR))
+    metrics: Dict[str, Dict[str, Any]] = {}
+    for bench in (bench_load, bench_talents, bench_lives, bench_conditions, bench_evaluations):
+        metrics.update(bench(repeat))
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "metrics": metrics,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> Dict[str, Dict[str, Any]]:
+    """Per metric change against the baseline; positive ``change`` is always an improvement."""
+    report = {}
+    for name, current in results["metrics"].items():
+        previous = baseline.get("metrics", {}).get(name)
+        if previous is None or current["better"] == "info" or not previous["value"] or not current["value"]:
+            continue
+        ratio = current["value"] / previous["value"]
+        change = ratio - 1 if current["better"] == "higher" else 1 / ratio - 1
+        report[name] = {"baseline": previous["value"], "change": change, "regression": change < -tolerance}
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="rounds per timing, best one counts")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before failing")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--json", action="store_true", help="emit machine-readable results")
+    args = parser.parse_args()
+
+    results = run(max(args.repeat, 1))
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else None
+    report = compare(results, baseline, args.tolerance) if baseline else {}
+    regressions = sorted(name for name, item in report.items() if item["regression"])
+
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    if args.json:
+        print(json.dumps({**results, "baseline": report, "regressions": regressions}))
+    else:
+        for name, metric in results["metrics"].items():
+            line = f"{name:>22}: {metric['value']:12.2f} {metric['unit']:<7}"
+            if name in report:
+                item = report[name]
+                flag = "  REGRESSION" if item["regression"] else ""
+                line += f" baseline {item['baseline']:12.2f} ({item['change']:+.1%}){flag}"
+            print(line)
+        if baseline is None:
+            print(f"no baseline at {args.baseline}; run with --save to create one")
+        if args.save:
+            print(f"baseline written to {args.baseline}")
+    if regressions and not args.save:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Throughput of lifeRestart Monte Carlo: looping over Life objects vs the numpy batch engine.
+
+Both sides run the same talents and allocation; the lifespan quantiles are
+printed next to each other so a rules drift between the two shows up here.
+
+Usage: python bench/bench_restart_batch.py [--lives 2000] [--talents 1001,1002,1003] [--alloc 5,5,5,5] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from plugins.restart_engine import Life  # noqa: E402
+from plugins.restart_engine.Batch import BatchLife  # noqa: E402
+from plugins.restart_engine.TalentManager import TalentManager  # noqa: E402
+
+DATA_DIR = ROOT / "data" / "restart"
+ATTRS = ("CHR", "INT", "STR", "MNY")
+QUANTILES = (10, 50, 90)
+
+
+def run_loop(talents: List, allocation: Dict[str, int], lives: int) -> Dict[str, object]:
+    spans = []
+    started = time.perf_counter()
+    for seed in range(lives):
+        life = Life(random.Random(seed))
+        for talent in talents:
+            life.talent.addTalent(talent)
+        life.property.apply(allocation)
+        for _ in life.run():
+            pass
+        spans.append(life.property.AGE)
+    elapsed = time.perf_counter() - started
+    return summarize("life-loop", np.array(spans), lives, elapsed)
+
+
+def run_batch(talents: List, allocation: Dict[str, int], lives: int) -> Dict[str, object]:
+    result = BatchLife(talents, allocation, lives, seed=0).run()
+    return summarize("batch", result.lifespans, lives, result.seconds)
+
+
+def summarize(name: str, spans: np.ndarray, lives: int, seconds: float) -> Dict[str, object]:
+    return {
+        "name": name,
+        "lives": lives,
+        "seconds": seconds,
+        "lives_per_sec": lives / seconds,
+        "lifespan_quantiles": [float(q) for q in np.percentile(spans, QUANTILES)],
+        "reach_60": float(np.mean(spans >= 60)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lives", type=int, default=2000)
+    parser.add_argument("--talents", default="1001,1002,1003", help="comma separated talent ids")
+    parser.add_argument("--alloc", default="5,5,5,5", help="CHR,INT,STR,MNY points")
+    parser.add_argument("--json", action="store_true", help="emit machine-readable results")
+    args = parser.parse_args()
+
+    Life.load(str(DATA_DIR))
+    talents = [TalentManager.talentDict[int(t)] for t in args.talents.split(",")]
+    allocation = dict(zip(ATTRS, (int(v) for v in args.alloc.split(","))))
+
+    run_batch(talents, allocation, min(args.lives, 100))  # build the vectorised conditions once
+    results = [run_loop(talents, allocation, args.lives), run_batch(talents, allocation, args.lives)]
+
+    if args.json:
+        print(json.dumps({"talents": args.talents, "alloc": args.alloc, "results": results}))
+        return
+    for result in results:
+        quantiles = "/".join(f"{q:.0f}" for q in result["lifespan_quantiles"])
+        print(
+            f"{result['name']:>9}: {result['lives_per_sec']:9.0f} lives/s  "
+            f"lifespan p10/p50/p90 {quantiles}  reach 60 {result['reach_60']:.1%}"
+        )
+    print(f"speedup x{results[1]['lives_per_sec'] / results[0]['lives_per_sec']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Cold-start cost of Life.load: JSON parsing vs the pickled engine table cache.
+
+Each sample runs in a fresh interpreter so imports, allocator state and the
+page cache for the data files look like a real bot start.
+
+Usage: python bench/bench_restart_load.py [--runs 5] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = ROOT / "data" / "restart"
+
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+
+def rss():
+    with open('/proc/self/statm') as handle:
+        import os
+        return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+before = rss()
+started = time.perf_counter()
+from plugins.restart_engine import Life
+Life.load({data!r}, cache={cache!r})
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "rss_delta": rss() - before}}))
+"""
+
+
+def probe(cache: bool) -> Dict[str, float]:
+    code = _PROBE.format(root=str(ROOT), data=str(DATA_DIR), cache=cache)
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(samples: List[Dict[str, float]]) -> Dict[str, float]:
+    return {
+        "median_ms": statistics.median(s["seconds"] for s in samples) * 1000,
+        "min_ms": min(s["seconds"] for s in samples) * 1000,
+        "rss_mib": statistics.median(s["rss_delta"] for s in samples) / 1024 / 1024,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="emit machine-readable results")
+    args = parser.parse_args()
+
+    probe(cache=True)  # make sure the cache exists before timing warm loads
+    results = {
+        "json": summarize([probe(cache=False) for _ in range(args.runs)]),
+        "cache": summarize([probe(cache=True) for _ in range(args.runs)]),
+    }
+    if args.json:
+        print(json.dumps(results))
+        return
+    for name, result in results.items():
+        print(
+            f"{name:>6}: median {result['median_ms']:7.1f}ms  min {result['min_ms']:7.1f}ms  "
+            f"rss +{result['rss_mib']:.1f}MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
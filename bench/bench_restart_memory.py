@@ -0,0 +1,92 @@
+"""Memory footprint of the lifeRestart engine: resident tables and per-life allocations.
+
+Each measurement runs in a fresh interpreter with tracemalloc started before
+the engine is imported, so the numbers only cover engine objects. Per-life
+figures are the peak while a Life runs and what it still holds afterwards.
+
+Usage: python bench/bench_restart_memory.py [--lives 200] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = ROOT / "data" / "restart"
+
+_PROBE = """
+import json, random, sys, tracemalloc
+sys.path.insert(0, {root!r})
+tracemalloc.start()
+from plugins.restart_engine import Life
+base = tracemalloc.get_traced_memory()[0]
+Life.load({data!r}, cache={cache!r})
+tables = tracemalloc.get_traced_memory()[0] - base
+
+def one(seed):
+    life = Life(random.Random(seed))
+    for talent in list(life.talent.genTalents(10))[:3]:
+        life.talent.addTalent(talent)
+    life.property.apply({{'CHR': 5, 'INT': 5, 'STR': 5, 'MNY': 5}})
+    years = sum(1 for _ in life.run())
+    return life, years
+
+one(0)  # warm interned caches before counting
+blocks = size = peak = years = 0
+for seed in range({lives}):
+    start_size = tracemalloc.get_traced_memory()[0]
+    start_blocks = sys.getallocatedblocks()
+    tracemalloc.reset_peak()
+    life, n = one(seed)
+    blocks += sys.getallocatedblocks() - start_blocks
+    current, top = tracemalloc.get_traced_memory()
+    size += current - start_size
+    peak += top - start_size
+    years += n
+    del life
+print(json.dumps({{
+    "tables_bytes": tables,
+    "life_retained_bytes": size / {lives},
+    "life_live_blocks": blocks / {lives},
+    "life_peak_bytes": peak / {lives},
+    "years_per_life": years / {lives},
+}}))
+"""
+
+
+def probe(cache: bool, lives: int) -> Dict[str, float]:
+    code = _PROBE.format(root=str(ROOT), data=str(DATA_DIR), cache=cache, lives=lives)
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lives", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="emit machine-readable results")
+    args = parser.parse_args()
+
+    probe(cache=True, lives=1)  # make sure the table cache exists
+    results = {
+        "json": probe(cache=False, lives=args.lives),
+        "cache": probe(cache=True, lives=args.lives),
+    }
+    if args.json:
+        print(json.dumps(results))
+        return
+    for name, result in results.items():
+        print(
+            f"{name:>6}: tables {result['tables_bytes'] / 1024 / 1024:6.2f}MiB  "
+            f"per life: peak {result['life_peak_bytes'] / 1024:6.1f}KiB, "
+            f"retained {result['life_retained_bytes'] / 1024:6.1f}KiB in {result['life_live_blocks']:4.0f} blocks "
+            f"({result['years_per_life']:.0f} years)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""Local stand-in for the DeepSeek chat-completions endpoint, for offline benchmarks.
+
+Answers any POST with a canned reply of --reply-chars characters generated
+two at a time: the first piece after a delay drawn from --latency (fixed,
+uniform, exponential or lognormal, centred on --first-token-ms), then one
+every --token-ms. With ``"stream": true`` in the request the pieces are sent
+as server-sent events (chunked) as they are "generated"; otherwise the
+whole reply is sent once the last one would have been.
+
+Faults: --error-rate answers that share of requests with one of
+--error-statuses straight away; --drop-rate cuts that share of
+connections half-way through the reply.
+
+Usage: python bench/deepseek_stub.py [--port 8765] [--first-token-ms 500] [--token-ms 20] [--reply-chars 600]
+       [--latency fixed] [--error-rate 0] [--error-statuses 429,500,503] [--drop-rate 0] [--seed N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Sequence
+
+SENTENCE = "这是一段用于压测的回答，内容本身没有意义！"
+LATENCIES = ("fixed", "uniform", "exponential", "lognormal")
+LOGNORMAL_SIGMA = 0.5
+
+
+class StubConfig:
+    __slots__ = (
+        "first_token",
+        "token_interval",
+        "reply_chars",
+        "token_chars",
+        "latency",
+        "error_rate",
+        "error_statuses",
+        "drop_rate",
+        "_random",
+        "_lock",
+    )
+
+    def __init__(
+        self,
+        first_token: float = 0.5,
+        token_interval: float = 0.02,
+        reply_chars: int = 600,
+        token_chars: int = 2,
+        latency: str = "fixed",
+        error_rate: float = 0.0,
+        error_statuses: Sequence[int] = (429, 500, 503),
+        drop_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        if latency not in LATENCIES:
+            raise ValueError(f"latency must be one of {', '.join(LATENCIES)}")
+        self.first_token = first_token
+        self.token_interval = token_interval
+        self.reply_chars = reply_chars
+        self.token_chars = token_chars
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.drop_rate = drop_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def pieces(self) -> List[str]:
+        text = (SENTENCE * (self.reply_chars // len(SENTENCE) + 1))[: self.reply_chars]
+        return [text[i : i + self.token_chars] for i in range(0, len(text), self.token_chars)]
+
+    def first_token_delay(self) -> float:
+        """A delay whose mean (median for lognormal) is ``first_token``."""
+        mean = self.first_token
+        with self._lock:
+            if self.latency == "uniform":
+                return self._random.uniform(0, 2 * mean)
+            if self.latency == "exponential":
+                return self._random.expovariate(1 / mean) if mean > 0 else 0.0
+            if self.latency == "lognormal":
+                return mean * math.exp(self._random.gauss(0, LOGNORMAL_SIGMA))
+            return mean
+
+    def fault(self) -> tuple[Optional[int], bool]:
+        """(HTTP status to fail with, whether to drop the connection part-way) for the next request."""
+        with self._lock:
+            if self.error_statuses and self._random.random() < self.error_rate:
+                return self._random.choice(self.error_statuses), False
+            return None, self._random.random() < self.drop_rate
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = StubConfig()
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        status, drop = self.config.fault()
+        if status is not None:
+            self._error(status)
+        elif request.get("stream"):
+            self._stream(drop)
+        else:
+            self._complete(drop)
+
+    def _error(self, status: int) -> None:
+        body = json.dumps({"error": {"message": "injected by the stub", "code": status}}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _complete(self, drop: bool) -> None:
+        pieces = self.config.pieces()
+        time.sleep(self.config.first_token_delay() + self.config.token_interval * (len(pieces) - 1))
+        if drop:
+            self.close_connection = True
+            return
+        body = json.dumps(
+            {"choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(pieces)}}]},
+            ensure_ascii=False,
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, drop: bool) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(self.config.first_token_delay())
+        pieces = self.config.pieces()
+        for index, piece in enumerate(pieces):
+            if drop and index == len(pieces) // 2:
+                self.close_connection = True
+                return
+            if index:
+                time.sleep(self.config.token_interval)
+            event = {"choices": [{"index": 0, "delta": {"content": piece}}]}
+            self._chunk(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+        self._chunk(b"data: [DONE]\n\n")
+        self._chunk(b"")
+
+    def _chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002 - keep benchmarks quiet
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    # load tests open many connections at once; the default backlog of 5 resets them
+    request_queue_size = 256
+    daemon_threads = True
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser) -> None:
+    """Latency-shape and fault options, shared with the benchmarks that start the stub themselves."""
+    parser.add_argument("--latency", choices=LATENCIES, default="fixed", help="first-token delay distribution")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with an error")
+    parser.add_argument("--error-statuses", default="429,500,503", help="comma-separated statuses to fail with")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="share of replies cut off half-way")
+    parser.add_argument("--seed", type=int, default=None, help="seed for latency and fault draws")
+
+
+def fault_options(args: argparse.Namespace) -> dict:
+    return {
+        "latency": args.latency,
+        "error_rate": args.error_rate,
+        "error_statuses": [int(status) for status in args.error_statuses.split(",") if status.strip()],
+        "drop_rate": args.drop_rate,
+        "seed": args.seed,
+    }
+
+
+def serve(config: StubConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Start the stub on a daemon thread; port 0 picks a free one (see ``server.server_port``)."""
+    handler = type("StubHandler", (_Handler,), {"config": config})
+    server = StubServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="deepseek-stub", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-token-ms", type=float, default=500)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--reply-chars", type=int, default=600)
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    config = StubConfig(args.first_token_ms / 1000, args.token_ms / 1000, args.reply_chars, **fault_options(args))
+    server = serve(config, args.host, args.port)
+    print(f"stub listening on http://{args.host}:{server.server_port}/v1/chat/completions")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import collections
+import threading
+import time
+from typing import Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+from metrics import CACHE_ENTRIES, CACHE_EVICTIONS, CACHE_REQUESTS
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """Thread-safe bounded LRU map with optional per-entry TTL.
+
+    ``max_entries`` caps the size; the least recently used entry is evicted
+    first. Lookups, evictions and size are reported under ``name`` in the
+    ``bot_cache_*`` metrics.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: Optional[float] = None) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "collections.OrderedDict[Hashable, Tuple[float, V]]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and self.ttl is not None and item[0] <= time.monotonic():
+                del self._entries[key]
+                CACHE_ENTRIES.dec(self.name)
+                CACHE_EVICTIONS.inc(self.name)
+                item = None
+            if item is None:
+                CACHE_REQUESTS.inc(self.name, "miss")
+                return None
+            self._entries.move_to_end(key)
+        CACHE_REQUESTS.inc(self.name, "hit")
+        return item[1]
+
+    def peek(self, key: Hashable) -> Optional[V]:
+        """Like ``get``, but neither counted in the metrics nor marking the entry as recently used."""
+        with self._lock:
+            item = self._entries.get(key)
+        if item is None or (self.ttl is not None and item[0] <= time.monotonic()):
+            return None
+        return item[1]
+
+    def put(self, key: Hashable, value: V) -> None:
+        expires = time.monotonic() + self.ttl if self.ttl is not None else 0.0
+        evicted = 0
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                CACHE_ENTRIES.inc(self.name)
+            self._entries[key] = (expires, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            CACHE_ENTRIES.dec(self.name, amount=evicted)
+            CACHE_EVICTIONS.inc(self.name, amount=evicted)
+
+    def pop(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            item = self._entries.pop(key, None)
+        if item is None:
+            return None
+        CACHE_ENTRIES.dec(self.name)
+        return item[1]
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], V]) -> V:
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+        if count:
+            CACHE_ENTRIES.dec(self.name, amount=count)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def hit_rates() -> Dict[str, Tuple[float, float]]:
+    """Return {cache name: (hits, misses)} across every cache since start."""
+    rates: Dict[str, Tuple[float, float]] = {}
+    for (name, result), value in CACHE_REQUESTS.values().items():
+        hits, misses = rates.get(name, (0, 0))
+        rates[name] = (hits + value, misses) if result == "hit" else (hits, misses + value)
+    return rates
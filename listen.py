@@ -3,27 +3,40 @@ from __future__ import annotations
 from queue import Queue
 from typing import Any, Dict
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 
+import tracing
 from logger import logger
+from metrics import EVENTS_ENQUEUED, EVENTS_FILTERED, EVENTS_RECEIVED, QUEUE_DEPTH, WORKERS, registry
 
 
 def create_listener_app(message_queue: Queue, settings: Dict[str, Any]) -> Flask:
     app = Flask(__name__)
+    QUEUE_DEPTH.set_function(message_queue.qsize)
+    WORKERS.set_function(lambda: settings.get("workers", 0))
 
     @app.route("/", methods=["POST"])
     def receive_event() -> tuple[str, int]:
         event = request.get_json(force=True, silent=True)
         if not isinstance(event, dict):
             logger.error("Invalid event payload: %s", event)
+            EVENTS_FILTERED.inc("invalid_payload")
             return "ignored", 400
 
-        logger.info("Event received: post_type=%s", event.get("post_type"))
-        message_queue.put(event)
+        trace_id = tracing.assign(event)
+        with tracing.bind(trace_id):
+            logger.info("Event received: post_type=%s", event.get("post_type"))
+            EVENTS_RECEIVED.inc(str(event.get("post_type")))
+            message_queue.put(event)
+            EVENTS_ENQUEUED.inc()
         return "OK", 200
 
     @app.route("/health", methods=["GET"])
     def health_check() -> Any:
         return jsonify({"status": "ok", "workers": settings.get("workers", 0)})
 
+    @app.route("/metrics", methods=["GET"])
+    def metrics_export() -> Response:
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
     return app
@@ -1,18 +1,29 @@
 import logging
 from typing import Any
 
+from tracing import current_trace_id
+
 SUCCESS_LEVEL = 25
 logging.addLevelName(SUCCESS_LEVEL, "SUCCESS")
 
 
+class _TraceFilter(logging.Filter):
+    """Stamps every record with the trace id of the event being handled."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = current_trace_id()
+        return True
+
+
 def _configure_root_logger() -> logging.Logger:
     logger = logging.getLogger("bot")
     if logger.handlers:
         return logger
     logger.setLevel(logging.INFO)
     handler = logging.StreamHandler()
-    formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
+    formatter = logging.Formatter("%(asctime)s [%(levelname)s] [%(trace_id)s] %(message)s")
     handler.setFormatter(formatter)
+    handler.addFilter(_TraceFilter())
     logger.addHandler(handler)
     return logger
 
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import threading
+import time
 from queue import Queue
 
 from listen import create_listener_app
 from logger import logger
+from metrics import WINDOW, WORKER_BUSY_SECONDS, WORKERS_BUSY
 from message_router import MessageRouter
 from settings import load_settings, SettingsError
 
@@ -13,13 +15,18 @@ def start_workers(queue: Queue, router: MessageRouter, worker_count: int) -> Non
     def worker_loop() -> None:
         while True:
             event = queue.get()
+            WORKERS_BUSY.inc()
+            started = time.perf_counter()
             try:
                 router.process_event(event)
             except Exception as exc:  # pragma: no cover
                 logger.error("Worker crashed: %s", exc)
             finally:
+                WORKERS_BUSY.dec()
+                WORKER_BUSY_SECONDS.inc(amount=time.perf_counter() - started)
                 queue.task_done()
 
+    WINDOW.start()
     for idx in range(worker_count):
         thread = threading.Thread(target=worker_loop, name=f"bot-worker-{idx}", daemon=True)
         thread.start()
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import time
+from functools import partial
 from typing import Any, Dict, List, Tuple
 
+import tracing
 from admin import AdminHandler
 from logger import logger
+from metrics import COMMAND_LATENCY, EVENTS_FILTERED
 from plugin_loader import PluginManager
 from send import SendClient
 
@@ -18,23 +22,37 @@ class MessageRouter:
         self.sender = SendClient(settings)
 
     def process_event(self, event: Dict[str, Any]) -> None:
+        trace_id = event.get(tracing.TRACE_KEY) or tracing.assign(event)
+        with tracing.bind(trace_id) as trace:
+            received_at = event.get(tracing.RECEIVED_KEY)
+            if received_at is not None:
+                trace.record("queue", trace.started - received_at)
+            self._route_event(event, trace_id)
+            if len(trace.spans) > 1:
+                logger.info("Trace spans: %s", trace.summary())
+
+    def _route_event(self, event: Dict[str, Any], trace_id: str) -> None:
         if event.get("post_type") != "message":
             logger.info("Ignoring non-message event: %s", event.get("post_type"))
+            EVENTS_FILTERED.inc("non_message")
             return
 
         message_type = event.get("message_type")
         if message_type not in {"group", "private"}:
             logger.info("Unsupported message type: %s", message_type)
+            EVENTS_FILTERED.inc("unsupported_type")
             return
 
         user_id = str(event.get("user_id")) if event.get("user_id") is not None else None
         group_id = str(event.get("group_id")) if message_type == "group" else None
         if not user_id:
             logger.error("Event missing user_id: %s", event)
+            EVENTS_FILTERED.inc("missing_user")
             return
 
         if not self._is_allowed(message_type, group_id or user_id):
             logger.info("Sender %s not authorized for %s", user_id, message_type)
+            EVENTS_FILTERED.inc("unauthorized")
             return
 
         raw_message = event.get("raw_message")
@@ -44,10 +62,12 @@ class MessageRouter:
         parsed = self._parse_command(raw_message)
         if not parsed:
             logger.info("Message filtered because prefix did not match .bot/。bot")
+            EVENTS_FILTERED.inc("no_prefix")
             return
 
         command, params = parsed
         logger.info("Command parsed: %s params=%s", command, params)
+        started = time.perf_counter()
 
         context = {
             "source": message_type,
@@ -55,18 +75,26 @@ class MessageRouter:
             "user_id": user_id,
             "params": params,
             "settings": self.settings,
+            "trace_id": trace_id,
         }
+        # lets long-running plugins push partial replies before they return
+        context["send"] = partial(self.sender.dispatch, context=context)
 
         responses: List[Dict[str, Any]] | None
         if command == "admin":
-            responses = self._handle_admin(params, context)
+            with tracing.span("admin"):
+                responses = self._handle_admin(params, context)
         else:
             responses = self.plugins.dispatch(command, params, context)
 
         if responses:
             self.sender.dispatch(responses, context)
+            # Only handled commands get their own label; arbitrary user input
+            # would otherwise grow the series set without bound.
+            COMMAND_LATENCY.observe(time.perf_counter() - started, command)
         else:
             logger.info("No responses generated for command %s", command)
+            COMMAND_LATENCY.observe(time.perf_counter() - started, "unhandled")
 
     def _handle_admin(self, params: List[str], context: Dict[str, Any]) -> List[Dict[str, Any]]:
         user_id = context.get("user_id")
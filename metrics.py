@@ -0,0 +1,425 @@
+from __future__ import annotations
+
+import bisect
+import collections
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, Iterable, List, Sequence, Tuple
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+# Flask serves every request on a fresh thread, so shards owned by finished
+# threads are folded back into a single dict once this many have piled up.
+_RETIRE_THRESHOLD = 64
+
+LabelValues = Tuple[str, ...]
+
+
+class _Shards:
+    """Per-thread value dictionaries; writers never contend for a lock."""
+
+    def __init__(self, merge: Callable[[Dict[LabelValues, Any], LabelValues, Any], None]) -> None:
+        self._merge = merge
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._owned: List[Tuple[threading.Thread, Dict[LabelValues, Any]]] = []
+        self._retired: Dict[LabelValues, Any] = {}
+
+    def local(self) -> Dict[LabelValues, Any]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values: Dict[LabelValues, Any] = {}
+            with self._lock:
+                self._owned.append((threading.current_thread(), values))
+                if len(self._owned) > _RETIRE_THRESHOLD:
+                    self._retire_dead()
+            self._local.values = values
+            return values
+
+    def merged(self) -> Dict[LabelValues, Any]:
+        with self._lock:
+            self._retire_dead()
+            sources = [dict(self._retired)] + [dict(values) for _, values in self._owned]
+        result: Dict[LabelValues, Any] = {}
+        for source in sources:
+            for key, value in source.items():
+                self._merge(result, key, value)
+        return result
+
+    def _retire_dead(self) -> None:
+        alive = []
+        for thread, values in self._owned:
+            if thread.is_alive():
+                alive.append((thread, values))
+                continue
+            for key, value in list(values.items()):
+                self._merge(self._retired, key, value)
+        self._owned = alive
+
+
+def _merge_number(target: Dict[LabelValues, Any], key: LabelValues, value: float) -> None:
+    target[key] = target.get(key, 0) + value
+
+
+def _merge_buckets(target: Dict[LabelValues, Any], key: LabelValues, value: List[float]) -> None:
+    current = target.get(key)
+    if current is None:
+        target[key] = list(value)
+        return
+    for idx, item in enumerate(value):
+        current[idx] += item
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, LabelValues, float]]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter; ``inc`` only touches the calling thread's shard."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._shards = _Shards(_merge_number)
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        values = self._shards.local()
+        values[labels] = values.get(labels, 0) + amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        return self._shards.merged()
+
+    def total(self) -> float:
+        return sum(self.values().values())
+
+    def samples(self) -> Iterable[Tuple[str, LabelValues, float]]:
+        values = self.values()
+        if not values and not self.labelnames:
+            values = {(): 0}
+        for labels, value in sorted(values.items()):
+            yield self.name, labels, value
+
+
+class Gauge(_Metric):
+    """Up/down gauge, or a gauge whose value is read from a callback."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._shards = _Shards(_merge_number)
+        self._function: Callable[[], float] | None = None
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        values = self._shards.local()
+        values[labels] = values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def value(self, *labels: str) -> float:
+        if self._function is not None:
+            return float(self._function())
+        return self._shards.merged().get(labels, 0)
+
+    def samples(self) -> Iterable[Tuple[str, LabelValues, float]]:
+        if self._function is not None:
+            yield self.name, (), float(self._function())
+            return
+        values = self._shards.merged()
+        if not values and not self.labelnames:
+            values = {(): 0}
+        for labels, value in sorted(values.items()):
+            yield self.name, labels, value
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; each shard keeps per-bucket counts plus sum/count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._shards = _Shards(_merge_buckets)
+
+    def observe(self, value: float, *labels: str) -> None:
+        values = self._shards.local()
+        slots = values.get(labels)
+        if slots is None:
+            slots = values[labels] = [0] * (len(self.buckets) + 3)
+        slots[bisect.bisect_left(self.buckets, value)] += 1
+        slots[-2] += value
+        slots[-1] += 1
+
+    def values(self) -> Dict[LabelValues, List[float]]:
+        """Return raw per-label slots: bucket counts, then +Inf, sum and count."""
+        return self._shards.merged()
+
+    def samples(self) -> Iterable[Tuple[str, LabelValues, float]]:
+        bounds = [_format_number(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, slots in sorted(self.values().items()):
+            running = 0
+            for bound, count in zip(bounds, slots[:-2]):
+                running += count
+                yield f"{self.name}_bucket", labels + (bound,), running
+            yield f"{self.name}_sum", labels, slots[-2]
+            yield f"{self.name}_count", labels, slots[-1]
+
+
+class MetricsRegistry:
+    """Holds every metric and renders them in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    def _register(self, metric: Any) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            labelnames = metric.labelnames
+            if metric.kind == "histogram":
+                labelnames = labelnames + ("le",)
+            for sample_name, labels, value in metric.samples():
+                lines.append(f"{sample_name}{_format_labels(labelnames, labels)} {_format_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class RollingWindow:
+    """Periodic snapshots of cumulative metrics for cheap "last N minutes" reads.
+
+    The hot path only bumps the ordinary counters; a background thread copies
+    their merged values every ``interval`` seconds, and a window is the
+    difference between the newest state and the snapshot closest to its start.
+    """
+
+    def __init__(self, metrics: Sequence[Any], interval: float = 5.0, horizon: float = 900.0) -> None:
+        self.interval = interval
+        self._metrics = list(metrics)
+        self._history: Deque[Tuple[float, Dict[str, Dict[LabelValues, Any]]]] = collections.deque(
+            maxlen=int(horizon / interval) + 2
+        )
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._history.append((time.monotonic(), self._capture()))
+            self._thread = threading.Thread(target=self._run, name="bot-metrics-window", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self._history.append((time.monotonic(), self._capture()))
+
+    def _capture(self) -> Dict[str, Dict[LabelValues, Any]]:
+        return {metric.name: metric.values() for metric in self._metrics}
+
+    def delta(self, seconds: float) -> Tuple[float, Dict[str, Dict[LabelValues, Any]]]:
+        """Return (elapsed, per-metric increase) over roughly the last ``seconds``."""
+        now = time.monotonic()
+        current = self._capture()
+        history = list(self._history)
+        if not history:
+            return now - _started_monotonic, current
+        since, base = history[0]
+        for stamp, snapshot in reversed(history):
+            if now - stamp >= seconds:
+                since, base = stamp, snapshot
+                break
+        return now - since, {name: _subtract(values, base.get(name, {})) for name, values in current.items()}
+
+
+def _subtract(current: Dict[LabelValues, Any], base: Dict[LabelValues, Any]) -> Dict[LabelValues, Any]:
+    result: Dict[LabelValues, Any] = {}
+    for key, value in current.items():
+        previous = base.get(key)
+        if previous is None:
+            result[key] = value
+        elif isinstance(value, list):
+            result[key] = [now - before for now, before in zip(value, previous)]
+        else:
+            result[key] = value - previous
+    return result
+
+
+def histogram_quantile(buckets: Sequence[float], slots: Sequence[float], quantile: float) -> float:
+    """Estimate a quantile from raw histogram slots by interpolating in the bucket."""
+    count = slots[-1]
+    if count <= 0:
+        return 0.0
+    rank = quantile * count
+    running = 0.0
+    lower = 0.0
+    for bound, bucket_count in zip(buckets, slots):
+        if bucket_count and running + bucket_count >= rank:
+            return lower + (bound - lower) * (rank - running) / bucket_count
+        running += bucket_count
+        lower = bound
+    return buckets[-1] if buckets else 0.0
+
+
+def process_rss_bytes() -> float:
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        return 0.0
+    # ru_maxrss is the peak, in KiB on Linux and bytes on macOS; better than nothing.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def uptime_seconds() -> float:
+    return time.monotonic() - _started_monotonic
+
+
+def _format_labels(names: Sequence[str], values: LabelValues) -> str:
+    if not values:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_number(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+registry = MetricsRegistry()
+
+PROCESS_START_TIME = registry.gauge(
+    "process_start_time_seconds", "Unix time at which the bot process started."
+)
+_started_at = time.time()
+_started_monotonic = time.monotonic()
+PROCESS_START_TIME.set_function(lambda: _started_at)
+PROCESS_RSS = registry.gauge("process_resident_memory_bytes", "Resident memory size in bytes.")
+PROCESS_RSS.set_function(process_rss_bytes)
+
+EVENTS_RECEIVED = registry.counter(
+    "bot_events_received_total", "Events accepted by the HTTP listener.", ["post_type"]
+)
+EVENTS_FILTERED = registry.counter(
+    "bot_events_filtered_total", "Events dropped before reaching a handler.", ["reason"]
+)
+EVENTS_ENQUEUED = registry.counter("bot_events_enqueued_total", "Events put on the worker queue.")
+QUEUE_DEPTH = registry.gauge("bot_queue_depth", "Events waiting on the worker queue.")
+WORKERS = registry.gauge("bot_workers", "Configured worker threads.")
+WORKERS_BUSY = registry.gauge("bot_workers_busy", "Worker threads currently processing an event.")
+WORKER_BUSY_SECONDS = registry.counter(
+    "bot_worker_busy_seconds_total", "Cumulative time workers spent processing events."
+)
+COMMAND_LATENCY = registry.histogram(
+    "bot_command_duration_seconds",
+    "Time from command parse to the last reply being sent.",
+    ["command"],
+)
+PLUGIN_LATENCY = registry.histogram(
+    "bot_plugin_duration_seconds", "Time spent inside plugin handle() calls that handled the command or crashed.", ["plugin"]
+)
+PLUGIN_CRASHES = registry.counter(
+    "bot_plugin_crashes_total", "Exceptions raised by plugin handle() calls.", ["plugin"]
+)
+SEND_TOTAL = registry.counter(
+    "bot_send_total", "OneBot actions posted, by outcome.", ["action", "result"]
+)
+SEND_LATENCY = registry.histogram(
+    "bot_send_duration_seconds", "Latency of OneBot action POSTs.", ["action"]
+)
+CACHE_REQUESTS = registry.counter(
+    "bot_cache_requests_total", "In-process cache lookups, by outcome.", ["cache", "result"]
+)
+CACHE_EVICTIONS = registry.counter(
+    "bot_cache_evictions_total", "Entries dropped to stay under a cache's size cap or TTL.", ["cache"]
+)
+CACHE_ENTRIES = registry.gauge("bot_cache_entries", "Entries currently held by each cache.", ["cache"])
+LLM_SAVED = registry.counter(
+    "bot_llm_upstream_saved_total",
+    "Chat prompts answered without an upstream call of their own, by cache hit or by joining an identical request.",
+    ["reason"],
+)
+LLM_INFLIGHT = registry.gauge("bot_llm_inflight", "Chat requests currently running against the upstream API.")
+LLM_QUEUE_DEPTH = registry.gauge("bot_llm_queue_depth", "Chat requests waiting for a free upstream slot.")
+LLM_QUEUE_WAIT = registry.histogram(
+    "bot_llm_queue_wait_seconds", "Time chat requests spent queued before running."
+)
+LLM_REJECTED = registry.counter(
+    "bot_llm_rejected_total", "Chat requests turned away, by reason (queue_full, user_quota, group_quota).", ["reason"]
+)
+
+WINDOW = RollingWindow(
+    [EVENTS_RECEIVED, WORKER_BUSY_SECONDS, COMMAND_LATENCY, PLUGIN_CRASHES, SEND_TOTAL]
+)
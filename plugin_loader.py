@@ -2,11 +2,14 @@ from __future__ import annotations
 
 import importlib
 import pkgutil
+import time
 from pathlib import Path
 from types import ModuleType
 from typing import Any, Dict, List, Optional
 
+import tracing
 from logger import logger
+from metrics import PLUGIN_CRASHES, PLUGIN_LATENCY
 
 PLUGIN_PACKAGE = "plugins"
 PLUGIN_PREFIX = "plugins_"
@@ -44,12 +47,21 @@ class PluginManager:
         self, command: str, params: List[str], context: Dict[str, Any]
     ) -> Optional[List[Dict[str, Any]]]:
         for module in self.modules:
+            started = time.perf_counter()
             try:
                 result = module.handle(command, params, context, self.settings)
             except Exception as exc:  # pragma: no cover
+                elapsed = time.perf_counter() - started
                 logger.error("Plugin %s crashed: %s", module.__name__, exc)
+                PLUGIN_CRASHES.inc(module.__name__)
+                PLUGIN_LATENCY.observe(elapsed, module.__name__)
+                tracing.record(f"crash:{module.__name__}", elapsed)
                 continue
             if result:
+                # plugins that pass on a command they don't own would only add ~0 samples
+                elapsed = time.perf_counter() - started
+                PLUGIN_LATENCY.observe(elapsed, module.__name__)
+                tracing.record(f"plugin:{module.__name__}", elapsed)
                 logger.success("Plugin %s handled command %s", module.__name__, command)
                 return result
         logger.info("No plugin handled command %s", command)
@@ -0,0 +1,12 @@
+"""Non-blocking DeepSeek access for the chat plugin.
+
+Requests run as coroutines on one shared event loop thread (``AsyncRunner``)
+over httpx's asyncio client, so waiting on the API never occupies a
+bot worker.
+"""
+
+from .client import ChatClient, ChatError  # noqa: F401
+from .history import ChatHistory, estimate_tokens  # noqa: F401
+from .limits import Quota, RequestGate, Ticket  # noqa: F401
+from .replies import ReplyCache, normalize_prompt, reply_key  # noqa: F401
+from .runner import AsyncRunner  # noqa: F401
@@ -0,0 +1,116 @@
+"""DeepSeek chat calls over httpx's asyncio client.
+
+httpx does the HTTP itself: TLS, connection reuse, chunked bodies,
+redirects and, as ``requests`` did before, ``HTTP(S)_PROXY`` /
+``ALL_PROXY`` / ``NO_PROXY`` from the environment. This module only
+turns its failures into ``ChatError`` and reads the ``data:`` lines of a
+server-sent event stream.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import weakref
+from typing import Any, AsyncIterator, Dict
+
+import httpx
+
+SSE_DONE = "[DONE]"
+
+# one pooled client per event loop (in practice the runner's), since httpx clients are bound to theirs
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+class ChatError(Exception):
+    """Raised when the API cannot be reached, times out or answers with an HTTP error or malformed data."""
+
+
+class ChatClient:
+    """Posts chat-completion payloads to ``url``; every call is bounded by ``timeout`` seconds."""
+
+    def __init__(self, url: str, api_key: str, timeout: float = 30.0) -> None:
+        self.url = url
+        self.timeout = timeout
+        self._headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        }
+
+    async def complete(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the decoded JSON reply; raises ChatError, or ValueError for a non-JSON body."""
+        try:
+            body = await asyncio.wait_for(self._post(payload), self.timeout)
+        except asyncio.TimeoutError as exc:
+            raise ChatError(f"no reply within {self.timeout:g}s") from exc
+        reply = json.loads(body)
+        if not isinstance(reply, dict):
+            raise ChatError(f"unexpected reply: {body[:200].decode('utf-8', 'replace')}")
+        return reply
+
+    async def stream(self, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        """Yield the content deltas of a ``stream: true`` completion as they arrive.
+
+        Here ``timeout`` bounds each wait (connecting, then every read)
+        rather than the whole answer, which may take much longer.
+        """
+        headers = {**self._headers, "Accept": "text/event-stream"}
+        try:
+            async with _client().stream(
+                "POST", self.url, json={**payload, "stream": True}, headers=headers, timeout=self.timeout
+            ) as response:
+                if response.status_code >= 300:
+                    body = await response.aread()
+                    raise ChatError(f"HTTP {response.status_code}: {body[:200].decode('utf-8', 'replace')}")
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue  # blank separators, comments, event/id fields
+                    event = line[5:].strip()
+                    if event == SSE_DONE:
+                        return
+                    delta = _delta(event)
+                    if delta:
+                        yield delta
+        except httpx.TimeoutException as exc:
+            raise ChatError(f"no data within {self.timeout:g}s") from exc
+        except (httpx.HTTPError, httpx.InvalidURL) as exc:
+            raise ChatError(_describe(exc)) from exc
+
+    async def _post(self, payload: Dict[str, Any]) -> bytes:
+        try:
+            response = await _client().post(self.url, json=payload, headers=self._headers, timeout=self.timeout)
+        except httpx.TimeoutException as exc:
+            raise ChatError(f"no reply within {self.timeout:g}s") from exc
+        except (httpx.HTTPError, httpx.InvalidURL) as exc:
+            raise ChatError(_describe(exc)) from exc
+        if response.status_code >= 300:
+            raise ChatError(f"HTTP {response.status_code}: {response.content[:200].decode('utf-8', 'replace')}")
+        return response.content
+
+
+def _delta(event: str) -> str | None:
+    """The content delta of one ``data:`` event; ChatError for anything not shaped like a completion chunk."""
+    chunk = json.loads(event)
+    if not isinstance(chunk, dict):
+        raise ChatError(f"unexpected stream event: {event[:200]}")
+    choices = chunk.get("choices") or [{}]
+    first = choices[0] if isinstance(choices, list) else None
+    delta = (first.get("delta") or {}) if isinstance(first, dict) else None
+    if not isinstance(delta, dict):
+        raise ChatError(f"unexpected stream event: {event[:200]}")
+    content = delta.get("content")
+    return content if isinstance(content, str) else None
+
+
+def _describe(exc: Exception) -> str:
+    # some httpx errors (a refused connection, say) carry no message of their own
+    return str(exc) or type(exc).__name__
+
+
+def _client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = httpx.AsyncClient(follow_redirects=True)
+    return client
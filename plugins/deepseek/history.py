@@ -0,0 +1,72 @@
+"""Recent chat turns per conversation, trimmed to a token budget."""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from cache import LRUCache
+from session_store import SessionStore
+
+# (role, content, estimated tokens)
+Turn = Tuple[str, str, int]
+
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough DeepSeek token count: ~0.6 per CJK character, ~0.3 per ASCII one.
+
+    Works from the UTF-8 size so it stays a couple of C-level calls: every
+    non-ASCII character here is 3 bytes, so (bytes - chars) / 2 of them are.
+    """
+    wide = (len(text.encode("utf-8")) - len(text)) // 2
+    return int(wide * 0.6 + (len(text) - wide) * 0.3) + MESSAGE_OVERHEAD_TOKENS
+
+
+class ChatHistory:
+    """Per-conversation turns, oldest dropped first once they exceed ``budget`` tokens.
+
+    Conversations live in an LRU cache of ``max_sessions`` entries that
+    expire after ``ttl`` seconds idle. With a ``store`` every update is also
+    written through, so a conversation evicted from memory or lost to a
+    restart is read back on its next message.
+    """
+
+    def __init__(self, budget: int, max_sessions: int, ttl: float, store: Optional[SessionStore] = None) -> None:
+        self.budget = budget
+        self._cache: LRUCache[Tuple[Turn, ...]] = LRUCache("deepseek_history", max_sessions, ttl=ttl)
+        self._store = store
+        self._lock = threading.Lock()
+
+    def messages(self, key: str) -> List[Dict[str, str]]:
+        return [{"role": role, "content": content} for role, content, _ in self._turns(key)]
+
+    def record(self, key: str, prompt: str, reply: str) -> None:
+        added = (("user", prompt, estimate_tokens(prompt)), ("assistant", reply, estimate_tokens(reply)))
+        with self._lock:
+            turns = self._turns(key) + added
+            total = sum(turn[2] for turn in turns)
+            start = 0
+            while total > self.budget and start < len(turns):
+                # drop a question together with its answer
+                total -= turns[start][2] + turns[start + 1][2]
+                start += 2
+            turns = turns[start:]
+            self._cache.put(key, turns)
+            if self._store is not None:
+                self._store.put(key, [list(turn) for turn in turns])
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._cache.put(key, ())
+            if self._store is not None:
+                self._store.delete(key)
+
+    def _turns(self, key: str) -> Tuple[Turn, ...]:
+        turns = self._cache.get(key)
+        if turns is None:
+            stored = self._store.get(key) if self._store is not None else None
+            turns = tuple((role, content, tokens) for role, content, tokens in stored or ())
+            self._cache.put(key, turns)
+        return turns
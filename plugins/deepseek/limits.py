@@ -0,0 +1,130 @@
+"""Admission control for chat requests: a concurrency cap, a bounded FIFO and windowed quotas."""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import threading
+import time
+from typing import Deque, Dict, Optional, Tuple
+
+from metrics import LLM_INFLIGHT, LLM_QUEUE_DEPTH, LLM_QUEUE_WAIT, LLM_REJECTED
+
+
+class Ticket:
+    """One admitted request: ``position`` is its place in the queue, 1 being next; 0 means it runs at once."""
+
+    __slots__ = ("position", "queued_at", "_ready")
+
+    def __init__(self, position: int) -> None:
+        self.position = position
+        self.queued_at = time.perf_counter()
+        self._ready = asyncio.Event()
+        if position == 0:
+            self._ready.set()
+
+    async def wait(self) -> None:
+        await self._ready.wait()
+        LLM_QUEUE_WAIT.observe(time.perf_counter() - self.queued_at)
+
+    def start(self) -> None:
+        self._ready.set()
+
+
+class RequestGate:
+    """Lets at most ``max_concurrent`` requests run, queueing up to ``max_queue`` more in arrival order.
+
+    ``admit`` is called from worker threads and decides at once, so the
+    caller can tell the user where they stand; ``release`` is called on the
+    event loop thread when a request finishes and starts the next ticket,
+    which keeps every ``asyncio.Event`` touched only by that loop.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int) -> None:
+        self.max_concurrent = max(max_concurrent, 1)
+        self.max_queue = max_queue
+        self._running = 0
+        self._queue: Deque[Ticket] = collections.deque()
+        self._lock = threading.Lock()
+
+    def admit(self) -> Optional[Ticket]:
+        """A ticket, or None when the queue is full."""
+        with self._lock:
+            if self._running < self.max_concurrent:
+                self._running += 1
+                LLM_INFLIGHT.inc()
+                return Ticket(0)
+            if len(self._queue) >= self.max_queue:
+                LLM_REJECTED.inc("queue_full")
+                return None
+            ticket = Ticket(len(self._queue) + 1)
+            self._queue.append(ticket)
+        LLM_QUEUE_DEPTH.inc()
+        return ticket
+
+    def withdraw(self, ticket: Ticket) -> None:
+        """Give up a ticket whose wait was cancelled: leave the queue, or free the slot it already holds."""
+        with self._lock:
+            try:
+                self._queue.remove(ticket)
+            except ValueError:
+                queued = False
+            else:
+                queued = True
+        if queued:
+            LLM_QUEUE_DEPTH.dec()
+        else:
+            self.release()
+
+    def release(self) -> None:
+        with self._lock:
+            if not self._queue:
+                self._running -= 1
+                LLM_INFLIGHT.dec()
+                return
+            ticket = self._queue.popleft()
+        # the freed slot passes straight to the next ticket
+        LLM_QUEUE_DEPTH.dec()
+        ticket.start()
+
+
+class Quota:
+    """At most ``limit`` uses per key in each fixed ``window`` of seconds; ``limit`` 0 means unlimited.
+
+    Counts reset together when a window ends, so memory only ever holds
+    the keys seen in the current one.
+    """
+
+    def __init__(self, name: str, limit: int, window: float) -> None:
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self._started = 0.0
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str) -> Tuple[bool, float]:
+        """Use one unit; returns (allowed, seconds until the window resets)."""
+        if self.limit <= 0:
+            return True, 0.0
+        now = time.monotonic()
+        with self._lock:
+            if now - self._started >= self.window:
+                self._started = now
+                self._counts.clear()
+            used = self._counts.get(key, 0)
+            remaining = self.window - (now - self._started)
+            if used >= self.limit:
+                LLM_REJECTED.inc(self.name)
+                return False, remaining
+            self._counts[key] = used + 1
+        return True, remaining
+
+    def refund(self, key: str) -> None:
+        """Give back a unit taken for a request that was then turned away elsewhere."""
+        if self.limit <= 0:
+            return
+        with self._lock:
+            used = self._counts.get(key, 0)
+            if used > 0:
+                self._counts[key] = used - 1
@@ -0,0 +1,81 @@
+"""Answers shared between identical prompts: a TTL/LRU cache plus requests still in flight."""
+
+from __future__ import annotations
+
+import concurrent.futures
+import hashlib
+import json
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from cache import LRUCache
+from session_store import SessionStore
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Fold the differences that do not change the question: width, case, runs of whitespace."""
+    return " ".join(unicodedata.normalize("NFKC", prompt).casefold().split())
+
+
+def reply_key(model: str, system_prompt: str, temperature: float, earlier: List[Dict[str, str]], prompt: str) -> str:
+    """Digest of everything the answer depends on; ``earlier`` is the conversation so far."""
+    material = [model, system_prompt, temperature, earlier, normalize_prompt(prompt)]
+    return hashlib.sha256(json.dumps(material, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class ReplyCache:
+    """Recent answers by ``reply_key``, and one upstream request per key at a time.
+
+    Finished answers sit in an LRU cache of ``max_entries`` that expire
+    after ``ttl`` seconds, written through to ``store`` when one is given.
+    ``claim`` is called from worker threads before a request is admitted,
+    so a prompt already being asked never takes a slot of its own.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, store: Optional[SessionStore] = None) -> None:
+        self._cache: LRUCache[str] = LRUCache("deepseek_replies", max_entries, ttl=ttl)
+        self._store = store
+        self._inflight: Dict[str, concurrent.futures.Future[Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        reply = self._cache.get(key)
+        if reply is None and self._store is not None:
+            reply = self._store.get(key)
+            if reply is not None:
+                self._cache.put(key, reply)
+        return reply
+
+    def put(self, key: str, reply: str) -> None:
+        self._cache.put(key, reply)
+        if self._store is not None:
+            self._store.put(key, reply)
+
+    def claim(self, key: str) -> Tuple[concurrent.futures.Future[Optional[str]], bool]:
+        """The future answer for ``key``, and whether the caller must ask for it and then ``settle`` it.
+
+        Anyone else just waits on the future; it resolves to None when the
+        request failed, and they should then ask for themselves.
+        """
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is not None:
+                return pending, False
+            pending = concurrent.futures.Future()
+            # the caller's get() already counted this lookup; peek so the hit rate stays honest
+            reply = self._cache.peek(key)
+            if reply is not None:
+                # settled between the caller's get() and this claim
+                pending.set_result(reply)
+                return pending, False
+            self._inflight[key] = pending
+        return pending, True
+
+    def settle(self, key: str, reply: Optional[str]) -> None:
+        """Hand a claimed key's answer (None on failure) to its waiters, caching it first so no later claim misses it."""
+        if reply is not None:
+            self.put(key, reply)
+        with self._lock:
+            pending = self._inflight.pop(key)
+        pending.set_result(reply)
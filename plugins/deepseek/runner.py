@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_BLOCKING_THREADS = 2
+
+
+class AsyncRunner:
+    """An asyncio event loop on one daemon thread that any thread can hand coroutines to.
+
+    The loop is started on first use. Blocking work a coroutine still needs
+    (``loop.run_in_executor(None, ...)``, e.g. posting replies with
+    ``SendClient``) goes to a pool of ``blocking_threads`` threads, so the
+    thread count stays fixed however many coroutines are waiting.
+    """
+
+    def __init__(self, name: str = "bot-asyncio", blocking_threads: int = DEFAULT_BLOCKING_THREADS) -> None:
+        self.name = name
+        self.blocking_threads = blocking_threads
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> concurrent.futures.Future[T]:
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                loop.set_default_executor(
+                    concurrent.futures.ThreadPoolExecutor(self.blocking_threads, thread_name_prefix=f"{self.name}-io")
+                )
+                threading.Thread(target=loop.run_forever, name=self.name, daemon=True).start()
+                self._loop = loop
+            return self._loop
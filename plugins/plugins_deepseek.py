@@ -1,13 +1,67 @@
 from __future__ import annotations
 
-import json
-from typing import Any, Dict, List
+import asyncio
+import concurrent.futures
+import functools
+import threading
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Tuple, TypeVar
 
-import requests
+from logger import logger
+from metrics import LLM_SAVED
+from send import NOOP_ACTION
+from session_store import SessionStore
+from plugins.deepseek import (
+    AsyncRunner,
+    ChatClient,
+    ChatError,
+    ChatHistory,
+    Quota,
+    ReplyCache,
+    RequestGate,
+    Ticket,
+    reply_key,
+)
 
-API_URL = "https://api.deepseek.com/v1/chat/completions"
+DEFAULT_BASE_URL = "https://api.deepseek.com"
+CHAT_PATH = "/v1/chat/completions"
 DEFAULT_MODEL = "deepseek-chat"
 DEFAULT_TEMPERATURE = 0.7
+DEFAULT_ACK = "思考中…"
+REQUEST_TIMEOUT = 30
+# streamed answers go out a piece at a time: at the first sentence end
+# once FLUSH_CHARS have built up, or unconditionally at MAX_FLUSH_CHARS
+DEFAULT_FLUSH_CHARS = 80
+MAX_FLUSH_CHARS = 400
+SENTENCE_ENDS = "。！？!?…\n"
+EMPTY_REPLY = "DeepSeek 没有返回任何内容。"
+RESET_ALIASES = {"reset", "清空", "新对话"}
+# earlier turns sent along with each prompt, see ChatHistory
+DEFAULT_HISTORY_TOKENS = 1500
+DEFAULT_HISTORY_SESSIONS = 256
+DEFAULT_HISTORY_TTL = 1800
+# answers reused for identical prompts (same model, settings and conversation)
+DEFAULT_CACHE_ENTRIES = 512
+DEFAULT_CACHE_TTL = 600
+DEFAULT_SYSTEM_PROMPT = "你是一个乐于助人的聊天助手。"
+# upstream requests running at once, and how many more may wait for a slot
+DEFAULT_MAX_CONCURRENT = 4
+DEFAULT_MAX_QUEUE = 20
+# chats per user / per group in each quota window (0 = unlimited)
+DEFAULT_USER_QUOTA = 20
+DEFAULT_GROUP_QUOTA = 100
+DEFAULT_QUOTA_WINDOW = 3600
+
+QUEUE_NOTICE = "提问的人有点多，已排到第 {position} 位，轮到后自动回复。"
+QUEUE_FULL = "现在提问的人太多，排队已满，请稍后再试。"
+
+T = TypeVar("T")
+
+# every chat waits on this one loop thread instead of a bot worker
+_runner = AsyncRunner("bot-deepseek")
+_history: ChatHistory | None = None
+_setup_lock = threading.Lock()
+_replies: ReplyCache | None = None
+_limits: Tuple[RequestGate, Quota, Quota] | None = None
 
 
 def handle(
@@ -28,43 +82,331 @@ def handle(
     if not api_key:
         return _build_text_response(context, "DeepSeek API Key 未配置，无法继续。")
 
+    key = _session_key(context)
+    history = _chat_history(deepseek_config)
+    if prompt in RESET_ALIASES:
+        if history is not None:
+            history.clear(key)
+        return _build_text_response(context, "已清空对话记录，开始新的对话。")
+
     model = deepseek_config.get("model", DEFAULT_MODEL)
     temperature = deepseek_config.get("temperature", DEFAULT_TEMPERATURE)
+    system_prompt = deepseek_config.get("system_prompt", DEFAULT_SYSTEM_PROMPT)
+    earlier = history.messages(key) if history is not None else []
 
     payload = {
         "model": model,
         "messages": [
-            {"role": "system", "content": deepseek_config.get("system_prompt", "你是一个乐于助人的聊天助手。")},
+            {"role": "system", "content": system_prompt},
+            *earlier,
             {"role": "user", "content": prompt},
         ],
         "temperature": temperature,
     }
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-    }
+    replies = _reply_cache(deepseek_config)
+    cache_key = reply_key(model, system_prompt, temperature, earlier, prompt) if replies is not None else ""
+    cached = replies.get(cache_key) if replies is not None else None
+    if cached is not None:
+        LLM_SAVED.inc("cache")
+        if history is not None:
+            history.record(key, prompt, cached)
+        return _build_text_response(context, cached)
+
+    refusal = _take_quota(context, deepseek_config)
+    if refusal:
+        return _build_text_response(context, refusal)
+    gate = _request_limits(deepseek_config)[0]
+
+    url = deepseek_config.get("base_url", DEFAULT_BASE_URL).rstrip("/") + CHAT_PATH
+    client = ChatClient(url, api_key, timeout=deepseek_config.get("timeout", REQUEST_TIMEOUT))
+    send = context.get("send")
+    if send is None:
+        # no way to reply later (e.g. called outside the router): wait here
+        ticket = gate.admit()
+        if ticket is None:
+            _refund_quota(context, deepseek_config)
+            return _build_text_response(context, QUEUE_FULL)
+        message, answered = _runner.submit(_gated(gate, ticket, _ask(client, payload))).result()
+        if answered and history is not None:
+            history.record(key, prompt, message)
+        if answered and replies is not None:
+            replies.put(cache_key, message)
+        return _build_text_response(context, message)
+
+    if deepseek_config.get("stream", True):
+        flush_chars = deepseek_config.get("flush_chars", DEFAULT_FLUSH_CHARS)
+
+        def ask() -> Coroutine[Any, Any, str | None]:
+            return _stream_answer(client, payload, context, flush_chars)
+
+    else:
+
+        def ask() -> Coroutine[Any, Any, str | None]:
+            return _answer(client, payload, context)
+
+    ack = deepseek_config.get("ack", DEFAULT_ACK)
+    acknowledged = _build_text_response(context, ack) if ack else [{"type": NOOP_ACTION}]
+    remember = functools.partial(_remember, history, key, prompt)
+    if replies is not None:
+        pending, leading = replies.claim(cache_key)
+        if not leading:
+            # the same prompt is already being asked: wait for it without a slot
+            future = _runner.submit(_join(pending, ask, gate, context, deepseek_config, remember))
+            future.add_done_callback(_log_failure)
+            return acknowledged
+
+    ticket = gate.admit()
+    if ticket is None:
+        if replies is not None:
+            replies.settle(cache_key, None)
+        _refund_quota(context, deepseek_config)
+        return _build_text_response(context, QUEUE_FULL)
+    future = _runner.submit(_lead(gate, ticket, ask, replies, cache_key, remember))
+    future.add_done_callback(_log_failure)
+    if ticket.position:
+        return _build_text_response(context, QUEUE_NOTICE.format(position=ticket.position))
+    return acknowledged
+
+
+def _quota_keys(context: Dict[str, Any]) -> Tuple[str, str | None]:
+    user = str(context.get("user_id"))
+    group = str(context.get("group_id")) if context.get("source") == "group" else None
+    return user, group
+
+
+def _take_quota(context: Dict[str, Any], config: Dict[str, Any]) -> str:
+    """Charge the user's and group's quotas; a non-empty str says why the chat is refused."""
+    _, users, groups = _request_limits(config)
+    user, group = _quota_keys(context)
+    allowed, wait = users.take(user)
+    if not allowed:
+        return f"你的提问次数已用完（每 {_format_window(users.window)} {users.limit} 次），请 {_format_window(wait)}后再试。"
+    if group is not None:
+        allowed, wait = groups.take(group)
+        if not allowed:
+            users.refund(user)
+            return f"本群的提问次数已用完（每 {_format_window(groups.window)} {groups.limit} 次），请 {_format_window(wait)}后再试。"
+    return ""
+
+
+def _refund_quota(context: Dict[str, Any], config: Dict[str, Any]) -> None:
+    """Give back what ``_take_quota`` charged, for a chat turned away or answered without going upstream."""
+    _, users, groups = _request_limits(config)
+    user, group = _quota_keys(context)
+    users.refund(user)
+    if group is not None:
+        groups.refund(group)
+
+
+async def _gated(gate: RequestGate, ticket: Ticket, work: Coroutine[Any, Any, T]) -> T:
+    """Run ``work`` once the ticket's turn comes, freeing its slot afterwards."""
+    try:
+        await ticket.wait()
+    except BaseException:
+        # cancelled while queued (e.g. runner shutdown): the ticket may never have held a slot
+        gate.withdraw(ticket)
+        work.close()
+        raise
+    try:
+        return await work
+    finally:
+        gate.release()
+
+
+async def _lead(
+    gate: RequestGate,
+    ticket: Ticket,
+    ask: Callable[[], Coroutine[Any, Any, str | None]],
+    replies: ReplyCache | None,
+    cache_key: str,
+    remember: Callable[[str | None], Awaitable[None]],
+) -> None:
+    """Ask upstream once admitted, then pass the answer to any identical chats waiting on it."""
+    try:
+        reply = await _gated(gate, ticket, ask())
+    except BaseException:
+        if replies is not None:
+            replies.settle(cache_key, None)
+        raise
+    if replies is not None:
+        # a persisted cache writes to SQLite, which must not stall the loop
+        await asyncio.get_running_loop().run_in_executor(None, replies.settle, cache_key, reply)
+    await remember(reply)
+
 
+async def _join(
+    pending: concurrent.futures.Future[str | None],
+    ask: Callable[[], Coroutine[Any, Any, str | None]],
+    gate: RequestGate,
+    context: Dict[str, Any],
+    config: Dict[str, Any],
+    remember: Callable[[str | None], Awaitable[None]],
+) -> None:
+    """Reply with the answer of an identical chat already in flight, or queue up and ask ourselves if it failed."""
+    loop = asyncio.get_running_loop()
+    reply = await asyncio.wrap_future(pending)
+    if reply is not None:
+        LLM_SAVED.inc("coalesced")
+        _refund_quota(context, config)
+        await loop.run_in_executor(None, context["send"], _build_text_response(context, reply))
+    else:
+        ticket = gate.admit()
+        if ticket is None:
+            _refund_quota(context, config)
+            await loop.run_in_executor(None, context["send"], _build_text_response(context, QUEUE_FULL))
+            return
+        if ticket.position:
+            notice = QUEUE_NOTICE.format(position=ticket.position)
+            await loop.run_in_executor(None, context["send"], _build_text_response(context, notice))
+        reply = await _gated(gate, ticket, ask())
+    await remember(reply)
+
+
+async def _remember(history: ChatHistory | None, key: str, prompt: str, reply: str | None) -> None:
+    if reply and history is not None:
+        # a persisted history writes to SQLite, which must not stall the loop
+        await asyncio.get_running_loop().run_in_executor(None, history.record, key, prompt, reply)
+
+
+async def _ask(client: ChatClient, payload: Dict[str, Any]) -> Tuple[str, bool]:
+    """The text to reply with, and whether it is DeepSeek's answer rather than an error."""
+    try:
+        return _extract_message(await client.complete(payload)), True
+    except ChatError as exc:
+        return f"DeepSeek API 请求失败：{exc}", False
+    except (ValueError, KeyError, TypeError, AttributeError) as exc:  # JSON of the wrong shape
+        return f"DeepSeek 返回结果解析失败：{exc}", False
+
+
+async def _answer(client: ChatClient, payload: Dict[str, Any], context: Dict[str, Any]) -> str | None:
+    """Ask, then post the reply; SendClient blocks, so it runs on the runner's small I/O pool."""
+    message, answered = await _ask(client, payload)
+    await asyncio.get_running_loop().run_in_executor(None, context["send"], _build_text_response(context, message))
+    return message if answered else None
+
+
+async def _stream_answer(
+    client: ChatClient, payload: Dict[str, Any], context: Dict[str, Any], flush_chars: int
+) -> str | None:
+    """Relay a streamed answer as a few messages, keeping them in order while the stream keeps reading.
+
+    Returns the whole answer, or None when the stream failed part-way.
+    """
+    loop = asyncio.get_running_loop()
+    sending: asyncio.Future[None] | None = None
+
+    async def post(text: str) -> None:
+        nonlocal sending
+        if sending is not None:
+            await sending
+        sending = loop.run_in_executor(None, context["send"], _build_text_response(context, text))
+
+    buffer = ""
+    sent = False
+    answer: List[str] = []
+    failed = True
     try:
-        response = requests.post(API_URL, headers=headers, data=json.dumps(payload), timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        message = _extract_message(data)
-    except requests.RequestException as exc:
-        message = f"DeepSeek API 请求失败：{exc}"
+        async for delta in client.stream(payload):
+            answer.append(delta)
+            buffer += delta
+            cut = _flush_point(buffer, flush_chars)
+            if cut:
+                await post(buffer[:cut].strip())
+                buffer = buffer[cut:]
+                sent = True
+        failed = False
+    except ChatError as exc:
+        buffer += f"\n（DeepSeek API 请求失败：{exc}）"
     except (ValueError, KeyError) as exc:
-        message = f"DeepSeek 返回结果解析失败：{exc}"
+        buffer += f"\n（DeepSeek 返回结果解析失败：{exc}）"
+    text = buffer.strip()
+    if text or not sent:
+        await post(text or EMPTY_REPLY)
+    if sending is not None:
+        await sending
+    return None if failed else "".join(answer).strip()
+
+
+def _flush_point(text: str, flush_chars: int) -> int:
+    """Length of the prefix of ``text`` worth sending now, 0 to keep waiting."""
+    if len(text) < flush_chars:
+        return 0
+    end = max(text.rfind(mark) for mark in SENTENCE_ENDS) + 1
+    if end >= flush_chars:
+        return end
+    # forced: cutting at a sentence end this far back would send a scrap
+    return len(text) if len(text) >= MAX_FLUSH_CHARS else 0
+
+
+def _chat_history(config: Dict[str, Any]) -> ChatHistory | None:
+    """The shared history, built on first use; None when ``history_tokens`` is 0."""
+    global _history
+    budget = config.get("history_tokens", DEFAULT_HISTORY_TOKENS)
+    if budget <= 0:
+        return None
+    with _setup_lock:
+        if _history is None:
+            ttl = config.get("history_ttl", DEFAULT_HISTORY_TTL)
+            store = SessionStore("deepseek_history", ttl=ttl) if config.get("history_persist") else None
+            _history = ChatHistory(budget, config.get("history_sessions", DEFAULT_HISTORY_SESSIONS), ttl, store)
+        return _history
+
+
+def _reply_cache(config: Dict[str, Any]) -> ReplyCache | None:
+    """The shared reply cache, built on first use; None when ``cache_entries`` is 0."""
+    global _replies
+    entries = config.get("cache_entries", DEFAULT_CACHE_ENTRIES)
+    if entries <= 0:
+        return None
+    with _setup_lock:
+        if _replies is None:
+            ttl = config.get("cache_ttl", DEFAULT_CACHE_TTL)
+            store = SessionStore("deepseek_replies", ttl=ttl) if config.get("cache_persist") else None
+            _replies = ReplyCache(entries, ttl, store)
+        return _replies
+
+
+def _request_limits(config: Dict[str, Any]) -> Tuple[RequestGate, Quota, Quota]:
+    global _limits
+    with _setup_lock:
+        if _limits is None:
+            window = config.get("quota_window", DEFAULT_QUOTA_WINDOW)
+            _limits = (
+                RequestGate(config.get("max_concurrent", DEFAULT_MAX_CONCURRENT), config.get("max_queue", DEFAULT_MAX_QUEUE)),
+                Quota("user_quota", config.get("user_quota", DEFAULT_USER_QUOTA), window),
+                Quota("group_quota", config.get("group_quota", DEFAULT_GROUP_QUOTA), window),
+            )
+        return _limits
+
+
+def _format_window(seconds: float) -> str:
+    if seconds >= 3600:
+        return f"{seconds / 3600:.0f} 小时"
+    if seconds >= 60:
+        return f"{seconds / 60:.0f} 分钟"
+    return f"{max(seconds, 1):.0f} 秒"
+
+
+def _session_key(context: Dict[str, Any]) -> str:
+    user_id = str(context.get("user_id"))
+    if context.get("source") == "group":
+        return f"group:{context.get('group_id')}:{user_id}"
+    return f"private:{user_id}"
+
 
-    return _build_text_response(context, message)
+def _log_failure(future: concurrent.futures.Future[None]) -> None:
+    exc = future.exception()
+    if exc is not None:
+        logger.error("DeepSeek reply failed: %s", exc)
 
 
 def _extract_message(payload: Dict[str, Any]) -> str:
     choices = payload.get("choices")
     if not choices:
-        return "DeepSeek 没有返回任何内容。"
+        return EMPTY_REPLY
     message = choices[0].get("message", {}).get("content", "").strip()
-    return message or "DeepSeek 没有返回任何内容。"
+    return message or EMPTY_REPLY
 
 
 def _build_text_response(context: Dict[str, Any], text: str) -> List[Dict[str, Any]]:
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import collections
 import json
 import random
+import sys
+import threading
+import time
 from pathlib import Path
-from typing import Any, Dict, Iterable, Iterator, List
+from typing import Any, Deque, Dict, Iterator, List, Tuple, TypeVar
 
 from logger import logger
+from metrics import CACHE_ENTRIES, CACHE_REQUESTS, WORKERS_BUSY
 
 COMMAND_ALIASES = {"gpb", "bullshit", "gpbt", "狗屁不通", "狗屁不通生成器"}
 DATA_FILE = Path(__file__).resolve().parents[1] / "data" / "goupibutongdata.json"
@@ -14,11 +19,52 @@ DUPLICATION_FACTOR = 2
 MAX_LENGTH = 6000
 PARAGRAPH_THRESHOLD = 5
 QUOTE_THRESHOLD = 20
+PARAGRAPH_BREAK = ". \r\n    "
+
+# texts are pre-split around the topic placeholder "x"; famous quotes also
+# carry "a"/"b" slots for a random "before"/"after" phrase (first of each)
+TOPIC_PLACEHOLDER = "x"
+QUOTE_SLOTS = (("a", "before"), ("b", "after"))
+DEFAULT_SLOT_TEXTS = {"before": ["曾经说过"], "after": ["这启发了我。"]}
+
+# skeletons are whole articles rendered with this in place of the topic
+TOPIC_SLOT = "\0"
+DEFAULT_POOL_MIB = 4
+POOL_NAME = "gpb_pool"
+IDLE_POLL_SECONDS = 0.05
+
+T = TypeVar("T")
+Skeleton = Tuple[Tuple[str, ...], ...]
 
 _sys_random = random.SystemRandom()
-_templates: Dict[str, List[str]] | None = None
-_bosh_iter: Iterator[str] | None = None
-_famous_iter: Iterator[str] | None = None
+_corpus: _Corpus | None = None
+_corpus_lock = threading.Lock()
+_pool: _SkeletonPool | None = None
+
+
+class _Text:
+    """A template fragment split around the topic placeholder, with its pre-substitution length."""
+
+    __slots__ = ("chunks", "size")
+
+    def __init__(self, text: str) -> None:
+        self.chunks: Tuple[str, ...] = tuple(text.split(TOPIC_PLACEHOLDER))
+        self.size = len(text)
+
+
+class _Corpus:
+    """Pre-tokenized templates; read-only once built, so every worker thread shares it."""
+
+    __slots__ = ("bosh", "famous", "slots")
+
+    def __init__(self, data: Dict[str, List[str]]) -> None:
+        self.bosh: List[_Text] = [_Text(text) for text in data.get("bosh", [])] * DUPLICATION_FACTOR or [_Text("")]
+        self.famous: List[Tuple[_Text | str, ...]] = [
+            _quote_segments(text) for text in data.get("famous", [])
+        ] * DUPLICATION_FACTOR or [(_Text(""),)]
+        self.slots: Dict[str, List[_Text]] = {
+            name: [_Text(text) for text in data.get(name) or default] for name, default in DEFAULT_SLOT_TEXTS.items()
+        }
 
 
 def handle(
@@ -31,48 +77,134 @@ def handle(
         return _text_response(context, "请提供生成主题，例如 `.bot gpb 人生意义`。")
 
     topic = " ".join(params)
-    data = _load_templates()
-    if not data:
+    corpus = _load_corpus()
+    if corpus is None:
         return _text_response(context, "模板数据加载失败，请检查 data/goupibutongdata.json。")
 
-    _ensure_generators(data)
-    article = _build_article(topic)
-    return _forward_response(context, _split_paragraphs(article))
-
-
-def _build_article(topic: str) -> str:
-    buffer: List[str] = []
-    while len("".join(buffer)) < MAX_LENGTH:
-        branch = _sys_random.randint(0, 100)
+    pool = _skeleton_pool(corpus, settings)
+    skeleton = pool.take() if pool is not None else _render_skeleton(corpus)
+    return _forward_response(context, [topic.join(chunks) for chunks in skeleton])
+
+
+class _SkeletonPool:
+    """Topic-agnostic articles rendered ahead of time by a background thread.
+
+    The producer only works while no worker is busy and stops once the
+    pool's estimated size reaches ``max_bytes``; each ``take`` wakes it to
+    top the pool back up. An empty pool falls back to rendering inline.
+    """
+
+    def __init__(self, corpus: _Corpus, max_bytes: int) -> None:
+        self._corpus = corpus
+        self.max_bytes = max_bytes
+        self._items: Deque[Tuple[Skeleton, int]] = collections.deque()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="bot-gpb-pool", daemon=True)
+        self._thread.start()
+
+    def take(self) -> Skeleton:
+        with self._lock:
+            item = self._items.popleft() if self._items else None
+            if item is not None:
+                self._bytes -= item[1]
+        self._wake.set()
+        if item is None:
+            CACHE_REQUESTS.inc(POOL_NAME, "miss")
+            return _render_skeleton(self._corpus)
+        CACHE_REQUESTS.inc(POOL_NAME, "hit")
+        CACHE_ENTRIES.dec(POOL_NAME)
+        return item[0]
+
+    def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            with self._lock:
+                full = self._bytes >= self.max_bytes
+            if full:
+                self._wake.wait()
+                continue
+            if WORKERS_BUSY.value() > 0:
+                time.sleep(IDLE_POLL_SECONDS)
+                continue
+            skeleton = _render_skeleton(self._corpus)
+            size = _skeleton_bytes(skeleton)
+            with self._lock:
+                self._items.append((skeleton, size))
+                self._bytes += size
+            CACHE_ENTRIES.inc(POOL_NAME)
+
+
+def _skeleton_pool(corpus: _Corpus, settings: Dict[str, Any]) -> _SkeletonPool | None:
+    """The shared pool, started on first use; None when ``goupibutong.pool_mib`` is 0."""
+    global _pool
+    if _pool is None:
+        mib = settings.get("goupibutong", {}).get("pool_mib", DEFAULT_POOL_MIB)
+        if mib <= 0:
+            return None
+        with _corpus_lock:
+            if _pool is None:
+                _pool = _SkeletonPool(corpus, int(mib * 1024 * 1024))
+    return _pool
+
+
+def _render_skeleton(corpus: _Corpus) -> Skeleton:
+    """Render and split an article with ``TOPIC_SLOT`` as topic; ``topic.join`` on each paragraph finishes it.
+
+    A slot is never whitespace, so paragraphs split exactly where they
+    would have with the real topic in place.
+    """
+    article = _build_article(corpus, TOPIC_SLOT, random.Random(_sys_random.getrandbits(64)))
+    return tuple(tuple(paragraph.split(TOPIC_SLOT)) for paragraph in _split_paragraphs(article))
+
+
+def _skeleton_bytes(skeleton: Skeleton) -> int:
+    return sys.getsizeof(skeleton) + sum(
+        sys.getsizeof(chunks) + sum(sys.getsizeof(chunk) for chunk in chunks) for chunks in skeleton
+    )
+
+
+def _build_article(corpus: _Corpus, topic: str, rnd: random.Random) -> str:
+    """Generate one article; all iteration state lives in this call, so concurrent requests never share it.
+
+    Length is counted before the topic is spliced in, as it always was, and
+    kept as a running total rather than re-measured each round.
+    """
+    pieces: List[str] = []
+    length = 0
+    bosh = _shuffle_cycle(corpus.bosh, rnd)
+    famous = _shuffle_cycle(corpus.famous, rnd)
+    slots = corpus.slots
+    join = topic.join
+    while length < MAX_LENGTH:
+        branch = rnd.randint(0, 100)
         if branch < PARAGRAPH_THRESHOLD:
-            buffer.append(_new_paragraph())
+            pieces.append(PARAGRAPH_BREAK)
+            length += len(PARAGRAPH_BREAK)
         elif branch < QUOTE_THRESHOLD:
-            buffer.append(_famous_quote())
+            for segment in next(famous):
+                text = segment if type(segment) is _Text else rnd.choice(slots[segment])
+                pieces.append(join(text.chunks))
+                length += text.size
         else:
-            buffer.append(_next_bosh())
-    content = "".join(buffer)
-    return content.replace("x", topic)
-
+            text = next(bosh)
+            pieces.append(join(text.chunks))
+            length += text.size
+    return "".join(pieces)
 
-def _next_bosh() -> str:
-    if _bosh_iter is None:
-        return ""
-    return next(_bosh_iter)
 
-
-def _famous_quote() -> str:
-    if _templates is None or _famous_iter is None:
-        return ""
-    sentence = next(_famous_iter)
-    before = _sys_random.choice(_templates.get("before", ["曾经说过"]))
-    after = _sys_random.choice(_templates.get("after", ["这启发了我。"]))
-    sentence = sentence.replace("a", before, 1)
-    sentence = sentence.replace("b", after, 1)
-    return sentence
-
-
-def _new_paragraph() -> str:
-    return ". \r\n    "
+def _quote_segments(text: str) -> Tuple[_Text | str, ...]:
+    """Split a famous quote at the first of each slot letter into text and slot names."""
+    cuts = sorted((text.find(letter), name) for letter, name in QUOTE_SLOTS if letter in text)
+    segments: List[_Text | str] = []
+    position = 0
+    for index, name in cuts:
+        segments.append(_Text(text[position:index]))
+        segments.append(name)
+        position = index + 1
+    segments.append(_Text(text[position:]))
+    return tuple(segments)
 
 
 def _split_paragraphs(article: str) -> List[str]:
@@ -91,39 +223,34 @@ def _split_paragraphs(article: str) -> List[str]:
     return paragraphs or [article]
 
 
-def _ensure_generators(data: Dict[str, List[str]]) -> None:
-    global _bosh_iter, _famous_iter
-    if _bosh_iter is None:
-        _bosh_iter = _shuffle_cycle(data.get("bosh", []))
-    if _famous_iter is None:
-        _famous_iter = _shuffle_cycle(data.get("famous", []))
+def _shuffle_cycle(items: List[T], rnd: random.Random) -> Iterator[T]:
+    pool = list(items)
+    while True:
+        rnd.shuffle(pool)
+        yield from pool
 
 
-def _shuffle_cycle(items: Iterable[str]) -> Iterator[str]:
-    pool = list(items) * DUPLICATION_FACTOR
-    if not pool:
-        pool = [""]
-    while True:
-        _sys_random.shuffle(pool)
-        for entry in pool:
-            yield entry
+def _load_corpus() -> _Corpus | None:
+    global _corpus
+    if _corpus is not None:
+        return _corpus
+    with _corpus_lock:
+        if _corpus is None:
+            data = _load_templates()
+            _corpus = _Corpus(data) if data else None
+    return _corpus
 
 
 def _load_templates() -> Dict[str, List[str]]:
-    global _templates
-    if _templates is not None:
-        return _templates
     if not DATA_FILE.exists():
         logger.error("goupibutong data file missing: %s", DATA_FILE)
-        _templates = {}
-        return _templates
+        return {}
     try:
         with DATA_FILE.open("r", encoding="utf-8") as handle:
-            _templates = json.load(handle)
+            return json.load(handle)
     except json.JSONDecodeError as exc:
         logger.error("Failed to parse %s: %s", DATA_FILE, exc)
-        _templates = {}
-    return _templates
+        return {}
 
 
 def _text_response(context: Dict[str, Any], text: str) -> List[Dict[str, Any]]:
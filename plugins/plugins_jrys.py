@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import hashlib
+import hmac
 import json
 import random
+import secrets
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Set
+
+from logger import logger
 
 DATA_FILE = Path(__file__).resolve().parents[1] / "data" / "jrys_data.json"
 FORTUNE_BUCKETS = [
@@ -14,6 +20,16 @@ FORTUNE_BUCKETS = [
     (80, "小吉！"),
     (100, "大吉！"),
 ]
+HASH_MODE = "hash"
+
+_file_lock = threading.Lock()
+_hash_lock = threading.Lock()
+_secret: bytes | None = None
+# hash mode keeps only today's state in memory: draws migrated from the
+# data file, and who has already drawn (so the reply can say so)
+_today: str | None = None
+_migrated: Dict[str, int] = {}
+_drawn: Set[str] = set()
 
 
 def handle(
@@ -27,18 +43,11 @@ def handle(
         return None
 
     today = datetime.now().strftime("%Y-%m-%d")
-    data = _load_data()
-    day_record = data.setdefault(today, {})
-    stored_value = day_record.get(str(user_id))
-
-    if stored_value is not None:
-        value = stored_value
-        text_prefix = "今日运势已抽取"
+    if settings.get("jrys", {}).get("mode") == HASH_MODE:
+        value, first = _hashed_draw(str(user_id), today, settings)
     else:
-        value = random.randint(0, 100)
-        day_record[str(user_id)] = value
-        _save_data(data)
-        text_prefix = "今日运势"
+        value, first = _stored_draw(str(user_id), today)
+    text_prefix = "今日运势" if first else "今日运势已抽取"
 
     fortune_text = _fortune_text(value)
     message_text = f"{text_prefix}：{value}（{fortune_text}）"
@@ -57,6 +66,47 @@ def handle(
     ]
 
 
+def _stored_draw(user_id: str, today: str) -> tuple[int, bool]:
+    """Draw from the data file; returns (value, whether this is the first draw today)."""
+    with _file_lock:
+        data = _load_data()
+        day_record = data.setdefault(today, {})
+        stored_value = day_record.get(user_id)
+        if stored_value is not None:
+            return stored_value, False
+        value = random.randint(0, 100)
+        day_record[user_id] = value
+        _save_data(data)
+    return value, True
+
+
+def _hashed_draw(user_id: str, today: str, settings: Dict[str, Any]) -> tuple[int, bool]:
+    """Derive the value from HMAC(secret, user|date): stable all day, no file access after the first call."""
+    global _today, _secret
+    with _hash_lock:
+        if _secret is None:
+            secret = settings.get("jrys", {}).get("secret")
+            if not secret:
+                logger.error("jrys.secret is not set; fortunes will change when the bot restarts")
+            _secret = secret.encode("utf-8") if secret else secrets.token_bytes(32)
+        if _today != today:
+            # the first call of a process reads the file once so draws it
+            # recorded today keep their value; later days start empty
+            _migrated.clear()
+            if _today is None:
+                _migrated.update(_load_data().get(today, {}))
+            _drawn.clear()
+            _drawn.update(_migrated)
+            _today = today
+        first = user_id not in _drawn
+        _drawn.add(user_id)
+        value = _migrated.get(user_id)
+    if value is None:
+        digest = hmac.new(_secret, f"{user_id}|{today}".encode("utf-8"), hashlib.sha256).digest()
+        value = int.from_bytes(digest[:8], "big") % 101
+    return value, first
+
+
 def _load_data() -> Dict[str, Dict[str, int]]:
     if not DATA_FILE.exists():
         return {}
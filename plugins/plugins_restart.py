@@ -1,12 +1,22 @@
 from __future__ import annotations
 
-import json
 import random
+import secrets
+import struct
+import threading
+from itertools import chain
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List
 
+from cache import LRUCache
 from logger import logger
+from session_store import SessionStore
+from session_token import TokenError, TokenSigner
 from plugins.restart_engine import HandlerException, Life
+from plugins.restart_engine.AchievementManager import AchievementManager, AchievementRecord
+from plugins.restart_engine.Talent import Talent
+from plugins.restart_engine.EventManager import EventManager
+from plugins.restart_engine.TalentManager import TalentManager
 
 COMMAND_ALIASES = {"restart", "liferestart", "人生重开", "人生重来"}
 START_ALIASES = {"start", "begin", "开始", "重开"}
@@ -15,6 +25,8 @@ ALLOC_ALIASES = {"alloc", "allocate", "attrs", "point", "points", "加点", "属
 STATUS_ALIASES = {"status", "state", "进度"}
 END_ALIASES = {"end", "cancel", "stop", "退出", "结束"}
 RANDOM_ALIASES = {"random", "auto", "随机"}
+STATS_ALIASES = {"stats", "统计", "概率"}
+ACHIEVEMENT_ALIASES = {"achievements", "achievement", "成就"}
 
 ATTR_ALIASES = {
     "chr": "CHR",
@@ -30,9 +42,26 @@ ATTR_ORDER = ["CHR", "INT", "STR", "MNY"]
 MAX_ATTR_PER_STAT = 10
 FORWARD_THRESHOLD = 10
 LINES_PER_NODE = 4
+BASE_PROPERTY_POINTS = 20
+DEFAULT_STATS_LIVES = 2000
+MAX_STATS_LIVES = 20000
+STATS_TOP_EVENTS = 5
+# years per forward message when streaming a life as it is simulated; 0 sends it in one go
+DEFAULT_STREAM_YEARS = 25
 
 DATA_DIR = Path(__file__).resolve().parents[1] / "data" / "restart"
-STATE_FILE = DATA_DIR / "restart.json"
+LEGACY_STATE_FILE = DATA_DIR / "restart.json"
+# unfinished runs are dropped after a day without activity
+SESSION_TTL = 24 * 3600
+# live Life objects kept between pick/alloc; a miss replays from the seed
+LIVE_LIFE_LIMIT = 256
+# restart.session_mode "token": the session travels in the replies as `#<token>`
+TOKEN_MODE = "token"
+TOKEN_PREFIX = "#"
+TOKEN_VERSION = 1
+STAGES = ("talent", "allocate")
+# version, stage, seed, picked option indexes as a bitmask
+_TOKEN_LAYOUT = struct.Struct(">BBIH")
 
 _engine_ready = False
 try:
@@ -42,6 +71,43 @@ except FileNotFoundError as exc:  # pragma: no cover - missing assets surfaced a
     logger.error("Failed to load restart assets: %s", exc)
 
 _sys_random = random.SystemRandom()
+_sessions = SessionStore("restart", ttl=SESSION_TTL)
+_sessions.import_json(LEGACY_STATE_FILE)
+# per player (not per chat), kept indefinitely
+_achievements = SessionStore("restart_achievements")
+
+
+class _LiveLife:
+    """A session's Life with its talent roll done, cached between commands."""
+
+    __slots__ = ("seed", "life", "offered")
+
+    def __init__(self, seed: int) -> None:
+        self.seed = seed
+        self.life = Life(random.Random(seed))
+        self.offered: List[Talent] = list(self.life.talent.genTalents(self.life._talent_randomized))
+
+    def choose(self, selected: List[int]) -> Life:
+        """Apply the picked talents once; later calls must agree with the first."""
+        owned = [talent.id for talent in self.life.talent.talents]
+        if owned:
+            if owned != list(selected):
+                raise HandlerException("selected talent mismatch")
+            return self.life
+        id_map = {talent.id: talent for talent in self.offered}
+        try:
+            chosen = [id_map[tid] for tid in selected]
+        except KeyError as exc:
+            raise HandlerException("selected talent mismatch") from exc
+        for talent in chosen:
+            self.life.talent.addTalent(talent)
+        self.life.talent.updateTalentProp()
+        return self.life
+
+
+_lives: LRUCache[_LiveLife] = LRUCache("restart_lives", LIVE_LIFE_LIMIT, ttl=SESSION_TTL)
+_signer: TokenSigner | None = None
+_signer_lock = threading.Lock()
 
 
 def handle(
@@ -55,47 +121,65 @@ def handle(
 
     sub = params[0].lower() if params else "start"
     if sub in PICK_ALIASES:
-        return _handle_pick(context, params[1:])
+        return _handle_pick(context, params[1:], settings)
     if sub in ALLOC_ALIASES:
-        return _handle_allocate(context, params[1:])
+        return _handle_allocate(context, params[1:], settings)
     if sub in RANDOM_ALIASES:
-        return _handle_random(context)
+        return _handle_random(context, settings)
+    if sub in STATS_ALIASES:
+        return _handle_stats(context, params[1:], settings)
     if sub in STATUS_ALIASES:
-        return _handle_status(context)
+        return _handle_status(context, params[1:], settings)
+    if sub in ACHIEVEMENT_ALIASES:
+        return _handle_achievements(context)
     if sub in END_ALIASES:
-        return _handle_cancel(context)
+        return _handle_cancel(context, settings)
     if sub in START_ALIASES or not params:
-        return _handle_start(context)
+        return _handle_start(context, settings)
     # 无法识别子命令时默认重新开始
-    return _handle_start(context)
+    return _handle_start(context, settings)
 
 
-def _handle_start(context: Dict[str, Any]) -> List[Dict[str, Any]]:
-    state = _load_state()
+def _handle_start(context: Dict[str, Any], settings: Dict[str, Any]) -> List[Dict[str, Any]]:
     key = _session_key(context)
     seed = _sys_random.randint(1, 2**31 - 1)
-    options = _generate_talent_options(seed)
-    state[key] = {
-        "seed": seed,
-        "stage": "talent",
-        "options": options,
-        "selected": [],
-    }
-    _save_state(state)
+    live = _LiveLife(seed)
+    options = _talent_options(live.offered)
+    with _sessions.lock(key):
+        _lives.put(key, live)
+        carry = _save_session(
+            key,
+            {
+                "seed": seed,
+                "stage": "talent",
+                "options": options,
+                "selected": [],
+            },
+            settings,
+        )
 
     lines = ["🎲 人生重开已准备，请从以下天赋中任选 3 个："]
     for idx, talent in enumerate(options, start=1):
         grade = _grade_label(talent["grade"])
         lines.append(f"{idx}. {talent['name']}（{grade}）- {talent['description']}")
-    lines.append("使用 `.bot restart pick 1 3 5` 这样格式挑选天赋。")
+    lines.append(f"使用 `.bot restart pick 1 3 5{carry}` 这样格式挑选天赋。")
     lines.append("若想直接体验一把，可发送 `.bot restart random` 进行全随机重开。")
     return _text_response(context, "\n".join(lines))
 
 
-def _handle_pick(context: Dict[str, Any], args: List[str]) -> List[Dict[str, Any]]:
-    state = _load_state()
+def _handle_pick(context: Dict[str, Any], args: List[str], settings: Dict[str, Any]) -> List[Dict[str, Any]]:
     key = _session_key(context)
-    session = state.get(key)
+    token, args = _split_token(args)
+    with _sessions.lock(key):
+        return _pick_locked(context, key, token, args, settings)
+
+
+def _pick_locked(
+    context: Dict[str, Any], key: str, token: str | None, args: List[str], settings: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    session, error = _load_session(key, token, settings)
+    if error:
+        return _text_response(context, error)
     if not session or session.get("stage") != "talent":
         return _text_response(context, "当前没有等待选天赋的进度，可先 `.bot restart` 重开。")
     if not args:
@@ -116,28 +200,36 @@ def _handle_pick(context: Dict[str, Any], args: List[str]) -> List[Dict[str, Any
     selected_ids = [options[i - 1]["id"] for i in indexes]
     session["selected"] = selected_ids
     session["stage"] = "allocate"
-    state[key] = session
 
     try:
-        available = _calculate_available_points(session)
+        available = _calculate_available_points(session, key)
     except HandlerException as exc:
         logger.error("Failed to compute restart property pool: %s", exc)
         return _text_response(context, "内部错误：属性点计算失败，请重试 `.bot restart`。")
 
-    _save_state(state)
+    carry = _save_session(key, session, settings)
     picked = ", ".join(options[i - 1]["name"] for i in indexes)
     msg = (
         f"已选择天赋：{picked}\n"
         f"可分配属性点：{available}，单项最多 {MAX_ATTR_PER_STAT} 点。\n"
-        "可使用 `.bot restart alloc 6 6 4 4` 或 `.bot restart alloc 颜值=6 智力=6 体质=4 家境=4` 进行加点"
+        f"可使用 `.bot restart alloc 6 6 4 4{carry}` 或 `.bot restart alloc 颜值=6 智力=6 体质=4 家境=4{carry}` 进行加点"
     )
     return _text_response(context, msg)
 
 
-def _handle_allocate(context: Dict[str, Any], args: List[str]) -> List[Dict[str, Any]]:
-    state = _load_state()
+def _handle_allocate(context: Dict[str, Any], args: List[str], settings: Dict[str, Any]) -> List[Dict[str, Any]]:
     key = _session_key(context)
-    session = state.get(key)
+    token, args = _split_token(args)
+    with _sessions.lock(key):
+        return _allocate_locked(context, key, token, args, settings)
+
+
+def _allocate_locked(
+    context: Dict[str, Any], key: str, token: str | None, args: List[str], settings: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    session, error = _load_session(key, token, settings)
+    if error:
+        return _text_response(context, error)
     if not session or session.get("stage") != "allocate":
         return _text_response(context, "请先选择天赋后再加点。")
     if not args:
@@ -147,7 +239,7 @@ def _handle_allocate(context: Dict[str, Any], args: List[str]) -> List[Dict[str,
         )
 
     try:
-        life = _build_life(session)
+        life = _build_life(session, key)
     except HandlerException as exc:
         logger.error("Failed to build life for allocation: %s", exc)
         return _text_response(context, "内部错误：无法恢复天赋，请重新 `.bot restart`。")
@@ -160,20 +252,23 @@ def _handle_allocate(context: Dict[str, Any], args: List[str]) -> List[Dict[str,
     if total_used != available:
         return _text_response(context, f"当前可用 {available} 点，实际分配 {total_used} 点，请重新调整。")
 
+    # the run consumes the Life either way
+    _lives.pop(key)
     life.property.apply(allocation)
     try:
-        logs = _run_simulation(life, session)
+        responses = _deliver_log(_simulate(life, session, context), context, settings)
     except HandlerException:
         return _text_response(context, "模拟过程中出现异常，请 `.bot restart` 重新开始。")
 
-    state.pop(key, None)
-    _save_state(state)
-    return _format_log_response(logs, context)
+    if token is None:
+        _sessions.delete(key)
+    return responses
 
 
-def _handle_random(context: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _handle_random(context: Dict[str, Any], settings: Dict[str, Any]) -> List[Dict[str, Any]]:
     seed = _sys_random.randint(1, 2**31 - 1)
-    options = _generate_talent_options(seed)
+    live = _LiveLife(seed)
+    options = _talent_options(live.offered)
     if len(options) < 3:
         return _text_response(context, "随机天赋生成失败，请稍后再试。")
 
@@ -182,7 +277,7 @@ def _handle_random(context: Dict[str, Any]) -> List[Dict[str, Any]]:
     session = {"seed": seed, "selected": selected_ids, "options": options}
 
     try:
-        life = _build_life(session)
+        life = live.choose(selected_ids)
     except HandlerException as exc:
         logger.error("Failed to build life for random run: %s", exc)
         return _text_response(context, "内部错误：随机重开失败，请稍后再试。")
@@ -195,11 +290,6 @@ def _handle_random(context: Dict[str, Any]) -> List[Dict[str, Any]]:
         return _text_response(context, "内部错误：随机加点失败，请稍后再试。")
 
     life.property.apply(allocation)
-    try:
-        logs = _run_simulation(life, session)
-    except HandlerException:
-        return _text_response(context, "模拟过程中出现异常，请稍后再试。")
-
     intro = []
     names = _talent_names(session, selected_ids)
     if names:
@@ -208,11 +298,113 @@ def _handle_random(context: Dict[str, Any]) -> List[Dict[str, Any]]:
         "随机加点："
         f"颜{allocation['CHR']} 智{allocation['INT']} 体{allocation['STR']} 家{allocation['MNY']}"
     )
-    return _format_log_response(intro + logs, context)
+    try:
+        return _deliver_log(chain(intro, _simulate(life, session, context)), context, settings)
+    except HandlerException:
+        return _text_response(context, "模拟过程中出现异常，请稍后再试。")
+
+
+def _handle_stats(context: Dict[str, Any], args: List[str], settings: Dict[str, Any]) -> List[Dict[str, Any]]:
+    try:
+        from plugins.restart_engine.Batch import BatchLife
+    except ImportError as exc:
+        logger.error("Batch restart engine unavailable: %s", exc)
+        return _text_response(context, "统计功能需要安装 numpy。")
+
+    if len(args) < 2:
+        return _text_response(
+            context,
+            "用法：`.bot restart stats 天赋1,天赋2,天赋3 6 6 4 4`，天赋可填编号或名称，属性同 alloc。",
+        )
+
+    talents, error = _parse_talents(args[0])
+    if error:
+        return _text_response(context, error)
+    allocation, error = _parse_allocation(args[1:])
+    if error:
+        return _text_response(context, error)
+    available = max(BASE_PROPERTY_POINTS + sum(t.status for t in talents), 0)
+    total_used = sum(allocation.values())
+    if total_used != available:
+        return _text_response(context, f"当前可用 {available} 点，实际分配 {total_used} 点，请重新调整。")
+
+    lives = settings.get("restart", {}).get("stats_lives", DEFAULT_STATS_LIVES)
+    lives = max(1, min(int(lives), MAX_STATS_LIVES))
+    try:
+        result = BatchLife(talents, allocation, lives).run()
+    except Exception as exc:  # pragma: no cover - engine level exceptions are surfaced to user
+        logger.error("Batch simulation failed: %s", exc)
+        return _text_response(context, "统计模拟过程中出现异常，请稍后再试。")
+
+    logger.info("Simulated %d lives in %.2fs (%.0f lives/s)", result.lives, result.seconds, result.livesPerSecond)
+    return _text_response(context, "\n".join(_format_stats(talents, allocation, result)))
+
+
+def _parse_talents(token: str) -> tuple[List[Any], str | None]:
+    by_name = {talent.name: talent for talent in TalentManager.talentDict.values()}
+    talents = []
+    for raw in token.replace("，", ",").split(","):
+        raw = raw.strip()
+        if not raw:
+            continue
+        talent = TalentManager.talentDict.get(int(raw)) if raw.isdecimal() else by_name.get(raw)
+        if talent is None:
+            return [], f"未知的天赋：{raw}"
+        if any(t.id == talent.id for t in talents):
+            continue
+        for other in talents:
+            if other.isExclusiveWith(talent):
+                return [], f"天赋【{talent.name}】和【{other.name}】不能同时拥有。"
+        talents.append(talent)
+    if not talents or len(talents) > Life._talent_choose:
+        return [], f"请提供 1~{Life._talent_choose} 个天赋，用逗号分隔。"
+    return talents, None
+
+
+def _format_stats(talents: List[Any], allocation: Dict[str, int], result: Any) -> List[str]:
+    p10, p50, p90 = result.percentiles([10, 50, 90])
+    lines = [
+        f"📊 {'、'.join(t.name for t in talents)}｜"
+        f"颜{allocation['CHR']} 智{allocation['INT']} 体{allocation['STR']} 家{allocation['MNY']}",
+        f"模拟 {result.lives} 次人生，耗时 {result.seconds:.2f}s",
+        f"寿命：中位 {p50:.0f} 岁（10%~90%：{p10:.0f}~{p90:.0f}）",
+        "活到 60/80/100 岁："
+        + " / ".join(f"{result.reachProbability(age):.1%}" for age in (60, 80, 100)),
+        "寿命分布：" + " ".join(f"{start}+:{count / result.lives:.0%}" for start, count in result.histogram(20, upto=100)),
+    ]
+    common = result.commonEvents(STATS_TOP_EVENTS)
+    if common:
+        lines.append("常见经历：")
+        for event_id, share in common:
+            event = EventManager._events.get(event_id)
+            lines.append(f"  {share:.0%} {event.name if event else event_id}")
+    final = result.meanFinal()
+    lines.append(
+        f"平均结局属性：颜{final['CHR']:.1f} 智{final['INT']:.1f} 体{final['STR']:.1f} "
+        f"家{final['MNY']:.1f} 乐{final['SPR']:.1f}"
+    )
+    return lines
+
+
+def _handle_achievements(context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    record = AchievementRecord.fromDict(_achievements.get(str(context.get("user_id"))))
+    catalog = AchievementManager._achievements
+    unlocked = [catalog[aid] for aid in sorted(record.unlocked) if aid in catalog]
+    lines = [f"🏆 已重开 {record.times} 次，达成成就 {len(unlocked)}/{len(catalog)}："]
+    for grade in range(3, -1, -1):
+        names = [a.name for a in unlocked if a.grade == grade]
+        if names:
+            lines.append(f"{_grade_label(grade)}：{'、'.join(names)}")
+    if not unlocked:
+        lines.append("还没有达成任何成就。")
+    return _text_response(context, "\n".join(lines))
 
 
-def _handle_status(context: Dict[str, Any]) -> List[Dict[str, Any]]:
-    session = _load_state().get(_session_key(context))
+def _handle_status(context: Dict[str, Any], args: List[str], settings: Dict[str, Any]) -> List[Dict[str, Any]]:
+    token, _ = _split_token(args)
+    session, error = _load_session(_session_key(context), token, settings)
+    if error:
+        return _text_response(context, error)
     if not session:
         return _text_response(context, "当前没有进行中的人生重开，发送 `.bot restart` 即可开始。")
     stage = session.get("stage")
@@ -223,37 +415,63 @@ def _handle_status(context: Dict[str, Any]) -> List[Dict[str, Any]]:
     return _text_response(context, "进度状态异常，请重新 `.bot restart`。")
 
 
-def _handle_cancel(context: Dict[str, Any]) -> List[Dict[str, Any]]:
-    state = _load_state()
+def _handle_cancel(context: Dict[str, Any], settings: Dict[str, Any]) -> List[Dict[str, Any]]:
     key = _session_key(context)
-    if key in state:
-        state.pop(key)
-        _save_state(state)
+    _lives.pop(key)
+    if _sessions.delete(key):
         return _text_response(context, "已清除当前人生重开进度。")
+    if _token_signer(settings) is not None:
+        return _text_response(context, "进度保存在回复里的令牌中，不再使用即可，过期后自动失效。")
     return _text_response(context, "没有可取消的进度。")
 
 
-def _run_simulation(life: Life, session: Dict[str, Any]) -> List[str]:
-    logs: List[str] = []
-    try:
-        for day in life.run():
-            if not day:
-                continue
-            prefix = day[0]
-            extras = [piece for piece in day[1:] if piece]
-            line = prefix if not extras else f"{prefix} {'；'.join(extras)}"
-            logs.append(line)
-    except Exception as exc:  # pragma: no cover - engine level exceptions are surfaced to user
-        logger.error("Life simulation failed: %s", exc)
-        raise HandlerException("simulation failed") from exc
+def _simulate(life: Life, session: Dict[str, Any], context: Dict[str, Any]) -> Iterator[str]:
+    """Yield the life log a year at a time as it is simulated, then the summary lines."""
+    player = str(context.get("user_id"))
+    with _achievements.lock(player):
+        record = AchievementRecord.fromDict(_achievements.get(player))
+        life.setAchievementRecord(record)
+        try:
+            for day in life.run():
+                if not day:
+                    continue
+                prefix = day[0]
+                extras = [piece for piece in day[1:] if piece]
+                yield prefix if not extras else f"{prefix} {'；'.join(extras)}"
+        except Exception as exc:  # pragma: no cover - engine level exceptions are surfaced to user
+            logger.error("Life simulation failed: %s", exc)
+            raise HandlerException("simulation failed") from exc
+        if record.dirty:
+            _achievements.put(player, record.toDict())
 
     chosen = session.get("selected", [])
     talent_names = _talent_names(session, chosen)
     if talent_names:
-        logs.append(f"继承天赋：{', '.join(talent_names)}")
-    logs.append(str(life.property))
-    logs.append("本次人生已结束，可再次 `.bot restart` 继续重开。")
-    return logs
+        yield f"继承天赋：{', '.join(talent_names)}"
+    yield str(life.property)
+    for achievement in life.achievement.unlocked:
+        yield f"🏆 达成成就【{achievement.name}】：{achievement.desc}"
+    yield f"本次人生已结束（第 {record.times} 次重开），可再次 `.bot restart` 继续重开。"
+
+
+def _deliver_log(lines: Iterable[str], context: Dict[str, Any], settings: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Send the log in forward batches through ``context["send"]`` while it is produced.
+
+    A batch goes out once a later line shows the log continues, so the
+    reply returned to the router is never empty. Lives too short to fill a
+    batch, or callers without a sender, get the whole log in one reply.
+    """
+    send = context.get("send")
+    years = settings.get("restart", {}).get("stream_years", DEFAULT_STREAM_YEARS)
+    # flushed batches must be long enough to go out as forward messages
+    batch = max(int(years), FORWARD_THRESHOLD + 1) if send and years else 0
+    buffered: List[str] = []
+    for line in lines:
+        buffered.append(line)
+        if batch and len(buffered) > batch:
+            send(_forward_response(buffered[:batch], context))
+            del buffered[:batch]
+    return _format_log_response(buffered, context)
 
 
 def _talent_names(session: Dict[str, Any], ids: List[int]) -> List[str]:
@@ -271,7 +489,10 @@ def _format_log_response(lines: List[str], context: Dict[str, Any]) -> List[Dict
         return _text_response(context, "没有产生任何事件，请重新重开一次吧。")
     if len(lines) <= FORWARD_THRESHOLD:
         return _text_response(context, "\n".join(lines))
+    return _forward_response(lines, context)
+
 
+def _forward_response(lines: List[str], context: Dict[str, Any]) -> List[Dict[str, Any]]:
     nodes = _build_forward_nodes(lines, context)
     if context.get("source") == "group":
         return [
@@ -367,32 +588,90 @@ def _random_allocation(total: int) -> Dict[str, int]:
     return allocation
 
 
-def _build_life(session: Dict[str, Any]) -> Life:
-    seed = session["seed"]
-    selected = session.get("selected", [])
-    rnd = random.Random(seed)
-    life = Life(rnd)
-    talents = list(life.talent.genTalents(life._talent_randomized))
-    id_map = {talent.id: talent for talent in talents}
+def _live_life(key: str, seed: int) -> _LiveLife:
+    live = _lives.get(key)
+    if live is None or live.seed != seed:
+        live = _LiveLife(seed)
+        _lives.put(key, live)
+    return live
+
+
+def _build_life(session: Dict[str, Any], key: str) -> Life:
+    """Return the session's Life with its talents applied, replaying the seed only on a cache miss."""
+    live = _live_life(key, session["seed"])
     try:
-        chosen = [id_map[tid] for tid in selected]
-    except KeyError as exc:
-        raise HandlerException("selected talent mismatch") from exc
-    for talent in chosen:
-        life.talent.addTalent(talent)
-    life.talent.updateTalentProp()
-    return life
+        return live.choose(session.get("selected", []))
+    except HandlerException:
+        # an older token of the same run picked differently; start over from the seed
+        live = _LiveLife(session["seed"])
+        _lives.put(key, live)
+        return live.choose(session.get("selected", []))
 
 
-def _calculate_available_points(session: Dict[str, Any]) -> int:
-    life = _build_life(session)
+def _token_signer(settings: Dict[str, Any]) -> TokenSigner | None:
+    """The signer when ``restart.session_mode`` is "token", else None."""
+    global _signer
+    config = settings.get("restart", {})
+    if config.get("session_mode") != TOKEN_MODE:
+        return None
+    with _signer_lock:
+        if _signer is None:
+            secret = config.get("token_secret")
+            if not secret:
+                logger.error("restart.token_secret is not set; tokens will not survive a restart or other processes")
+                secret = secrets.token_bytes(32)
+            _signer = TokenSigner(secret, ttl=SESSION_TTL)
+        return _signer
+
+
+def _split_token(args: List[str]) -> tuple[str | None, List[str]]:
+    token = None
+    rest = []
+    for arg in args:
+        if arg.startswith(TOKEN_PREFIX) and len(arg) > len(TOKEN_PREFIX):
+            token = arg[len(TOKEN_PREFIX) :]
+        else:
+            rest.append(arg)
+    return token, rest
+
+
+def _save_session(key: str, session: Dict[str, Any], settings: Dict[str, Any]) -> str:
+    """Keep the session for the next command; returns what that command has to carry."""
+    signer = _token_signer(settings)
+    if signer is None:
+        _sessions.put(key, session)
+        return ""
+    options = [option["id"] for option in session["options"]]
+    picked = sum(1 << options.index(tid) for tid in session["selected"])
+    payload = _TOKEN_LAYOUT.pack(TOKEN_VERSION, STAGES.index(session["stage"]), session["seed"], picked)
+    return f" {TOKEN_PREFIX}{signer.sign(payload, bind=key)}"
+
+
+def _load_session(key: str, token: str | None, settings: Dict[str, Any]) -> tuple[Dict[str, Any] | None, str | None]:
+    """Return ``(session, error)`` from the token if the command carried one, else from the store."""
+    if token is None:
+        return _sessions.get(key), None
+    signer = _token_signer(settings)
+    if signer is None:
+        return None, "当前未启用令牌模式，请直接使用 `.bot restart` 相关指令。"
+    try:
+        version, stage, seed, picked = _TOKEN_LAYOUT.unpack(signer.verify(token, bind=key))
+    except (TokenError, struct.error) as exc:
+        logger.info("Rejected restart token for %s: %s", key, exc)
+        return None, "令牌无效或已过期，请 `.bot restart` 重新开始。"
+    if version != TOKEN_VERSION or stage >= len(STAGES):
+        return None, "令牌无效或已过期，请 `.bot restart` 重新开始。"
+    options = _talent_options(_live_life(key, seed).offered)
+    selected = [option["id"] for idx, option in enumerate(options) if picked >> idx & 1]
+    return {"seed": seed, "stage": STAGES[stage], "options": options, "selected": selected}, None
+
+
+def _calculate_available_points(session: Dict[str, Any], key: str) -> int:
+    life = _build_life(session, key)
     return max(life.property.total, 0)
 
 
-def _generate_talent_options(seed: int) -> List[Dict[str, Any]]:
-    rnd = random.Random(seed)
-    life = Life(rnd)
-    talents = list(life.talent.genTalents(life._talent_randomized))
+def _talent_options(talents: List[Talent]) -> List[Dict[str, Any]]:
     options = []
     for talent in talents:
         options.append(
@@ -431,21 +710,3 @@ def _text_response(context: Dict[str, Any], text: str) -> List[Dict[str, Any]]:
         }
     ]
 
-
-def _load_state() -> Dict[str, Any]:
-    if not STATE_FILE.exists():
-        STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-        STATE_FILE.write_text("{}", encoding="utf-8")
-    try:
-        with STATE_FILE.open("r", encoding="utf-8") as handle:
-            return json.load(handle)
-    except json.JSONDecodeError:
-        logger.error("restart.json 损坏，已重置为空。")
-        STATE_FILE.write_text("{}", encoding="utf-8")
-        return {}
-
-
-def _save_state(state: Dict[str, Any]) -> None:
-    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with STATE_FILE.open("w", encoding="utf-8") as handle:
-        json.dump(state, handle, ensure_ascii=False, indent=2)
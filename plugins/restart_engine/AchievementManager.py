@@ -0,0 +1,206 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .Utils import ALWAYS, EVENT_BITS, TALENT_BITS, bits, members, parseCondition
+
+START = 'START'
+TRAJECTORY = 'TRAJECTORY'
+END = 'END'
+SUMMARY = 'SUMMARY'
+
+# attributes whose per-life highest (H*) and lowest (L*) values are tracked
+_TRACKED = ('CHR', 'INT', 'STR', 'MNY', 'SPR', 'AGE')
+
+
+class Achievement:
+    __slots__ = ('id', 'name', 'desc', 'grade', 'hide', 'opportunity', '_cond')
+
+    def __init__(self, json):
+        self.id: int = int(json['id'])
+        self.name: str = json['name']
+        self.desc: str = json['description']
+        self.grade: int = int(json['grade'])
+        self.hide: bool = bool(json.get('hide', 0))
+        self.opportunity: str = json.get('opportunity', TRAJECTORY)
+        self._cond = parseCondition(json['condition']) if 'condition' in json else ALWAYS
+    def __str__(self) -> str:
+        return f'{self.name}（{self.desc}）'
+
+
+class AchievementRecord:
+    '''
+    what a player carries from life to life: how many lives were finished,
+    unlocked achievement ids, and the talents/events ever seen that some
+    ATLT/AEVT condition asks about (nothing else needs remembering)
+    '''
+    __slots__ = ('times', 'unlocked', 'talents', 'events', 'dirty')
+
+    def __init__(self, times: int = 0, unlocked: Iterable[int] = (),
+                 talents: Iterable[int] = (), events: Iterable[int] = ()):
+        self.times = times
+        self.unlocked: Set[int] = set(unlocked)
+        self.talents: int = TALENT_BITS.mask(talents)  # bitsets, like TLT/EVT
+        self.events: int = EVENT_BITS.mask(events)
+        self.dirty = False
+
+    @staticmethod
+    def fromDict(data) -> 'AchievementRecord':
+        data = data or {}
+        return AchievementRecord(data.get('times', 0), data.get('unlocked', ()),
+                                 data.get('talents', ()), data.get('events', ()))
+
+    def toDict(self) -> dict:
+        return {
+            'times': self.times,
+            'unlocked': sorted(self.unlocked),
+            'talents': sorted(TALENT_BITS.ids(self.talents)),
+            'events': sorted(EVENT_BITS.ids(self.events)),
+        }
+
+
+class AchievementManager:
+    '''
+    per-life achievement checker; also the object conditions are evaluated
+    against, exposing H*/L*/SUM/ATLT/AVT next to the plain properties
+
+    TRAJECTORY achievements are indexed by the properties they read (EVT
+    by the event ids they name) and a year only re-checks the ones reading
+    something that changed
+    '''
+    __slots__ = ('_base', 'record', 'unlocked', 'TLT', 'SUM', '_last', '_owned', '_seen', '_new',
+                 'HCHR', 'HINT', 'HSTR', 'HMNY', 'HSPR', 'HAGE', 'LCHR', 'LINT', 'LSTR', 'LMNY', 'LSPR', 'LAGE')
+    _achievements: Dict[int, Achievement] = {}
+    _byOpportunity: Dict[str, Tuple[Achievement, ...]] = {}
+    _byRead: Dict[str, Tuple[Achievement, ...]] = {}
+    _byEvent: Dict[int, Tuple[Achievement, ...]] = {}
+    _watchedTalents = 0  # masks of the ids ATLT/AEVT conditions name
+    _watchedEvents = 0
+
+    @staticmethod
+    def load(config):
+        achievements = [Achievement(config[k]) for k in config]
+        AchievementManager._achievements = {a.id: a for a in achievements}
+        groups: Dict[str, List[Achievement]] = {}
+        for a in achievements:
+            groups.setdefault(a.opportunity, []).append(a)
+        AchievementManager._byOpportunity = {k: tuple(v) for k, v in groups.items()}
+        byRead: Dict[str, List[Achievement]] = {}
+        byEvent: Dict[int, List[Achievement]] = {}  # keyed by event bit
+        for a in groups.get(TRAJECTORY, ()):
+            for prop in a._cond.reads:
+                if prop != 'EVT':
+                    byRead.setdefault(prop, []).append(a)
+            # EVT only grows, so a condition on it can only turn true when one
+            # of the events it names is triggered
+            for evt in members(a._cond.ast, 'EVT'):
+                byEvent.setdefault(EVENT_BITS.bit(evt), []).append(a)
+        AchievementManager._byRead = {k: tuple(v) for k, v in byRead.items()}
+        AchievementManager._byEvent = {k: tuple(v) for k, v in byEvent.items()}
+        AchievementManager._watchedTalents = TALENT_BITS.mask(
+            sorted(set().union(*(members(a._cond.ast, 'ATLT') for a in achievements))))
+        AchievementManager._watchedEvents = EVENT_BITS.mask(
+            sorted(set().union(*(members(a._cond.ast, 'AVT') for a in achievements))))
+
+    def __init__(self, base, record: AchievementRecord = None):
+        self._base = base
+        self.record = record or AchievementRecord()
+        self.unlocked: List[Achievement] = []  # unlocked during this life
+        self.TLT = 0  # talents owned, as the achievement data means it
+        self.SUM = 0
+        self._last: Dict[str, int] = {}
+        self._owned = 0
+        self._seen = 0  # EVT as of the last check
+        self._new = 0
+
+    @property
+    def ATLT(self) -> int:
+        return self.record.talents
+
+    @property
+    def AVT(self) -> int:
+        return self.record.events
+
+    def __getattr__(self, name):
+        # everything not tracked here is read straight from the life
+        return getattr(self._base.property, name)
+
+    def _unlock(self, candidates: Iterable[Achievement]) -> None:
+        done = self.record.unlocked
+        for a in candidates:
+            if a.id not in done and a._cond(self):
+                done.add(a.id)
+                self.unlocked.append(a)
+                self.record.dirty = True
+
+    def _changed(self) -> Set[str]:
+        prop = self._base.property
+        changed = set()
+        for key in _TRACKED:
+            value = getattr(prop, key)
+            last = self._last.get(key)
+            if value == last:
+                continue
+            self._last[key] = value
+            changed.add(key)
+            high, low = 'H' + key, 'L' + key
+            if last is None or value > getattr(self, high):
+                setattr(self, high, value)
+                changed.add(high)
+            if last is None or value < getattr(self, low):
+                setattr(self, low, value)
+                changed.add(low)
+
+        record = self.record
+        talents = self._base.talent.talents
+        if len(talents) != self._owned:
+            self._owned = len(talents)
+            for t in talents:
+                self.TLT |= t.bit
+            changed.add('TLT')
+            seen = self.TLT & AchievementManager._watchedTalents
+            if seen & ~record.talents:
+                record.talents |= seen
+                record.dirty = True
+                changed.add('ATLT')
+
+        self._new = self._base.event.triggered & ~self._seen
+        if self._new:
+            self._seen |= self._new
+            seen = self._new & AchievementManager._watchedEvents
+            if seen & ~record.events:
+                record.events |= seen
+                record.dirty = True
+                changed.add('AVT')
+        return changed
+
+    def begin(self) -> None:
+        '''
+        after talents and properties are settled, before the first year
+        '''
+        self._changed()
+        self._unlock(AchievementManager._byOpportunity.get(START, ()))
+        self._unlock(AchievementManager._byOpportunity.get(TRAJECTORY, ()))
+
+    def update(self) -> None:
+        '''
+        after each year: only achievements reading a changed property
+        '''
+        byRead = AchievementManager._byRead
+        byEvent = AchievementManager._byEvent
+        candidates = {}
+        for prop in self._changed():
+            for a in byRead.get(prop, ()):
+                candidates[a.id] = a
+        for bit in bits(self._new):
+            for a in byEvent.get(bit, ()):
+                candidates[a.id] = a
+        if candidates:
+            self._unlock(candidates.values())
+
+    def finish(self) -> None:
+        self._changed()
+        if self._base.property.TMS > self.record.times:
+            self.record.times = self._base.property.TMS
+            self.record.dirty = True
+        self._unlock(AchievementManager._byOpportunity.get(END, ()))
+        self.SUM = (self.HCHR + self.HINT + self.HSTR + self.HMNY + self.HSPR) * 2 + self.HAGE // 2
+        self._unlock(AchievementManager._byOpportunity.get(SUMMARY, ()))
@@ -1,8 +1,13 @@
-from typing import List
+from array import array
+from itertools import accumulate
+from typing import Dict, List, Sequence, Tuple
 
 from .Talent import Talent
+from .TalentManager import TalentManager
 
 class WeightedEvent:
+    __slots__ = ('weight', 'evt')
+
     def __init__(self, o: str):
         if '*' not in o:
             self.weight: float = 1.0
@@ -12,29 +17,89 @@ class WeightedEvent:
             self.weight: float = float(s[1])
             self.evt: int = int(s[0])
 
+# weights repeat a handful of values across ~70k entries; share the objects
+_weights: Dict[float, float] = {}
+
+
+def _internWeights(weights) -> Tuple[float, ...]:
+    return tuple(_weights.setdefault(w, w) for w in weights)
+
+
+class AgeEvents:
+    '''
+    candidate events of one age as parallel arrays, resolved to Event objects
+    once at load time; NoRandom events can never be drawn and are left out
+    '''
+    __slots__ = ('ids', 'weights', 'events', 'fallback', 'cumulative', 'total')
+
+    def __init__(self, entries: Sequence[WeightedEvent]):
+        self.ids = array('l', (e.evt for e in entries))
+        self.weights: Tuple[float, ...] = _internWeights(e.weight for e in entries)
+        self.events: tuple = ()
+        self.fallback = None
+        # set when no candidate has a condition: draws then need no checks
+        self.cumulative: Tuple[float, ...] = ()
+        self.total = 0.0
+
+    def __len__(self):
+        return len(self.events)
+
+    def __getstate__(self):
+        return {k: getattr(self, k) for k in AgeEvents.__slots__}
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
+        self.weights = _internWeights(self.weights)
+
+    def link(self, events) -> None:
+        self.fallback = events[self.ids[0]] if self.ids else None
+        pairs = [(events[i], w) for i, w in zip(self.ids, self.weights) if not events[i]._NoRandom]
+        self.events = tuple(ev for ev, _ in pairs)
+        self.weights = tuple(w for _, w in pairs)
+        self.ids = array('l', (ev.id for ev in self.events))
+        if all(ev.unconditional for ev in self.events):
+            self.cumulative = tuple(accumulate(self.weights))
+            self.total = self.cumulative[-1] if self.cumulative else 0.0
+
+# through apply() so conditions reading AGE see it as changed
+_GROW = {'AGE': 1}
+
 class AgeManager:
+    __slots__ = ('_base',)
+    _empty = AgeEvents(())
+
     @staticmethod
     def load(config):
-        AgeManager._ages = config
-        for a in AgeManager._ages:
-            if 'event' in AgeManager._ages[a]:
-                AgeManager._ages[a]['event'] = [WeightedEvent(str(x)) for x in AgeManager._ages[a]['event']]
+        size = max(int(a) for a in config) + 1 if config else 0
+        AgeManager._ages: List[AgeEvents] = [AgeManager._empty] * size
+        AgeManager._talents: List[List[Talent]] = [[] for _ in range(size)]
+        for a in config:
+            age = int(a)
+            if 'event' in config[a]:
+                AgeManager._ages[age] = AgeEvents([WeightedEvent(str(x)) for x in config[a]['event']])
+            if 'talent' in config[a]:
+                AgeManager._talents[age] = [TalentManager.talentDict[int(t)] for t in config[a]['talent']]
+
+    @staticmethod
+    def link(events) -> int:
+        '''
+        resolve event ids once EventManager is loaded; returns the largest
+        candidate count, which sizes the samplers' scratch buffers
+        '''
+        for ages in AgeManager._ages:
+            if ages is not AgeManager._empty:
+                ages.link(events)
+        return max((len(a) for a in AgeManager._ages), default=0)
 
     def __init__(self, base):
         self._base = base
 
-    def _getnow(self):
-        return AgeManager._ages[str(self._base.property.AGE)]
-    
-    def getEvents(self) -> List[WeightedEvent]:
-        now = self._getnow()
-        if 'event' in now: return now['event']
-        return []
+    def getEvents(self) -> AgeEvents:
+        return AgeManager._ages[self._base.property.AGE]
     
     def getTalents(self) -> List[Talent]:
-        now = self._getnow()
-        if 'talent' in now: return now['talent']
-        return []
+        return AgeManager._talents[self._base.property.AGE]
     
     def grow(self):
-        self._base.property.AGE += 1
\ No newline at end of file
+        self._base.property.apply(_GROW)
@@ -0,0 +1,383 @@
+'''
+vectorised Monte Carlo runner: many lives sharing the same talents and
+property allocation advance year by year in lock step over numpy arrays,
+following the same rules as Life.run
+
+requires numpy, which the rest of the engine does not
+'''
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .AgeManager import AgeEvents, AgeManager
+from .EventManager import EventManager
+from .PropertyManager import PropertyManager
+from .Talent import Talent
+from .TalentManager import TalentManager
+from .Utils import SET_PROPERTIES, Node
+
+SCALAR_PROPS = ('CHR', 'INT', 'STR', 'MNY', 'SPR', 'AGE', 'LIF', 'TMS')
+FINAL_PROPS = ('CHR', 'INT', 'STR', 'MNY', 'SPR')
+
+Rows = Union[slice, np.ndarray]  # slice(None) for every row, else an index array
+VectorCondition = Callable[['BatchState', Rows], np.ndarray]
+
+
+class BatchState:
+    def __init__(self, size: int, talents: int, events: int):
+        self.props: Dict[str, np.ndarray] = {p: np.zeros(size, dtype=np.int64) for p in SCALAR_PROPS}
+        self.tlt = np.zeros((size, talents), dtype=bool)  # triggered talents
+        self.own = np.zeros((size, talents), dtype=bool)  # owned talents
+        self.evt = np.zeros((size, events), dtype=bool)   # triggered events
+
+    def __len__(self):
+        return len(self.props['LIF'])
+
+    def keep(self, rows: np.ndarray) -> None:
+        for p in SCALAR_PROPS:
+            self.props[p] = self.props[p][rows]
+        self.tlt = self.tlt[rows]
+        self.own = self.own[rows]
+        self.evt = self.evt[rows]
+
+
+def _count(rows: Rows, state: BatchState) -> int:
+    return len(state) if isinstance(rows, slice) else len(rows)
+
+
+def _anyColumn(matrix: np.ndarray, rows: Rows, cols: np.ndarray) -> np.ndarray:
+    if len(cols) == 1:
+        return matrix[rows, cols[0]]
+    if isinstance(rows, slice):
+        return matrix[:, cols].any(axis=1)
+    return matrix[np.ix_(rows, cols)].any(axis=1)
+
+
+class _EventInfo:
+    def __init__(self, col: int, effect: Dict[str, int], branches: List[Tuple[VectorCondition, int]]):
+        self.col = col
+        self.effect = [(k, v) for k, v in effect.items() if k != 'RDM']
+        self.rdm = effect.get('RDM', 0)
+        self.branches = branches
+
+
+class _AgeInfo:
+    def __init__(self, ages: AgeEvents, index: '_Index'):
+        self.cols = np.array([index.event[i] for i in ages.ids], dtype=np.int64)
+        self.weights = np.array(ages.weights, dtype=np.float64)
+        self.fallback = index.event[ages.fallback.id] if ages.fallback is not None else -1
+        # (candidate position, include, exclude) for candidates with conditions
+        self.checks = [
+            (pos, index.vectorize(ev._include), index.vectorize(ev._exclude))
+            for pos, ev in enumerate(ages.events)
+            if not ev.unconditional
+        ]
+
+
+class _Index:
+    '''
+    dense column numbers for events/talents plus vectorised conditions,
+    built once per loaded table set
+    '''
+    _current: Optional['_Index'] = None
+
+    @staticmethod
+    def get() -> '_Index':
+        cur = _Index._current
+        if cur is None or cur._events is not EventManager._events:
+            cur = _Index._current = _Index()
+        return cur
+
+    def __init__(self):
+        self._events = EventManager._events
+        self.eventIds = np.array(sorted(self._events), dtype=np.int64)
+        self.event = {int(i): c for c, i in enumerate(self.eventIds)}
+        self.talentIds = np.array(sorted(TalentManager.talentDict), dtype=np.int64)
+        self.talent = {int(i): c for c, i in enumerate(self.talentIds)}
+        self._vectorized: Dict[int, VectorCondition] = {}
+        self._eventInfo: Dict[int, _EventInfo] = {}
+        self._ageInfo: Dict[int, _AgeInfo] = {}
+
+    def vectorize(self, cond) -> VectorCondition:
+        key = id(cond)
+        func = self._vectorized.get(key)
+        if func is None:
+            func = self._vectorized[key] = self._node(cond.ast)
+        return func
+
+    def _node(self, node: Node) -> VectorCondition:
+        kind = node[0]
+        if kind == 'const':
+            value = node[1]
+            return lambda s, r: np.full(_count(r, s), value, dtype=bool)
+        if kind in ('and', 'or'):
+            funcs = [self._node(n) for n in node[1]]
+            combine = np.logical_and if kind == 'and' else np.logical_or
+
+            def combined(s, r):
+                result = funcs[0](s, r)
+                for f in funcs[1:]:
+                    result = combine(result, f(s, r))
+                return result
+            return combined
+
+        _, prop, op, value = node
+        if prop in SET_PROPERTIES:
+            if op not in ('?', '!'):
+                raise ValueError(f'unsupported comparison {op} on {prop}')
+            if prop not in ('EVT', 'TLT'):
+                # AVT/ATLT span a player's earlier lives, which a batch has none of
+                hit = lambda s, r: np.zeros(_count(r, s), dtype=bool)
+            else:
+                mapping = self.event if prop == 'EVT' else self.talent
+                cols = np.array(sorted(mapping[i] for i in value if i in mapping), dtype=np.int64)
+                attr = 'evt' if prop == 'EVT' else 'tlt'
+                if not len(cols):
+                    hit = lambda s, r: np.zeros(_count(r, s), dtype=bool)
+                else:
+                    hit = lambda s, r: _anyColumn(getattr(s, attr), r, cols)
+            if op == '?':
+                return hit
+            return lambda s, r: ~hit(s, r)
+
+        if prop not in SCALAR_PROPS:
+            raise ValueError(f'unsupported property {prop} in batch mode')
+        if op == '?':
+            members = np.array(sorted(value))
+            return lambda s, r: np.isin(s.props[prop][r], members)
+        if op == '!':
+            members = np.array(sorted(value))
+            return lambda s, r: ~np.isin(s.props[prop][r], members)
+        compare = {
+            '>': np.greater, '<': np.less, '>=': np.greater_equal,
+            '<=': np.less_equal, '=': np.equal, '!=': np.not_equal,
+        }[op]
+        return lambda s, r: compare(s.props[prop][r], value)
+
+    def eventInfo(self, col: int) -> _EventInfo:
+        info = self._eventInfo.get(col)
+        if info is None:
+            ev = self._events[int(self.eventIds[col])]
+            branches = [(self.vectorize(b.cond), self.event[b.id]) for b in ev.branch]
+            info = self._eventInfo[col] = _EventInfo(col, ev._effect, branches)
+        return info
+
+    def ageInfo(self, age: int) -> Optional[_AgeInfo]:
+        if age < 0 or age >= len(AgeManager._ages):
+            return None
+        info = self._ageInfo.get(age)
+        if info is None:
+            info = self._ageInfo[age] = _AgeInfo(AgeManager._ages[age], self)
+        return info
+
+
+class BatchResult:
+    def __init__(self, lifespans: np.ndarray, final: Dict[str, np.ndarray],
+                 eventCounts: np.ndarray, eventIds: np.ndarray, seconds: float):
+        self.lifespans = lifespans
+        self.final = final
+        self.eventCounts = eventCounts
+        self.eventIds = eventIds
+        self.seconds = seconds
+
+    @property
+    def lives(self) -> int:
+        return len(self.lifespans)
+
+    @property
+    def livesPerSecond(self) -> float:
+        return self.lives / self.seconds if self.seconds else float('inf')
+
+    def reachProbability(self, age: int) -> float:
+        return float(np.mean(self.lifespans >= age)) if self.lives else 0.0
+
+    def percentiles(self, qs: Sequence[float]) -> List[float]:
+        return [float(v) for v in np.percentile(self.lifespans, qs)]
+
+    def histogram(self, width: int = 10, upto: Optional[int] = None) -> List[Tuple[int, int]]:
+        '''
+        (bucket start, lives) pairs; lifespans at or past upto share its bucket
+        '''
+        spans = self.lifespans if upto is None else np.minimum(self.lifespans, upto)
+        buckets = np.bincount(spans // width)
+        return [(i * width, int(n)) for i, n in enumerate(buckets) if n]
+
+    def commonEvents(self, limit: int, ceiling: float = 0.995) -> List[Tuple[int, float]]:
+        '''
+        most frequently triggered events, skipping near-universal ones
+        (birth and the like) that say nothing about this build
+        '''
+        share = self.eventCounts / max(self.lives, 1)
+        order = np.argsort(-share, kind='stable')
+        picked = []
+        for col in order:
+            if share[col] <= 0:
+                break
+            if share[col] >= ceiling:
+                continue
+            picked.append((int(self.eventIds[col]), float(share[col])))
+            if len(picked) >= limit:
+                break
+        return picked
+
+    def meanFinal(self) -> Dict[str, float]:
+        return {p: float(np.mean(v)) if len(v) else 0.0 for p, v in self.final.items()}
+
+
+class BatchLife:
+    '''
+    talents: chosen talents (as from TalentManager.talentDict)
+    allocation: CHR/INT/STR/MNY points, as passed to PropertyManager.apply
+    '''
+    def __init__(self, talents: Sequence[Talent], allocation: Dict[str, int], size: int, seed=None):
+        self._talents = list(talents)
+        self._allocation = dict(allocation)
+        self._size = size
+        self._rng = np.random.default_rng(seed)
+
+    def _apply(self, state: BatchState, effect: List[Tuple[str, int]], rdm: int, rows: np.ndarray) -> None:
+        props = state.props
+        for key, value in effect:
+            props[key][rows] += value
+        if rdm:
+            picks = self._rng.integers(0, len(PropertyManager.RDM_PROPS), len(rows))
+            for k, key in enumerate(PropertyManager.RDM_PROPS):
+                props[key][rows[picks == k]] += rdm
+
+    def _drawEvents(self, state: BatchState, index: _Index, info: _AgeInfo, rows: Rows) -> np.ndarray:
+        count = _count(rows, state)
+        n = len(info.cols)
+        if not n:
+            return np.full(count, info.fallback, dtype=np.int64)
+        eligible = np.ones((count, n), dtype=bool)
+        for pos, include, exclude in info.checks:
+            eligible[:, pos] = include(state, rows) & ~exclude(state, rows)
+        cumulative = np.cumsum(eligible * info.weights, axis=1)
+        total = cumulative[:, -1]
+        draw = self._rng.random(count) * total
+        # first eligible candidate whose running weight reaches the draw:
+        # the same pick EventManager._randEvent makes with bisect
+        pick = np.argmax((cumulative >= draw[:, None]) & eligible, axis=1)
+        chosen = info.cols[pick]
+        chosen[total <= 0] = info.fallback
+        return chosen
+
+    def _runEvents(self, state: BatchState, index: _Index, rows: np.ndarray, chosen: np.ndarray) -> None:
+        '''
+        rows: row numbers sorted by their drawn event column in chosen
+        '''
+        cols, starts = np.unique(chosen, return_index=True)
+        ends = np.append(starts[1:], len(chosen))
+        pending = [(int(c), rows[s:e]) for c, s, e in zip(cols, starts, ends)]
+        while pending:
+            col, rows = pending.pop()
+            state.evt[rows, col] = True
+            info = index.eventInfo(col)
+            # like Event.runEvent: the first matching branch wins, judged
+            # before this event's own effect lands
+            remaining = rows
+            for cond, branchCol in info.branches:
+                if not len(remaining):
+                    break
+                ok = cond(state, remaining)
+                taken = remaining[ok]
+                if len(taken):
+                    self._apply(state, info.effect, info.rdm, taken)
+                    pending.append((branchCol, taken))
+                    remaining = remaining[~ok]
+            if len(remaining):
+                self._apply(state, info.effect, info.rdm, remaining)
+
+    def _updateTalents(self, state: BatchState, index: _Index, talents: List[Tuple[int, Talent]]) -> None:
+        for col, talent in talents:
+            waiting = np.nonzero(state.own[:, col] & ~state.tlt[:, col])[0]
+            if not len(waiting):
+                continue
+            ok = index.vectorize(talent._cond)(state, waiting)
+            rows = waiting[ok]
+            if len(rows):
+                state.tlt[rows, col] = True
+                effect = talent._effect
+                self._apply(state, [(k, v) for k, v in effect.items() if k != 'RDM'], effect.get('RDM', 0), rows)
+
+    def run(self) -> BatchResult:
+        started = time.perf_counter()
+        index = _Index.get()
+        state = BatchState(self._size, len(index.talentIds), len(index.eventIds))
+        props = state.props
+        props['SPR'][:] = 5
+        props['AGE'][:] = -1
+        props['LIF'][:] = 1
+        props['TMS'][:] = 1
+        for key, value in self._allocation.items():
+            props[key][:] += value
+
+        owned: Dict[int, Talent] = {}
+        for talent in self._talents:
+            col = index.talent[talent.id]
+            state.own[:, col] = True
+            owned[col] = talent
+        ownedOrder = [(index.talent[t.id], t) for t in self._talents]
+
+        lifespans: List[np.ndarray] = []
+        finals: Dict[str, List[np.ndarray]] = {p: [] for p in FINAL_PROPS}
+        eventCounts = np.zeros(len(index.eventIds), dtype=np.int64)
+
+        def retire(rows: np.ndarray) -> None:
+            lifespans.append(props['AGE'][rows].copy())
+            for p in FINAL_PROPS:
+                finals[p].append(props[p][rows].copy())
+            eventCounts[:] += state.evt[rows].sum(axis=0)
+
+        while len(state):
+            dead = props['LIF'] <= 0
+            if dead.any():
+                retire(np.nonzero(dead)[0])
+                state.keep(np.nonzero(~dead)[0])
+                props = state.props
+                if not len(state):
+                    break
+
+            props['AGE'] += 1
+            ages = props['AGE']
+            first = int(ages[0])
+            if (ages == first).all():
+                groups = [(first, slice(None))]
+            else:
+                groups = [(int(a), np.nonzero(ages == a)[0]) for a in np.unique(ages)]
+
+            chosen = np.empty(len(state), dtype=np.int64)
+            beyond = np.zeros(len(state), dtype=bool)
+            for age, rows in groups:
+                for talent in AgeManager._talents[age] if 0 <= age < len(AgeManager._talents) else ():
+                    col = index.talent[talent.id]
+                    state.own[rows, col] = True
+                    if col not in owned:
+                        owned[col] = talent
+                        ownedOrder.append((col, talent))
+                info = index.ageInfo(age)
+                if info is None or info.fallback < 0:
+                    # Life.run has nothing to draw here and would fail; end these lives instead
+                    beyond[rows] = True
+                    continue
+                chosen[rows] = self._drawEvents(state, index, info, rows)
+
+            if beyond.any():
+                props['LIF'][beyond] = 0
+                props['AGE'][beyond] -= 1
+                chosen = chosen[~beyond]
+                active = np.nonzero(~beyond)[0]
+            else:
+                active = np.arange(len(state))
+            if len(active):
+                self._runEvents(state, index, active[chosen.argsort(kind='stable')], np.sort(chosen))
+                self._updateTalents(state, index, ownedOrder)
+
+        return BatchResult(
+            np.concatenate(lifespans) if lifespans else np.zeros(0, dtype=np.int64),
+            {p: np.concatenate(v) if v else np.zeros(0, dtype=np.int64) for p, v in finals.items()},
+            eventCounts,
+            index.eventIds,
+            time.perf_counter() - started,
+        )
@@ -0,0 +1,92 @@
+import hashlib
+import io
+import os
+import pickle
+import tempfile
+from types import FunctionType
+from typing import Any, Iterable, Optional
+
+from . import Utils
+
+# bump when the pickled table layout changes in a way source hashing misses
+CACHE_VERSION = 2
+CACHE_DIRNAME = '.cache'
+
+_ENGINE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def sourceDigest(paths: Iterable[str]) -> str:
+    '''
+    hash of the data files plus the engine modules that shape the cached objects,
+    so editing either invalidates the cache
+    '''
+    digest = hashlib.sha256(f'v{CACHE_VERSION}'.encode())
+    engine = sorted(os.path.join(_ENGINE_DIR, n) for n in os.listdir(_ENGINE_DIR) if n.endswith('.py'))
+    for path in list(paths) + engine:
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as fp:
+            for block in iter(lambda: fp.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:20]
+
+
+def _restoreCondition(source: str, ast: Utils.Node):
+    if source == Utils.ALWAYS.source:
+        return Utils.ALWAYS
+    if source == Utils.NEVER.source:
+        return Utils.NEVER
+    func = Utils._interned.get(source)
+    if func is None:
+        func = Utils._interned.setdefault(source, Utils.compileCondition(ast, source))
+    return func
+
+
+class _TablePickler(pickle.Pickler):
+    # compiled predicates are closures; store their parse tree instead and
+    # rebuild (and re-intern) them on load without touching the parser
+    def reducer_override(self, obj):
+        if type(obj) is FunctionType and hasattr(obj, 'ast'):
+            return _restoreCondition, (obj.source, obj.ast)
+        return NotImplemented
+
+
+def cachePath(datapath: str, digest: str) -> str:
+    return os.path.join(datapath, CACHE_DIRNAME, f'engine-{digest}.pickle')
+
+
+def loadTables(path: str) -> Optional[Any]:
+    try:
+        with open(path, 'rb') as fp:
+            # bit positions first: predicates rebuilt while unpickling the
+            # tables compile their masks against them
+            Utils.installBitIndexes(*pickle.load(fp))
+            return pickle.load(fp)
+    except FileNotFoundError:
+        return None
+    except Exception as e:  # corrupt or written by an incompatible build
+        print(f'[WARNING] ignoring restart engine cache {path}: {e}')
+        return None
+
+
+def saveTables(path: str, tables: Any) -> None:
+    buffer = io.BytesIO()
+    pickle.dump((Utils.EVENT_BITS.order(), Utils.TALENT_BITS.order()), buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    _TablePickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(tables)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    for stale in os.listdir(directory):
+        if stale.startswith('engine-') and stale != os.path.basename(path):
+            try:
+                os.remove(os.path.join(directory, stale))
+            except OSError:
+                pass
+    # write-then-rename so concurrent starters never read a half-written file
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.engine-')
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(buffer.getvalue())
+        os.replace(tmp, path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
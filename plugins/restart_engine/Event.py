@@ -1,8 +1,10 @@
 from typing import Dict, Iterator, List
 
-from .Utils import parseCondition
+from .Utils import ALWAYS, EVENT_BITS, NEVER, parseCondition
 
 class Branch:
+    __slots__ = ('cond', 'id', 'evt')
+
     def __init__(self, str):
         s = str.split(':')
         self.cond = parseCondition(s[0])
@@ -10,15 +12,19 @@ class Branch:
         self.evt :Event = None
 
 class Event:
+    __slots__ = ('id', 'bit', 'name', '_include', '_exclude', '_effect', 'branch', '_NoRandom', '_postEvent', 'unconditional')
+
     def __init__(self, json):
         self.id : int = int(json['id'])
+        self.bit : int = EVENT_BITS.bit(self.id)
         self.name : str = json['event']
-        self._include = parseCondition(json['include']) if 'include' in json else lambda _: True
-        self._exclude = parseCondition(json['exclude']) if 'exclude' in json else lambda _: False
+        self._include = parseCondition(json['include']) if 'include' in json else ALWAYS
+        self._exclude = parseCondition(json['exclude']) if 'exclude' in json else NEVER
         self._effect : Dict[str, int] = json['effect'] if 'effect' in json else {}
         self.branch : List[Branch] = [Branch(x) for x in json['branch']] if 'branch' in json else []
         self._NoRandom = 'NoRandom' in json and json['NoRandom']
         self._postEvent = json['postEvent'] if 'postEvent' in json else None
+        self.unconditional = not self._NoRandom and self._include is ALWAYS and self._exclude is NEVER
     def __str__(self) -> str:
         return f'Event(id={self.id}, name={self.name})'
     def checkCondition(self, prop) -> bool:
@@ -1,9 +1,12 @@
-from typing import Dict, Iterator, List, Set
+from bisect import bisect_left
+from typing import Dict, Iterator
 
-from .AgeManager import WeightedEvent
+from .AgeManager import AgeEvents, AgeManager
 from .Event import Event
+from .Utils import ConditionCache, ConditionIndex
 
 class EventManager:
+    __slots__ = ('_base', 'triggered', '_rnd', '_cumulative', '_eligible', '_checked')
 
     @staticmethod
     def load(config):
@@ -11,25 +14,51 @@ class EventManager:
         for k in EventManager._events:
             for b in EventManager._events[k].branch:
                 b.evt = EventManager._events[b.id]
+        EventManager._maxCandidates = AgeManager.link(EventManager._events)
+        EventManager._dependencies = ConditionIndex(
+            (ev, (ev._include, ev._exclude)) for ev in EventManager._events.values() if not ev.unconditional)
 
     def __init__(self, base, rnd):
         self._base = base
-        self.triggered : Set[int] = set()
+        self.triggered : int = 0  # bitset over EVENT_BITS
         self._rnd = rnd
+        # scratch buffers reused by every draw of this life
+        self._cumulative = [0.0] * EventManager._maxCandidates
+        self._eligible = [None] * EventManager._maxCandidates
+        # include/exclude results, kept across years until an input changes
+        self._checked = ConditionCache(EventManager._dependencies)
 
-    def _randEvent(self, events: List[WeightedEvent]) -> int:
-        events_checked = [ev for ev in events if EventManager._events[ev.evt].checkCondition(self._base.property)]
-        total = sum(e.weight for e in events_checked)
+    def _randEvent(self, ages: AgeEvents) -> Event:
+        if ages.cumulative:
+            rnd = self._rnd.random() * ages.total
+            return ages.events[min(bisect_left(ages.cumulative, rnd), len(ages.events) - 1)]
+
+        prop = self._base.property
+        self._checked.refresh(prop)
+        checked = self._checked.results
+        cumulative = self._cumulative
+        eligible = self._eligible
+        total = 0.0
+        n = 0
+        for ev, weight in zip(ages.events, ages.weights):
+            ok = checked.get(ev)
+            if ok is None:
+                ok = checked[ev] = ev._include(prop) and not ev._exclude(prop)
+            if ok:
+                total += weight
+                cumulative[n] = total
+                eligible[n] = ev
+                n += 1
+        if not n:
+            return ages.fallback
         rnd = self._rnd.random() * total
-        for ev in events_checked:
-            rnd -= ev.weight
-            if rnd <= 0: return ev.evt
-        return events[0].evt
+        # same pick as walking the list subtracting weights, minus the float
+        # drift that used to fall through to the age's first event
+        return eligible[min(bisect_left(cumulative, rnd, 0, n), n - 1)]
     
     def _runEvent(self, event: Event) -> Iterator[str]:
-        self.triggered.add(event.id)
+        self.triggered |= event.bit
         return event.runEvent(self._base.property, self._runEvent)
 
-    def runEvents(self, events: List[WeightedEvent]) -> Iterator[str]:
-        ev = self._randEvent(events)
-        return self._runEvent(EventManager._events[ev])
\ No newline at end of file
+    def runEvents(self, ages: AgeEvents) -> Iterator[str]:
+        return self._runEvent(self._randEvent(ages))
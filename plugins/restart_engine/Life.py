@@ -4,6 +4,8 @@ import json
 import os
 import random
 
+from . import Cache
+from .AchievementManager import AchievementManager, AchievementRecord
 from .AgeManager import AgeManager
 from .EventManager import EventManager
 from .PropertyManager import PropertyManager
@@ -15,6 +17,8 @@ class HandlerException(Exception):
         super().__init__(msg)
 
 class Life:
+    __slots__ = ('_talent_inherit', '_talenthandler', '_propertyhandler', '_errorhandler', '_rnd', '_record',
+                 'property', 'talent', 'age', 'event', 'achievement')
     _talent_choose = 3
     _talent_finalist = 10
 
@@ -22,22 +26,79 @@ class Life:
     def _talent_randomized(self):
         return Life._talent_finalist - 1 if self._talent_inherit else Life._talent_finalist
 
+    _sources = ('talents.json', 'age.json', 'events.json', 'achievement.json')
+
     @staticmethod
-    def load(datapath):
+    def load(datapath, cache=True):
+        '''
+        cache: reuse the pickled engine tables from datapath/.cache when the
+        source json (and engine code) hashes match, writing them on a miss
+        '''
+        path = None
+        if cache:
+            path = Cache.cachePath(datapath, Cache.sourceDigest(os.path.join(datapath, n) for n in Life._sources))
+            tables = Cache.loadTables(path)
+            if tables is not None:
+                Life._installTables(tables)
+                return
+
         with open(os.path.join(datapath, 'talents.json'), encoding='utf8') as fp:
             TalentManager.load(json.load(fp))
         with open(os.path.join(datapath, 'age.json'), encoding='utf8') as fp:
             AgeManager.load(json.load(fp))
         with open(os.path.join(datapath, 'events.json'), encoding='utf8') as fp:
             EventManager.load(json.load(fp))
-        #with open(os.path.join(datapath, 'achievement.json'), encoding='utf8') as fp:
-        #    EventManager.load(json.load(fp))
+        with open(os.path.join(datapath, 'achievement.json'), encoding='utf8') as fp:
+            AchievementManager.load(json.load(fp))
+
+        if path is not None:
+            try:
+                Cache.saveTables(path, Life._tables())
+            except OSError as e:
+                print(f'[WARNING] unable to write restart engine cache {path}: {e}')
+
+    @staticmethod
+    def _tables():
+        return {
+            'talents': TalentManager._talents,
+            'talentDict': TalentManager.talentDict,
+            'talentDependencies': TalentManager._dependencies,
+            'ages': AgeManager._ages,
+            'ageTalents': AgeManager._talents,
+            'events': EventManager._events,
+            'maxCandidates': EventManager._maxCandidates,
+            'eventDependencies': EventManager._dependencies,
+            'achievements': AchievementManager._achievements,
+            'achievementsByOpportunity': AchievementManager._byOpportunity,
+            'achievementsByRead': AchievementManager._byRead,
+            'achievementsByEvent': AchievementManager._byEvent,
+            'watchedTalents': AchievementManager._watchedTalents,
+            'watchedEvents': AchievementManager._watchedEvents,
+        }
+
+    @staticmethod
+    def _installTables(tables):
+        TalentManager._talents = tables['talents']
+        TalentManager.talentDict = tables['talentDict']
+        TalentManager._dependencies = tables['talentDependencies']
+        AgeManager._ages = tables['ages']
+        AgeManager._talents = tables['ageTalents']
+        EventManager._events = tables['events']
+        EventManager._maxCandidates = tables['maxCandidates']
+        EventManager._dependencies = tables['eventDependencies']
+        AchievementManager._achievements = tables['achievements']
+        AchievementManager._byOpportunity = tables['achievementsByOpportunity']
+        AchievementManager._byRead = tables['achievementsByRead']
+        AchievementManager._byEvent = tables['achievementsByEvent']
+        AchievementManager._watchedTalents = tables['watchedTalents']
+        AchievementManager._watchedEvents = tables['watchedEvents']
 
     def _init_managers(self):
         self.property : PropertyManager = PropertyManager(self)
         self.talent : TalentManager = TalentManager(self, self._rnd)
         self.age : AgeManager = AgeManager(self)
         self.event : EventManager = EventManager(self, self._rnd)
+        self.achievement : AchievementManager = AchievementManager(self, self._record)
 
     def __init__(self, rnd=None):
         self._talent_inherit = None
@@ -45,6 +106,7 @@ class Life:
         self._propertyhandler : Callable[[int], Dict[str, int]] = None
         self._errorhandler : Callable[[Exception], None] = None
         self._rnd = rnd or random.Random()
+        self._record : AchievementRecord = None
         self._init_managers()
 
     def restart(self,inhert_num=None):
@@ -57,6 +119,14 @@ class Life:
     def _prefix(self) -> Iterator[str]:
         yield f'【{self.property.AGE}岁/颜{self.property.CHR}智{self.property.INT}体{self.property.STR}钱{self.property.MNY}乐{self.property.SPR}】'
 
+    def setAchievementRecord(self, record: AchievementRecord) -> None:
+        '''
+        record: the player's achievement progress, updated in place by run()
+        '''
+        self._record = record
+        self.achievement = AchievementManager(self, record)
+        self.property.TMS = record.times + 1
+
     def setErrorHandler(self, handler: Callable[[Exception], None]) -> None:
         '''
         handler recv randomized talents
@@ -83,6 +153,7 @@ class Life:
         '''
         returns: information splited by day
         '''
+        self.achievement.begin()
         while self._alive():
             self.age.grow()
             for t in self.age.getTalents(): self.talent.addTalent(t)
@@ -90,7 +161,10 @@ class Life:
             tal_log = self.talent.updateTalent()
             evt_log = self.event.runEvents(self.age.getEvents())
 
-            yield list(itertools.chain(self._prefix(), evt_log, tal_log))
+            day = list(itertools.chain(self._prefix(), evt_log, tal_log))
+            self.achievement.update()
+            yield day
+        self.achievement.finish()
     
     def choose(self):
         talents = list(self.talent.genTalents(self._talent_randomized))
@@ -1,6 +1,8 @@
-from typing import Dict, Set
+from typing import Dict, Iterator
 
 class PropertyManager:
+    __slots__ = ('_base', 'CHR', 'INT', 'STR', 'MNY', 'SPR', 'AGE', 'LIF', 'total', 'TMS', 'AVT', 'version', 'changed')
+    RDM_PROPS = ('CHR', 'INT', 'STR', 'MNY', 'SPR')
 
     def __init__(self, base):
         self._base = base
@@ -16,23 +18,41 @@ class PropertyManager:
         self.total = 20
         
         self.TMS = 1
-        self.AVT = []
+        self.AVT = 0 # bitset over EVENT_BITS, never filled by the engine
+
+        # dirty tracking for cached condition results: apply() bumps version
+        # and stamps each property it changes with it
+        self.version = 0
+        self.changed : Dict[str, int] = {}
 
     def __str__(self):
         return f'属性：颜值{self.CHR} 智力{self.INT} 体质{self.STR} 家境{self.MNY} 快乐{self.SPR}'
     
     @property
-    def TLT(self) -> Set[int]: # 天赋 talent TLT
+    def TLT(self) -> int: # 天赋 talent TLT, bitset over TALENT_BITS
         return self._base.talent.triggered
 
     @property
-    def EVT(self) -> Set[int]:
+    def EVT(self) -> int:
         return self._base.event.triggered
 
     def apply(self, effect: Dict[str, int]):
         for key in effect:
+            value = effect[key]
             if key == "RDM":
-                k = ['CHR','INT','STR','MNY','SPR'][id(key) % 5]
-                setattr(self, k, getattr(self, k) + effect[key])
-                continue
-            setattr(self, key, getattr(self, key) + effect[key])
+                # a random one of the five attributes, drawn from the life's rng
+                # (this used to be id(key) % 5, which was fixed per process)
+                key = self._base._rnd.choice(PropertyManager.RDM_PROPS)
+            setattr(self, key, getattr(self, key) + value)
+            if value:
+                self.version += 1
+                self.changed[key] = self.version
+
+    def changedSince(self, version: int) -> Iterator[str]:
+        '''
+        properties apply() changed after the given version
+        '''
+        if version != self.version:
+            for key, stamp in self.changed.items():
+                if stamp > version:
+                    yield key
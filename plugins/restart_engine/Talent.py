@@ -1,17 +1,20 @@
 from typing import Dict, List
 
-from .Utils import parseCondition
+from .Utils import ALWAYS, TALENT_BITS, parseCondition
 
 class Talent:
+    __slots__ = ('id', 'bit', 'name', 'desc', 'grade', '_exclusive', '_effect', 'status', '_cond')
+
     def __init__(self, json):
         self.id: int = int(json['id'])
+        self.bit: int = TALENT_BITS.bit(self.id)
         self.name: str = json['name']
         self.desc: str = json['description']
         self.grade: int = int(json['grade'])
         self._exclusive: List[int] = [int(x) for x in json['exclusive']] if'exclusive' in json else []
         self._effect: Dict[str, int] = json['effect'] if 'effect' in json else {}
         self.status = int(json['status']) if 'status' in json else 0
-        self._cond = parseCondition(json['condition']) if 'condition' in json else lambda _: True
+        self._cond = parseCondition(json['condition']) if 'condition' in json else ALWAYS
     def isExclusiveWith(self, talent) -> bool:
         return talent.id in self._exclusive or self.id in talent._exclusive
     def __str__(self) -> str:
@@ -1,8 +1,10 @@
-from typing import Dict, Iterator, List, Set
+from typing import Dict, Iterator, List
 
 from .Talent import Talent
+from .Utils import ConditionCache, ConditionIndex
 
 class TalentManager:
+    __slots__ = ('_base', 'talents', 'triggered', '_rnd', '_checked')
     grade_count = 4
     grade_prob = [0.889, 0.1, 0.01, 0.001]
 
@@ -15,12 +17,14 @@ class TalentManager:
             t = Talent(config[k])
             TalentManager._talents[t.grade].append(t)
             TalentManager.talentDict[t.id] = t
+        TalentManager._dependencies = ConditionIndex((t, (t._cond,)) for t in TalentManager.talentDict.values())
 
     def __init__(self, base, rnd):
         self._base = base
         self.talents : List[Talent] = []
-        self.triggered : Set[int] = set()
+        self.triggered : int = 0  # bitset over TALENT_BITS
         self._rnd = rnd
+        self._checked = ConditionCache(TalentManager._dependencies)
 
     def _genGrades(self):
         rnd = self._rnd.random()
@@ -48,11 +52,20 @@ class TalentManager:
         self._base.property.total += sum(t.status for t in self.talents)
 
     def updateTalent(self) -> Iterator[str]:
+        prop = self._base.property
+        cache = self._checked
+        cache.refresh(prop)
         for t in self.talents:
-            if t.id in self.triggered: continue
-            for res in t.runTalent(self._base.property):
-                self.triggered.add(t.id)
+            if self.triggered & t.bit: continue
+            ok = cache.results.get(t)
+            if ok is None:
+                ok = cache.results[t] = t._checkCondition(prop)
+            if not ok: continue
+            for res in t.runTalent(prop):
+                self.triggered |= t.bit
                 yield res
+            # the effect may flip the talents after this one
+            cache.refresh(prop)
 
     def addTalent(self, talent: Talent):
         for t in self.talents:
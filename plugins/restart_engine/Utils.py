@@ -1,27 +1,337 @@
+import operator
 import re
-from typing import List
-
-
-_regattr = re.compile('[A-Z]{3}')
-
-class DummyList(list):
-    def __init__(self, list: List[int]):
-        super().__init__(list)
-
-    def __contains__(self, o: object) -> bool:
-        if type(o) is set:
-            for x in self:
-                if x in o: return True
-            return False
-        return super().__contains__(o)
-
-def parseCondition(cond: str):
-    cond2 = _regattr.sub(lambda m: f'getattr(x, "{m.group()}")', cond.replace('AEVT','AVT')).replace('?[', ' in DummyList([').replace('![', 'not in DummyList([').replace(']', '])').replace('|',' or ')
-    while True:
-        try:
-            func = eval(f'lambda x: {cond2}')
-            func.__doc__ = cond2
-            return func
-        except:
-            print(f'[WARNING] missing ) in {cond}')
-            cond2 += ')'
\ No newline at end of file
+import threading
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Tuple, Union
+
+# Condition strings look like `(EVT?[10001,10002])&(STR<3)|TLT![1004]`:
+# comparisons on three/four letter properties joined by & and |, where
+# `?[...]` / `![...]` test membership (any-of for set valued properties).
+_token = re.compile(r'\s*(?:(?P<num>-?\d+(?:\.\d+)?)|(?P<name>[A-Z]+)|(?P<op>>=|<=|!=|[<>=?!&|(),\[\]]))')
+
+# upstream data still uses the old AEVT spelling for AVT
+_ALIASES = {'AEVT': 'AVT'}
+SET_PROPERTIES = frozenset(['TLT', 'EVT', 'AVT', 'ATLT'])
+
+Number = Union[int, float]
+# ('cmp', prop, op, value) | ('and', (node, ...)) | ('or', (node, ...)) | ('const', bool)
+Node = Tuple
+Predicate = Callable[[object], bool]
+
+_COMPARISONS = frozenset(['>', '<', '>=', '<=', '=', '!='])
+
+
+class BitIndex:
+    '''
+    dense bit positions for event/talent ids, so triggered sets can be
+    plain ints and membership tests a single `&`; positions are handed
+    out on first sight and never change within a process; handing out
+    takes a lock, since two workers loading records with unseen ids at
+    once must not both get the same position
+    '''
+    __slots__ = ('_bits', '_lock')
+
+    def __init__(self, ids: Iterable[int] = ()):
+        self._bits: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        for i in ids:
+            self.bit(i)
+
+    def __len__(self):
+        return len(self._bits)
+
+    def bit(self, key: int) -> int:
+        bit = self._bits.get(key)
+        if bit is None:
+            with self._lock:
+                bit = self._bits.setdefault(key, 1 << len(self._bits))
+        return bit
+
+    def mask(self, ids: Iterable[int]) -> int:
+        mask = 0
+        for i in ids:
+            mask |= self.bit(i)
+        return mask
+
+    def ids(self, mask: int) -> List[int]:
+        return [i for i, bit in self._bits.items() if mask & bit]
+
+    def order(self) -> List[int]:
+        return list(self._bits)
+
+
+EVENT_BITS = BitIndex()
+TALENT_BITS = BitIndex()
+_BIT_INDEXES = {'EVT': EVENT_BITS, 'AVT': EVENT_BITS, 'TLT': TALENT_BITS, 'ATLT': TALENT_BITS}
+
+
+class ConditionError(ValueError):
+    pass
+
+
+def _tokenize(cond: str) -> List[Tuple[str, str]]:
+    tokens = []
+    pos = 0
+    cond = cond.rstrip()
+    while pos < len(cond):
+        m = _token.match(cond, pos)
+        if not m:
+            raise ConditionError(f'unexpected character {cond[pos]!r} in {cond!r}')
+        kind = m.lastgroup
+        tokens.append((kind, m.group(kind)))
+        pos = m.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, cond: str):
+        self._cond = cond
+        self._tokens = _tokenize(cond)
+        self._pos = 0
+
+    def _peek(self) -> Tuple[str, str]:
+        if self._pos < len(self._tokens):
+            return self._tokens[self._pos]
+        return ('end', '')
+
+    def _take(self, kind: str, value: str = None) -> str:
+        tk, tv = self._peek()
+        if tk != kind or (value is not None and tv != value):
+            raise ConditionError(f'expected {value or kind} at token {self._pos} in {self._cond!r}')
+        self._pos += 1
+        return tv
+
+    def parse(self) -> Node:
+        node = self._or()
+        if self._peek()[0] != 'end':
+            raise ConditionError(f'trailing tokens in {self._cond!r}')
+        return node
+
+    def _or(self) -> Node:
+        items = [self._and()]
+        while self._peek() == ('op', '|'):
+            self._pos += 1
+            items.append(self._and())
+        return items[0] if len(items) == 1 else ('or', tuple(items))
+
+    def _and(self) -> Node:
+        items = [self._atom()]
+        while self._peek() == ('op', '&'):
+            self._pos += 1
+            items.append(self._atom())
+        return items[0] if len(items) == 1 else ('and', tuple(items))
+
+    def _atom(self) -> Node:
+        if self._peek() == ('op', '('):
+            self._pos += 1
+            node = self._or()
+            # the shipped data has a few conditions missing their closing
+            # parenthesis; treat end of input as closing them
+            if self._peek()[0] != 'end':
+                self._take('op', ')')
+            return node
+        prop = self._take('name')
+        prop = _ALIASES.get(prop, prop)
+        tk, op = self._peek()
+        if tk != 'op' or op not in _COMPARISONS and op not in ('?', '!'):
+            raise ConditionError(f'expected comparison after {prop} in {self._cond!r}')
+        self._pos += 1
+        if op in ('?', '!'):
+            return ('cmp', prop, op, self._list())
+        return ('cmp', prop, op, self._number())
+
+    def _number(self) -> Number:
+        text = self._take('num')
+        return float(text) if '.' in text else int(text)
+
+    def _list(self) -> FrozenSet[Number]:
+        self._take('op', '[')
+        items = []
+        if self._peek() != ('op', ']'):
+            items.append(self._number())
+            while self._peek() == ('op', ','):
+                self._pos += 1
+                items.append(self._number())
+        self._take('op', ']')
+        return frozenset(items)
+
+
+def _compileNode(node: Node) -> Predicate:
+    kind = node[0]
+    if kind == 'const':
+        value = node[1]
+        return lambda x: value
+    if kind == 'and':
+        funcs = [_compileNode(n) for n in node[1]]
+        func = funcs[0]
+        for nxt in funcs[1:]:
+            func = (lambda a, b: lambda x: a(x) and b(x))(func, nxt)
+        return func
+    if kind == 'or':
+        funcs = [_compileNode(n) for n in node[1]]
+        func = funcs[0]
+        for nxt in funcs[1:]:
+            func = (lambda a, b: lambda x: a(x) or b(x))(func, nxt)
+        return func
+
+    _, prop, op, value = node
+    get = operator.attrgetter(prop)
+    if prop in SET_PROPERTIES:
+        # set valued properties are bitsets over BitIndex positions
+        mask = _BIT_INDEXES[prop].mask(sorted(value))
+        if op == '?':
+            return lambda x: get(x) & mask != 0
+        if op == '!':
+            return lambda x: get(x) & mask == 0
+        raise ConditionError(f'{prop} only supports ?[...] and ![...]')
+    if op == '?':
+        return lambda x: get(x) in value
+    if op == '!':
+        return lambda x: get(x) not in value
+    if op == '>':
+        return lambda x: get(x) > value
+    if op == '<':
+        return lambda x: get(x) < value
+    if op == '>=':
+        return lambda x: get(x) >= value
+    if op == '<=':
+        return lambda x: get(x) <= value
+    if op == '=':
+        return lambda x: get(x) == value
+    return lambda x: get(x) != value
+
+
+def _reads(node: Node) -> FrozenSet[str]:
+    if node[0] == 'cmp':
+        return frozenset([node[1]])
+    if node[0] == 'const':
+        return frozenset()
+    return frozenset().union(*(_reads(n) for n in node[1]))
+
+
+def members(node: Node, prop: str) -> FrozenSet[int]:
+    '''
+    every id a condition tree names for the set property prop
+    '''
+    if node[0] == 'cmp':
+        return node[3] if node[1] == prop and prop in SET_PROPERTIES else frozenset()
+    if node[0] == 'const':
+        return frozenset()
+    return frozenset().union(*(members(n, prop) for n in node[1]))
+
+
+def compileCondition(node: Node, source: str = '') -> Predicate:
+    '''
+    build the predicate for a parsed condition tree
+    the returned function carries `source`, `ast` and `reads` attributes
+    '''
+    func = _compileNode(node)
+    func.__doc__ = source
+    func.source = source
+    func.ast = node
+    func.reads = _reads(node)
+    return func
+
+
+_interned: Dict[str, Predicate] = {}
+
+
+def parseCondition(cond: str) -> Predicate:
+    '''
+    compile a condition string once; identical strings share one predicate
+    '''
+    func = _interned.get(cond)
+    if func is None:
+        func = _interned.setdefault(cond, compileCondition(_Parser(cond).parse(), cond))
+    return func
+
+
+ALWAYS = compileCondition(('const', True), 'True')
+NEVER = compileCondition(('const', False), 'False')
+
+
+def installBitIndexes(events: List[int], talents: List[int]) -> None:
+    '''
+    adopt bit positions saved alongside cached tables; predicates compiled
+    against other positions are dropped so they get rebuilt
+    '''
+    if EVENT_BITS.order() == events[:len(EVENT_BITS)] and TALENT_BITS.order() == talents[:len(TALENT_BITS)]:
+        for i in events[len(EVENT_BITS):]:
+            EVENT_BITS.bit(i)
+        for i in talents[len(TALENT_BITS):]:
+            TALENT_BITS.bit(i)
+        return
+    EVENT_BITS.__init__(events)
+    TALENT_BITS.__init__(talents)
+    _interned.clear()
+
+
+def bits(mask: int) -> Iterator[int]:
+    '''
+    the single-bit ints set in mask, lowest first
+    '''
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        yield bit
+
+
+class ConditionIndex:
+    '''
+    owners (events, talents) indexed by what their conditions read: scalar
+    properties by name, EVT/TLT by the bit of every id they name, since a
+    set only grows and a result can only flip when one of those ids joins
+    '''
+    __slots__ = ('byRead', 'byEvent', 'byTalent')
+
+    def __init__(self, owners: Iterable[Tuple[object, Iterable[Predicate]]] = ()):
+        byRead: Dict[str, Dict[object, None]] = {}
+        byEvent: Dict[int, Dict[object, None]] = {}
+        byTalent: Dict[int, Dict[object, None]] = {}
+        for owner, conds in owners:
+            for cond in conds:
+                for prop in cond.reads - SET_PROPERTIES:
+                    byRead.setdefault(prop, {})[owner] = None
+                for evt in members(cond.ast, 'EVT'):
+                    byEvent.setdefault(EVENT_BITS.bit(evt), {})[owner] = None
+                for tlt in members(cond.ast, 'TLT'):
+                    byTalent.setdefault(TALENT_BITS.bit(tlt), {})[owner] = None
+        self.byRead: Dict[str, Tuple[object, ...]] = {k: tuple(v) for k, v in byRead.items()}
+        self.byEvent: Dict[int, Tuple[object, ...]] = {k: tuple(v) for k, v in byEvent.items()}
+        self.byTalent: Dict[int, Tuple[object, ...]] = {k: tuple(v) for k, v in byTalent.items()}
+
+
+class ConditionCache:
+    '''
+    per-life memo of condition results by owner; refresh() drops the owners
+    reading anything that changed since the previous refresh, scalar
+    properties through PropertyManager.changedSince and EVT/TLT per new bit
+    (AVT/ATLT never change during a life)
+    '''
+    __slots__ = ('_index', '_version', '_events', '_talents', 'results')
+
+    def __init__(self, index: ConditionIndex):
+        self._index = index
+        self._version = 0
+        self._events = 0
+        self._talents = 0
+        self.results: Dict[object, bool] = {}
+
+    def refresh(self, prop) -> None:
+        results = self.results
+        index = self._index
+        for key in prop.changedSince(self._version):
+            for owner in index.byRead.get(key, ()):
+                results.pop(owner, None)
+        self._version = prop.version
+        new = prop.EVT & ~self._events
+        if new:
+            self._events |= new
+            for bit in bits(new):
+                for owner in index.byEvent.get(bit, ()):
+                    results.pop(owner, None)
+        new = prop.TLT & ~self._talents
+        if new:
+            self._talents |= new
+            for bit in bits(new):
+                for owner in index.byTalent.get(bit, ()):
+                    results.pop(owner, None)
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import collections
+import math
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+from typing import Counter, List, Tuple
+
+from logger import logger
+
+REPORT_DIR = Path(__file__).parent / "data" / "profiles"
+DEFAULT_INTERVAL = 0.005
+# shorter turns the sampler into a GIL-holding busy loop; longer samples too little to be useful
+MIN_INTERVAL = 0.001
+MAX_INTERVAL = 1.0
+DEFAULT_TOP = 10
+TRACEMALLOC_FRAMES = 10
+
+# Leaf frames that only mean "this thread is parked"; counting them would bury
+# real work under idle workers blocked on queue.get() and the HTTP accept loop.
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("socketserver.py", "serve_forever"),
+}
+
+FunctionKey = Tuple[str, int, str]
+
+
+def _report_path(prefix: str, suffix: str) -> Path:
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return REPORT_DIR / f"{prefix}-{stamp}{suffix}"
+
+
+def _describe(key: FunctionKey) -> str:
+    filename, lineno, name = key
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+class CpuProfile:
+    """Aggregated samples collected by :class:`SamplingProfiler`."""
+
+    def __init__(self, duration: float, interval: float) -> None:
+        self.duration = duration
+        self.interval = interval
+        self.samples = 0
+        self.idle_samples = 0
+        self.self_counts: Counter[FunctionKey] = collections.Counter()
+        self.total_counts: Counter[FunctionKey] = collections.Counter()
+        self.stacks: Counter[Tuple[FunctionKey, ...]] = collections.Counter()
+
+    def add(self, stack: Tuple[FunctionKey, ...]) -> None:
+        self.samples += 1
+        self.stacks[stack] += 1
+        self.self_counts[stack[-1]] += 1
+        for key in set(stack):
+            self.total_counts[key] += 1
+
+    def top(self, limit: int) -> List[str]:
+        if not self.samples:
+            return ["No samples collected (every thread was idle)."]
+        lines = []
+        for key, count in self.self_counts.most_common(limit):
+            share = count * 100 / self.samples
+            cumulative = self.total_counts[key] * 100 / self.samples
+            lines.append(f"{share:5.1f}% self {cumulative:5.1f}% cum  {_describe(key)}")
+        return lines
+
+    def write(self) -> Path:
+        path = _report_path("cpu", ".txt")
+        with path.open("w", encoding="utf-8") as handle:
+            handle.write(
+                f"duration={self.duration:.2f}s interval={self.interval * 1000:.1f}ms "
+                f"samples={self.samples} idle_samples={self.idle_samples}\n\n"
+            )
+            handle.write("# self samples\n")
+            for key, count in self.self_counts.most_common():
+                handle.write(f"{count}\t{self.total_counts[key]}\t{_describe(key)}\n")
+            handle.write("\n# cumulative samples\n")
+            for key, count in self.total_counts.most_common():
+                handle.write(f"{count}\t{_describe(key)}\n")
+        # Collapsed stacks can be fed straight into flamegraph.pl / speedscope.
+        collapsed = path.with_suffix(".collapsed")
+        with collapsed.open("w", encoding="utf-8") as handle:
+            for stack, count in self.stacks.most_common():
+                handle.write(";".join(_describe(key) for key in stack) + f" {count}\n")
+        return path
+
+
+class SamplingProfiler:
+    """Samples every thread's Python stack from a background thread.
+
+    Nothing is hooked into the interpreter, so there is no cost at all while
+    the profiler is stopped and only the sampler thread's work while running.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._profile: CpuProfile | None = None
+        self._started = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, interval: float = DEFAULT_INTERVAL) -> bool:
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._stop.clear()
+            self._profile = CpuProfile(0.0, interval)
+            self._started = time.perf_counter()
+            self._thread = threading.Thread(
+                target=self._run, args=(interval,), name="bot-profiler", daemon=True
+            )
+            self._thread.start()
+        logger.info("CPU sampling profiler started (interval=%.1fms)", interval * 1000)
+        return True
+
+    def stop(self) -> CpuProfile | None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return None
+            self._stop.set()
+            thread.join()
+            profile = self._profile
+            self._profile = None
+        profile.duration = time.perf_counter() - self._started
+        logger.info("CPU sampling profiler stopped after %.2fs (%s samples)", profile.duration, profile.samples)
+        return profile
+
+    def _run(self, interval: float) -> None:
+        own_ident = threading.get_ident()
+        profile = self._profile
+        while not self._stop.wait(interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = self._stack(frame)
+                leaf = stack[-1]
+                if (os.path.basename(leaf[0]), leaf[2]) in _IDLE_LEAVES:
+                    profile.idle_samples += 1
+                    continue
+                profile.add(stack)
+
+    @staticmethod
+    def _stack(frame: FrameType | None) -> Tuple[FunctionKey, ...]:
+        keys: List[FunctionKey] = []
+        while frame is not None:
+            code = frame.f_code
+            keys.append((code.co_filename, code.co_firstlineno, code.co_name))
+            frame = frame.f_back
+        keys.reverse()
+        return tuple(keys)
+
+
+class MemoryProfiler:
+    """tracemalloc snapshots; each call diffs against the previous snapshot."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._previous: tracemalloc.Snapshot | None = None
+
+    @property
+    def running(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def snapshot(self, limit: int = DEFAULT_TOP) -> Tuple[List[str], Path | None]:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                self._previous = self._take()
+                logger.info("tracemalloc started with %s frames", TRACEMALLOC_FRAMES)
+                return ["tracemalloc started; baseline recorded. Run `mem` again to see growth."], None
+
+            current = self._take()
+            previous, self._previous = self._previous, current
+
+        traced, peak = tracemalloc.get_traced_memory()
+        lines = [f"traced={traced / 1024 / 1024:.1f}MiB peak={peak / 1024 / 1024:.1f}MiB"]
+        if previous is None:
+            # tracemalloc was started elsewhere (PYTHONTRACEMALLOC, another tool): no baseline to diff yet
+            lines.append("baseline recorded; largest allocation sites so far:")
+            for stat in current.statistics("lineno")[:limit]:
+                frame = stat.traceback[0]
+                lines.append(f"{stat.size / 1024:.1f}KiB ({stat.count}) {os.path.basename(frame.filename)}:{frame.lineno}")
+            return lines, self._write([], current)
+
+        diff = current.compare_to(previous, "lineno")
+        for stat in diff[:limit]:
+            frame = stat.traceback[0]
+            lines.append(
+                f"{stat.size_diff / 1024:+.1f}KiB ({stat.count_diff:+d}) "
+                f"{os.path.basename(frame.filename)}:{frame.lineno}"
+            )
+        return lines, self._write(diff, current)
+
+    def stop(self) -> bool:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                return False
+            tracemalloc.stop()
+            self._previous = None
+        logger.info("tracemalloc stopped")
+        return True
+
+    @staticmethod
+    def _take() -> tracemalloc.Snapshot:
+        snapshot = tracemalloc.take_snapshot()
+        return snapshot.filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            )
+        )
+
+    @staticmethod
+    def _write(diff: List[tracemalloc.StatisticDiff], current: tracemalloc.Snapshot) -> Path:
+        path = _report_path("mem", ".txt")
+        with path.open("w", encoding="utf-8") as handle:
+            handle.write("# growth since previous snapshot\n")
+            for stat in diff:
+                if not stat.size_diff and not stat.count_diff:
+                    continue
+                handle.write(f"{stat}\n")
+            handle.write("\n# largest allocation sites (traceback)\n")
+            for stat in current.statistics("traceback")[:50]:
+                handle.write(f"{stat}\n")
+                for line in stat.traceback.format():
+                    handle.write(f"    {line}\n")
+        return path
+
+
+def parse_top(params: List[str], default: int = DEFAULT_TOP) -> int:
+    for item in params:
+        if item.isdigit():
+            return max(1, min(int(item), 50))
+    return default
+
+
+def interval_from(params: List[str]) -> float:
+    for item in params:
+        try:
+            value = float(item)
+        except ValueError:
+            continue
+        if value > 0 and math.isfinite(value):
+            return max(MIN_INTERVAL, min(value / 1000, MAX_INTERVAL))
+    return DEFAULT_INTERVAL
+
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
 import json
+import time
 from typing import Any, Dict, Iterable
 
 import requests
 
+import tracing
 from logger import logger
+from metrics import SEND_LATENCY, SEND_TOTAL
+
+# a response of this type marks the command as handled without sending
+# anything, e.g. when the real reply will be sent later from another thread
+NOOP_ACTION = "noop"
 
 
 class SendClient:
@@ -18,33 +25,47 @@ class SendClient:
         logger.info("Send client initialized for %s", self.base_url)
 
     def dispatch(self, responses: Iterable[Dict[str, Any]], context: Dict[str, Any]) -> None:
-        for response in responses:
-            action = response.get("type")
-            if not action:
-                logger.error("Response entry missing action type: %s", response)
-                continue
-
-            payload = response.get("payload")
-            if payload:
-                self._post(action, payload)
-                continue
+        # Re-binding is a no-op on the worker that owns the trace, but keeps
+        # log lines attributable when a plugin replies from another thread.
+        with tracing.bind(context.get("trace_id")):
+            for response in responses:
+                action = response.get("type")
+                if not action:
+                    logger.error("Response entry missing action type: %s", response)
+                    continue
+                if action == NOOP_ACTION:
+                    continue
 
-            text = response.get("text", "")
-            number = response.get("number")
-            payload = self._build_text_payload(action, text, number, context)
-            if not payload:
-                continue
-            self._post(action, payload)
+                payload = response.get("payload")
+                if payload:
+                    self._post(action, payload)
+                    continue
+
+                text = response.get("text", "")
+                number = response.get("number")
+                payload = self._build_text_payload(action, text, number, context)
+                if not payload:
+                    continue
+                self._post(action, payload)
 
     def _post(self, action: str, payload: Dict[str, Any]) -> None:
         url = f"{self.base_url}/{action}"
+        started = time.perf_counter()
+        result = "failure"
         try:
             logger.info("POST %s -> %s", action, json.dumps(payload, ensure_ascii=False))
             response = requests.post(url, json=payload, timeout=10)
             response.raise_for_status()
-            logger.success("Action %s sent successfully", action)
+            result = "success"
+            logger.success("Action %s sent successfully in %.1fms", action, (time.perf_counter() - started) * 1000)
         except requests.RequestException as exc:
-            logger.error("Failed to call %s: %s", action, exc)
+            logger.error("Failed to call %s after %.1fms: %s", action, (time.perf_counter() - started) * 1000, exc)
+        finally:
+            # unexpected errors (an unserializable payload, say) still propagate, but are counted first
+            elapsed = time.perf_counter() - started
+            SEND_TOTAL.inc(action, result)
+            SEND_LATENCY.observe(elapsed, action)
+            tracing.record(f"send:{action}", elapsed)
 
     @staticmethod
     def _build_text_payload(
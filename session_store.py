@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import sqlite3
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from logger import logger
+
+DEFAULT_PATH = Path(__file__).parent / "data" / "sessions.sqlite3"
+# Expired rows are invisible to reads straight away; deleting them is batched.
+PURGE_INTERVAL = 300.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires REAL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires) WHERE expires IS NOT NULL;
+"""
+
+
+class _Database:
+    """One SQLite file in WAL mode, with a connection per thread."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._local = threading.local()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self.connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # autocommit: every statement is its own short transaction, so
+            # readers never wait on writers under WAL
+            conn = sqlite3.connect(str(self.path), timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+_databases: Dict[Path, _Database] = {}
+_databases_lock = threading.Lock()
+
+
+def _database(path: Path) -> _Database:
+    path = path.resolve()
+    with _databases_lock:
+        db = _databases.get(path)
+        if db is None:
+            db = _databases[path] = _Database(path)
+        return db
+
+
+class SessionStore:
+    """JSON values keyed by string within a namespace.
+
+    Reads and writes touch a single row. ``lock(key)`` serialises
+    read-modify-write sequences on one key across worker threads without
+    blocking other keys. ``ttl`` (seconds) expires idle entries; every
+    ``put`` pushes the expiry forward.
+    """
+
+    def __init__(self, namespace: str, ttl: Optional[float] = None, path: Path | str | None = None) -> None:
+        self.namespace = namespace
+        self.ttl = ttl
+        self._db = _database(Path(path) if path else DEFAULT_PATH)
+        self._locks: "weakref.WeakValueDictionary[str, threading.RLock]" = weakref.WeakValueDictionary()
+        self._locks_guard = threading.Lock()
+        self._next_purge = 0.0
+
+    @contextlib.contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = threading.RLock()
+                self._locks[key] = lock
+        # the local reference keeps the lock alive while anyone holds it
+        with lock:
+            yield
+
+    def get(self, key: str) -> Optional[Any]:
+        row = (
+            self._db.connection()
+            .execute(
+                "SELECT value FROM sessions WHERE namespace = ? AND key = ? AND (expires IS NULL OR expires > ?)",
+                (self.namespace, key, time.time()),
+            )
+            .fetchone()
+        )
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, value: Any) -> None:
+        now = time.time()
+        expires = now + self.ttl if self.ttl else None
+        self._db.connection().execute(
+            "INSERT OR REPLACE INTO sessions (namespace, key, value, expires) VALUES (?, ?, ?, ?)",
+            (self.namespace, key, json.dumps(value, ensure_ascii=False, separators=(",", ":")), expires),
+        )
+        if self.ttl and now >= self._next_purge:
+            self._next_purge = now + PURGE_INTERVAL
+            self.purge_expired(now)
+
+    def delete(self, key: str) -> bool:
+        cursor = self._db.connection().execute(
+            "DELETE FROM sessions WHERE namespace = ? AND key = ?", (self.namespace, key)
+        )
+        return cursor.rowcount > 0
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        cursor = self._db.connection().execute(
+            "DELETE FROM sessions WHERE namespace = ? AND expires IS NOT NULL AND expires <= ?",
+            (self.namespace, time.time() if now is None else now),
+        )
+        if cursor.rowcount:
+            logger.info("Purged %d expired %s sessions", cursor.rowcount, self.namespace)
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        row = (
+            self._db.connection()
+            .execute(
+                "SELECT COUNT(*) FROM sessions WHERE namespace = ? AND (expires IS NULL OR expires > ?)",
+                (self.namespace, time.time()),
+            )
+            .fetchone()
+        )
+        return row[0]
+
+    def import_json(self, path: Path) -> int:
+        """One-off migration from a whole-file JSON dict of sessions.
+
+        The file is renamed to ``<name>.migrated`` afterwards so the import
+        never runs twice.
+        """
+        if not path.exists():
+            return 0
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, json.JSONDecodeError) as exc:
+            logger.error("Skipping session migration from %s: %s", path, exc)
+            return 0
+        count = 0
+        if isinstance(data, dict):
+            for key, value in data.items():
+                self.put(str(key), value)
+                count += 1
+        path.replace(path.with_name(path.name + ".migrated"))
+        logger.info("Migrated %d %s sessions from %s", count, self.namespace, path)
+        return count
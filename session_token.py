@@ -0,0 +1,59 @@
+"""Stateless, HMAC-signed tokens carrying small pieces of session state.
+
+A token is ``base64url(payload | issued | mac)``: the caller's payload
+bytes, the issue time as a 32-bit unix timestamp and a truncated
+HMAC-SHA256 over both plus a ``bind`` string (for example the chat and
+user it was handed to), so it only verifies for that owner. Nothing is
+kept server-side; every process configured with the same secret can
+verify tokens issued by the others.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import struct
+import time
+from typing import Optional, Union
+
+_ISSUED = struct.Struct(">I")
+
+
+class TokenError(ValueError):
+    """Raised when a token is malformed, forged or expired."""
+
+
+class TokenSigner:
+    """Signs and verifies payloads; ``ttl`` (seconds) bounds a token's age."""
+
+    def __init__(self, secret: Union[str, bytes], ttl: Optional[float] = None, mac_size: int = 8) -> None:
+        if not secret:
+            raise ValueError("secret must not be empty")
+        self._key = secret.encode("utf-8") if isinstance(secret, str) else bytes(secret)
+        self.ttl = ttl
+        self.mac_size = mac_size
+
+    def sign(self, payload: bytes, bind: str = "") -> str:
+        body = payload + _ISSUED.pack(int(time.time()))
+        raw = body + self._mac(body, bind)
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+    def verify(self, token: str, bind: str = "") -> bytes:
+        """Return the payload of a genuine, unexpired token issued for ``bind``."""
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        except ValueError as exc:
+            raise TokenError("malformed token") from exc
+        if len(raw) < _ISSUED.size + self.mac_size:
+            raise TokenError("malformed token")
+        body, mac = raw[: -self.mac_size], raw[-self.mac_size :]
+        if not hmac.compare_digest(mac, self._mac(body, bind)):
+            raise TokenError("bad token signature")
+        (issued,) = _ISSUED.unpack(body[-_ISSUED.size :])
+        if self.ttl is not None and time.time() - issued > self.ttl:
+            raise TokenError("token expired")
+        return body[: -_ISSUED.size]
+
+    def _mac(self, body: bytes, bind: str) -> bytes:
+        return hmac.new(self._key, body + b"\0" + bind.encode("utf-8"), hashlib.sha256).digest()[: self.mac_size]
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import contextvars
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+TRACE_KEY = "_trace_id"
+RECEIVED_KEY = "_received_at"
+NO_TRACE = "-"
+
+
+class Trace:
+    """Timing spans collected while one event travels through the bot."""
+
+    __slots__ = ("trace_id", "started", "spans")
+
+    def __init__(self, trace_id: str) -> None:
+        self.trace_id = trace_id
+        self.started = time.perf_counter()
+        self.spans: List[Tuple[str, float]] = []
+
+    def record(self, name: str, seconds: float) -> None:
+        self.spans.append((name, seconds))
+
+    def summary(self) -> str:
+        total = time.perf_counter() - self.started
+        parts = [f"{name}={seconds * 1000:.1f}ms" for name, seconds in self.spans]
+        parts.append(f"total={total * 1000:.1f}ms")
+        return " ".join(parts)
+
+
+_current: contextvars.ContextVar[Trace | None] = contextvars.ContextVar("bot_trace", default=None)
+
+
+def assign(event: Dict[str, Any]) -> str:
+    """Stamp an incoming event with a trace id, reusing message_id when present."""
+    message_id = event.get("message_id")
+    trace_id = str(message_id) if message_id is not None else uuid.uuid4().hex[:12]
+    event[TRACE_KEY] = trace_id
+    event[RECEIVED_KEY] = time.perf_counter()
+    return trace_id
+
+
+def current_trace_id() -> str:
+    trace = _current.get()
+    return trace.trace_id if trace is not None else NO_TRACE
+
+
+def current() -> Trace | None:
+    return _current.get()
+
+
+@contextmanager
+def bind(trace_id: str | None) -> Iterator[Trace]:
+    """Make ``trace_id`` current for this thread until the block exits.
+
+    When the id is already current the existing trace is reused, so nested
+    calls (and senders invoked from the worker that owns the trace) keep
+    appending to the same span list.
+    """
+    trace = _current.get()
+    if trace is not None and trace.trace_id == (trace_id or NO_TRACE):
+        yield trace
+        return
+    trace = Trace(trace_id or NO_TRACE)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def record(name: str, seconds: float) -> None:
+    trace = _current.get()
+    if trace is not None:
+        trace.record(name, seconds)